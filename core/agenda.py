@@ -0,0 +1,172 @@
+"""
+Geração do feed iCalendar (RFC 5545) da agenda de um prestador.
+
+O feed é gerado em streaming e guardado no cache sob uma versão por prestador;
+a versão muda quando as reservas, os horários ou os serviços daquele prestador
+mudam. O ETag é derivado do conteúdo guardado, então nunca confirma (304) um
+calendário diferente do que seria gerado agora, mesmo depois que o conteúdo
+expira do cache.
+Calendários não enviam credenciais, então o link de assinatura leva um token
+secreto por prestador, derivado da ``SECRET_KEY``.
+"""
+
+import hashlib
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from .models import HorarioTrabalho, Reserva
+
+TEMPO_CACHE_AGENDA = 60 * 60 * 24
+DIAS_SEMANA = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+STATUS_ICAL = {
+    "confirmado": "CONFIRMED",
+    "concluido": "CONFIRMED",
+    "cancelado": "CANCELLED",
+}
+
+
+def token_agenda(prestador_id):
+    return salted_hmac("core.agenda", str(prestador_id)).hexdigest()[:32]
+
+
+def token_agenda_valido(prestador_id, token):
+    return constant_time_compare(token_agenda(prestador_id), token or "")
+
+
+def _chave_versao(prestador_id):
+    return f"agenda:versao:{prestador_id}"
+
+
+def _chave_conteudo(prestador_id, versao):
+    return f"agenda:ics:{prestador_id}:{versao}"
+
+
+def versao_agenda(prestador_id):
+    chave = _chave_versao(prestador_id)
+    versao = cache.get(chave)
+    if versao is None:
+        versao = time.time_ns()
+        if not cache.add(chave, versao, None):
+            versao = cache.get(chave)
+    return versao
+
+
+def invalidar_agenda(prestador_id):
+    cache.set(_chave_versao(prestador_id), time.time_ns(), None)
+
+
+def etag_agenda(conteudo):
+    return f'"agenda-{hashlib.sha256(conteudo.encode()).hexdigest()[:32]}"'
+
+
+def agenda_em_cache(prestador_id, versao):
+    """``(etag, conteudo)`` do calendário guardado, ou ``None``."""
+    return cache.get(_chave_conteudo(prestador_id, versao))
+
+
+def _escapar(texto):
+    return (
+        texto.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _linha(conteudo):
+    # Linhas com mais de 75 octetos são dobradas conforme a RFC 5545.
+    dados = conteudo.encode("utf-8")
+    if len(dados) <= 75:
+        return conteudo + "\r\n"
+    partes = []
+    atual = ""
+    limite = 75
+    for caractere in conteudo:
+        if len((atual + caractere).encode("utf-8")) > limite:
+            partes.append(atual)
+            atual = ""
+            limite = 74
+        atual += caractere
+    partes.append(atual)
+    return "\r\n ".join(partes) + "\r\n"
+
+
+def _utc(valor):
+    return timezone.localtime(valor, dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def gerar_agenda(prestador):
+    """Gera o calendário do prestador em blocos de texto."""
+    carimbo = _utc(timezone.now())
+    yield (
+        "BEGIN:VCALENDAR\r\n"
+        "VERSION:2.0\r\n"
+        "PRODID:-//Sistema de Reservas//Agenda//PT\r\n"
+        "CALSCALE:GREGORIAN\r\n"
+        + _linha(f"X-WR-CALNAME:{_escapar(f'Agenda de {prestador}')}")
+    )
+
+    # Semana de referência iniciando em uma segunda-feira.
+    referencia = date(2024, 1, 1)
+    for horario in HorarioTrabalho.objects.filter(prestador=prestador).order_by(
+        "dia_semana", "inicio"
+    ):
+        dia = referencia + timedelta(days=horario.dia_semana)
+        inicio = datetime.combine(dia, horario.inicio).strftime("%Y%m%dT%H%M%S")
+        fim = datetime.combine(dia, horario.fim).strftime("%Y%m%dT%H%M%S")
+        yield (
+            "BEGIN:VEVENT\r\n"
+            f"UID:horario-{horario.pk}@sistema-reservas\r\n"
+            f"DTSTAMP:{carimbo}\r\n"
+            f"DTSTART:{inicio}\r\n"
+            f"DTEND:{fim}\r\n"
+            f"RRULE:FREQ=WEEKLY;BYDAY={DIAS_SEMANA[horario.dia_semana]}\r\n"
+            "SUMMARY:Horário de trabalho\r\n"
+            "TRANSP:TRANSPARENT\r\n"
+            "END:VEVENT\r\n"
+        )
+
+    reservas = (
+        Reserva.objects.filter(prestador=prestador)
+        .order_by("data_hora")
+        .values_list(
+            "id", "data_hora", "status", "notas", "servico__nome", "servico__duracao"
+        )
+    )
+    for pk, data_hora, status, notas, servico, duracao in reservas.iterator(
+        chunk_size=500
+    ):
+        evento = [
+            "BEGIN:VEVENT\r\n",
+            f"UID:reserva-{pk}@sistema-reservas\r\n",
+            f"DTSTAMP:{carimbo}\r\n",
+            f"DTSTART:{_utc(data_hora)}\r\n",
+            f"DTEND:{_utc(data_hora + duracao)}\r\n",
+            _linha(f"SUMMARY:{_escapar(servico)}"),
+            f"STATUS:{STATUS_ICAL.get(status, 'TENTATIVE')}\r\n",
+        ]
+        if notas:
+            evento.append(_linha(f"DESCRIPTION:{_escapar(notas)}"))
+        evento.append("END:VEVENT\r\n")
+        yield "".join(evento)
+
+    yield "END:VCALENDAR\r\n"
+
+
+def gerar_agenda_com_cache(prestador, versao):
+    """Repassa os blocos gerados e, ao final, guarda o calendário completo."""
+    blocos = []
+    for bloco in gerar_agenda(prestador):
+        blocos.append(bloco)
+        yield bloco
+    conteudo = "".join(blocos)
+    cache.set(
+        _chave_conteudo(prestador.pk, versao),
+        (etag_agenda(conteudo), conteudo),
+        TEMPO_CACHE_AGENDA,
+    )
@@ -0,0 +1,103 @@
+"""
+Reserva com escolha automática do prestador.
+
+O cliente informa apenas o serviço e o horário. Os prestadores elegíveis
+(oferecem o serviço, trabalham no horário e estão livres) são carregados em
+uma única consulta e organizados em um heap pelo critério pedido; a reserva
+é criada pelo ``ReservaSerializer``, com as mesmas regras da reserva manual,
+no melhor candidato e, se ele acabou de ser ocupado, no próximo.
+"""
+
+import heapq
+
+from django.db.models import Exists, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework import serializers
+
+from .bloqueios import prestadores_bloqueados
+from .idempotencia import CODIGOS_PASSAGEIROS, codigos_erro
+from .models import STATUS_OCUPANTES, OcupacaoDiaria, Prestador, Reserva
+from .serializers import ReservaSerializer
+
+
+def prestadores_elegiveis(servico, data_hora):
+    """Retorna ``[(prestador_id, rank_avaliacao, minutos_reservados_no_dia)]``."""
+    local = timezone.localtime(data_hora)
+    termino = local + servico.duracao
+    if termino.date() != local.date():
+        return []
+    ocupado = Reserva.objects.filter(
+        prestador=OuterRef("pk"), data_hora=data_hora, status__in=STATUS_OCUPANTES
+    )
+    carga = OcupacaoDiaria.objects.filter(
+        prestador=OuterRef("pk"), data=local.date()
+    ).values("minutos_reservados")
+    return list(
+        Prestador.objects.filter(
+            servicos=servico,
+            horariotrabalho__dia_semana=local.weekday(),
+            horariotrabalho__inicio__lte=local.time(),
+            horariotrabalho__fim__gte=termino.time(),
+        )
+        .exclude(Exists(ocupado))
+        .annotate(
+            carga=Coalesce(
+                Subquery(carga[:1], output_field=IntegerField()), Value(0)
+            )
+        )
+        .values_list("pk", "rank_avaliacao", "carga")
+        .distinct()
+    )
+
+
+def _heap_candidatos(elegiveis, criterio):
+    if criterio == "melhor_avaliacao":
+        heap = [(-rank, carga, pk) for pk, rank, carga in elegiveis]
+    else:
+        heap = [(carga, -rank, pk) for pk, rank, carga in elegiveis]
+    heapq.heapify(heap)
+    return heap
+
+
+def _horario_disputado(erro):
+    """Indica se a reserva falhou apenas porque o horário foi bloqueado ou ocupado."""
+    return set(codigos_erro(erro.get_codes())) <= CODIGOS_PASSAGEIROS
+
+
+def reservar_automaticamente(
+    cliente, servico, data_hora, criterio="menor_carga", notas=None
+):
+    """
+    Cria a reserva com o melhor prestador livre. Retorna ``None`` quando
+    nenhum prestador elegível está disponível; outros erros de validação são
+    levantados.
+    """
+    elegiveis = prestadores_elegiveis(servico, data_hora)
+    bloqueados = prestadores_bloqueados([pk for pk, _, _ in elegiveis], data_hora)
+    heap = _heap_candidatos(
+        [linha for linha in elegiveis if linha[0] not in bloqueados], criterio
+    )
+    while heap:
+        prestador_id = heapq.heappop(heap)[-1]
+        # Mesmas validações da reserva manual; a corrida pelo horário é
+        # resolvida pelo índice único e vira ValidationError no serializer.
+        serializer = ReservaSerializer(
+            data={
+                "cliente": cliente.pk,
+                "prestador": prestador_id,
+                "servico": servico.pk,
+                "data_hora": data_hora,
+                "status": "confirmado",
+                "notas": notas,
+            }
+        )
+        try:
+            serializer.is_valid(raise_exception=True)
+            return serializer.save()
+        except serializers.ValidationError as erro:
+            if not _horario_disputado(erro):
+                raise
+            # Ocupado ou bloqueado por outra requisição: tenta o próximo.
+            continue
+    return None
@@ -0,0 +1,215 @@
+"""
+Tabelas de agregação diária para os relatórios de ocupação.
+
+``OcupacaoDiaria`` e ``ContagemServicoDiaria`` são ajustadas de forma
+incremental pelos sinais de ``Reserva`` (criação, mudança de status ou horário
+e exclusão), na mesma transação da alteração. ``recalcular_agregados``
+reconstrói as tabelas a partir das reservas.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncWeek
+from django.utils import timezone
+
+from .models import (
+    STATUS_OCUPANTES,
+    normalizar_data_hora,
+    ContagemServicoDiaria,
+    HorarioTrabalho,
+    OcupacaoDiaria,
+    Reserva,
+    ReservaArquivada,
+    Servico,
+)
+
+
+def _ajustar(modelo, chaves, **deltas):
+    atualizacao = {campo: F(campo) + delta for campo, delta in deltas.items()}
+    if modelo.objects.filter(**chaves).update(**atualizacao):
+        return
+    if any(delta < 0 for delta in deltas.values()):
+        # A linha foi removida (exclusão em cascata ou recálculo); um valor
+        # negativo não teria significado.
+        return
+    try:
+        with transaction.atomic():
+            modelo.objects.create(**chaves, **deltas)
+    except IntegrityError:
+        modelo.objects.filter(**chaves).update(**atualizacao)
+
+
+def aplicar_reservas(alteracoes):
+    """
+    Aplica ``[(sinal, prestador_id, servico_id, data_hora, status)]`` às
+    tabelas de agregação; ``sinal`` é ``1`` para somar e ``-1`` para subtrair.
+    """
+    servicos = {servico_id for _, _, servico_id, _, _ in alteracoes}
+    duracoes = dict(
+        Servico.objects.filter(pk__in=servicos).values_list("pk", "duracao")
+    )
+    for sinal, prestador_id, servico_id, data_hora, status in alteracoes:
+        data = timezone.localtime(normalizar_data_hora(data_hora)).date()
+        _ajustar(
+            ContagemServicoDiaria,
+            {"servico_id": servico_id, "data": data, "status": status},
+            quantidade=sinal,
+        )
+        if status in STATUS_OCUPANTES:
+            duracao = duracoes.get(servico_id) or timedelta()
+            _ajustar(
+                OcupacaoDiaria,
+                {"prestador_id": prestador_id, "data": data},
+                minutos_reservados=sinal * int(duracao.total_seconds() // 60),
+                reservas=sinal,
+            )
+
+
+def _somar_por_chave(linhas, chave, *campos):
+    """Soma ``campos`` das linhas com a mesma ``chave``: ``{chave: [somas]}``."""
+    totais = {}
+    for linha in linhas:
+        identificador = tuple(linha[nome] for nome in chave)
+        valores = [linha[campo] for campo in campos]
+        anteriores = totais.get(identificador)
+        totais[identificador] = (
+            valores
+            if anteriores is None
+            else [soma + valor for soma, valor in zip(anteriores, valores)]
+        )
+    return totais
+
+
+@transaction.atomic
+def recalcular_agregados(inicio=None, fim=None):
+    """
+    Reconstrói as agregações, opcionalmente apenas entre ``inicio`` e ``fim``.
+    Lê ``Reserva`` e ``ReservaArquivada``: o arquivamento move as reservas sem
+    alterar as agregações, e elas continuam contando nos relatórios.
+    """
+    origens = [
+        modelo.objects.annotate(dia=TruncDate("data_hora"))
+        for modelo in (Reserva, ReservaArquivada)
+    ]
+    ocupacao = OcupacaoDiaria.objects.all()
+    contagens = ContagemServicoDiaria.objects.all()
+    if inicio is not None:
+        origens = [reservas.filter(dia__gte=inicio) for reservas in origens]
+        ocupacao = ocupacao.filter(data__gte=inicio)
+        contagens = contagens.filter(data__gte=inicio)
+    if fim is not None:
+        origens = [reservas.filter(dia__lte=fim) for reservas in origens]
+        ocupacao = ocupacao.filter(data__lte=fim)
+        contagens = contagens.filter(data__lte=fim)
+    ocupacao.delete()
+    contagens.delete()
+
+    por_servico = _somar_por_chave(
+        (
+            linha
+            for reservas in origens
+            for linha in reservas.values("servico", "dia", "status")
+            .annotate(quantidade=Count("id"))
+            .order_by()
+        ),
+        ("servico", "dia", "status"),
+        "quantidade",
+    )
+    novas_contagens = [
+        ContagemServicoDiaria(
+            servico_id=servico_id, data=dia, status=status, quantidade=quantidade
+        )
+        for (servico_id, dia, status), (quantidade,) in por_servico.items()
+    ]
+    ContagemServicoDiaria.objects.bulk_create(novas_contagens, batch_size=1000)
+
+    por_prestador = _somar_por_chave(
+        (
+            linha
+            for reservas in origens
+            for linha in reservas.filter(status__in=STATUS_OCUPANTES)
+            .values("prestador", "dia")
+            .annotate(duracao=Sum("servico__duracao"), quantidade=Count("id"))
+            .order_by()
+        ),
+        ("prestador", "dia"),
+        "duracao",
+        "quantidade",
+    )
+    novas_ocupacoes = [
+        OcupacaoDiaria(
+            prestador_id=prestador_id,
+            data=dia,
+            minutos_reservados=int(duracao.total_seconds() // 60),
+            reservas=quantidade,
+        )
+        for (prestador_id, dia), (duracao, quantidade) in por_prestador.items()
+    ]
+    OcupacaoDiaria.objects.bulk_create(novas_ocupacoes, batch_size=1000)
+    return len(novas_ocupacoes), len(novas_contagens)
+
+
+def _capacidade_por_dia_semana(prestadores):
+    capacidade = defaultdict(int)
+    for prestador_id, dia_semana, inicio, fim in HorarioTrabalho.objects.filter(
+        prestador__in=prestadores
+    ).values_list("prestador_id", "dia_semana", "inicio", "fim"):
+        minutos = (
+            datetime.combine(datetime.min, fim) - datetime.combine(datetime.min, inicio)
+        ).total_seconds() // 60
+        capacidade[prestador_id, dia_semana] += max(int(minutos), 0)
+    return capacidade
+
+
+def ocupacao_semanal(inicio, fim, prestador=None):
+    """Utilização semanal por prestador: minutos reservados x capacidade."""
+    linhas = OcupacaoDiaria.objects.filter(data__gte=inicio, data__lte=fim)
+    if prestador is not None:
+        linhas = linhas.filter(prestador=prestador)
+    linhas = list(
+        linhas.annotate(semana=TruncWeek("data"))
+        .values("prestador", "semana")
+        .annotate(minutos=Sum("minutos_reservados"), reservas=Sum("reservas"))
+        .order_by("prestador", "semana")
+    )
+    capacidade = _capacidade_por_dia_semana({linha["prestador"] for linha in linhas})
+
+    resultado = []
+    for linha in linhas:
+        semana = linha["semana"]
+        dias = [
+            semana + timedelta(days=deslocamento)
+            for deslocamento in range(7)
+            if inicio <= semana + timedelta(days=deslocamento) <= fim
+        ]
+        capacidade_minutos = sum(
+            capacidade[linha["prestador"], dia.weekday()] for dia in dias
+        )
+        resultado.append(
+            {
+                "prestador": linha["prestador"],
+                "semana": semana.isoformat(),
+                "minutos_reservados": linha["minutos"],
+                "capacidade_minutos": capacidade_minutos,
+                "utilizacao": (
+                    round(linha["minutos"] / capacidade_minutos, 4)
+                    if capacidade_minutos
+                    else None
+                ),
+                "reservas": linha["reservas"],
+            }
+        )
+    return resultado
+
+
+def contagem_por_servico(inicio, fim):
+    return list(
+        ContagemServicoDiaria.objects.filter(data__gte=inicio, data__lte=fim)
+        .values("servico", "status")
+        .annotate(quantidade=Sum("quantidade"))
+        .filter(quantidade__gt=0)
+        .order_by("servico", "status")
+    )
@@ -0,0 +1,94 @@
+"""
+Arquivamento de reservas finalizadas.
+
+Reservas concluídas ou canceladas há mais de ``RESERVAS_ARQUIVAR_APOS_DIAS``
+dias são copiadas para ``ReservaArquivada`` e removidas de ``Reserva`` em lotes,
+cada um em sua própria transação curta. Interromper o processo não deixa
+estado intermediário: o próximo lote recomeça de onde parou. Como a remoção
+não passa pelos sinais, o tombstone do feed de sincronização e a invalidação
+da agenda dos prestadores afetados são feitos explicitamente; as agregações
+diárias não mudam.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .agenda import invalidar_agenda
+from .models import STATUS_FINALIZADOS, Reserva, ReservaAlteracao, ReservaArquivada
+
+CAMPOS_ARQUIVADOS = [
+    "id",
+    "cliente_id",
+    "prestador_id",
+    "servico_id",
+    "data_hora",
+    "status",
+    "notas",
+]
+
+
+def dias_para_arquivar():
+    return getattr(settings, "RESERVAS_ARQUIVAR_APOS_DIAS", 180)
+
+
+def data_corte(dias=None):
+    return timezone.now() - timedelta(days=dias_para_arquivar() if dias is None else dias)
+
+
+def arquivar_lote(corte, tamanho):
+    """Arquiva até ``tamanho`` reservas anteriores a ``corte``; retorna quantas."""
+    with transaction.atomic():
+        linhas = list(
+            Reserva.objects.filter(status__in=STATUS_FINALIZADOS, data_hora__lt=corte)
+            .order_by("pk")
+            .values(*CAMPOS_ARQUIVADOS)[:tamanho]
+        )
+        if not linhas:
+            return 0
+        ReservaArquivada.objects.bulk_create(
+            [ReservaArquivada(**linha) for linha in linhas], ignore_conflicts=True
+        )
+        # Para o feed de sincronização a reserva deixou de existir: sem o
+        # tombstone, os clientes manteriam a cópia local para sempre.
+        ReservaAlteracao.objects.bulk_create(
+            [
+                ReservaAlteracao(
+                    reserva_id=linha["id"],
+                    cliente_id=linha["cliente_id"],
+                    operacao="excluido",
+                )
+                for linha in linhas
+            ]
+        )
+        # Remoção direta, sem sinais. ``QuerySet.delete()`` carregaria cada
+        # reserva e dispararia os receptores de ``post_delete``, que tratam a
+        # exclusão como cancelamento: subtrairiam das agregações (que seguem
+        # contando as arquivadas) e acionariam a lista de espera. Nenhum modelo
+        # tem chave estrangeira para ``Reserva``, então não há cascata a
+        # perder; dos efeitos dos sinais, o tombstone acima e a invalidação da
+        # agenda abaixo são os que valem para o arquivamento.
+        Reserva.objects.filter(pk__in=[linha["id"] for linha in linhas])._raw_delete(
+            Reserva.objects.db
+        )
+        for prestador_id in {linha["prestador_id"] for linha in linhas}:
+            transaction.on_commit(lambda pk=prestador_id: invalidar_agenda(pk))
+    return len(linhas)
+
+
+def arquivar_reservas(dias=None, tamanho_lote=500, pausa=0.0, max_lotes=None):
+    """Arquiva em lotes, com ``pausa`` segundos entre eles; retorna o total."""
+    corte = data_corte(dias)
+    total = lotes = 0
+    while max_lotes is None or lotes < max_lotes:
+        arquivadas = arquivar_lote(corte, tamanho_lote)
+        if not arquivadas:
+            break
+        total += arquivadas
+        lotes += 1
+        if pausa:
+            time.sleep(pausa)
+    return total
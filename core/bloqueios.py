@@ -0,0 +1,61 @@
+"""
+Bloqueios temporários de horário durante o checkout.
+
+Um bloqueio reserva o par (prestador, data_hora) por alguns segundos usando
+``cache.add``, que só grava se a chave não existir. Com um cache compartilhado
+(Redis/Memcached) a operação é atômica entre processos, e quem perde a disputa
+é recusado pelo cache sem chegar às consultas de validação da reserva.
+"""
+
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def tempo_bloqueio():
+    return getattr(settings, "RESERVAS_BLOQUEIO_TTL", 300)
+
+
+def _chave_horario(prestador_id, data_hora):
+    return f"bloqueio:{prestador_id}:{int(data_hora.timestamp())}"
+
+
+def _chave_token(token):
+    return f"bloqueio:token:{token}"
+
+
+def bloquear_horario(prestador_id, data_hora, ttl=None):
+    """Retorna o token do bloqueio, ou ``None`` se o horário já está bloqueado."""
+    ttl = ttl or tempo_bloqueio()
+    token = uuid.uuid4().hex
+    chave = _chave_horario(prestador_id, data_hora)
+    if not cache.add(chave, token, ttl):
+        return None
+    cache.set(_chave_token(token), chave, ttl)
+    return token
+
+
+def dono_bloqueio(prestador_id, data_hora):
+    return cache.get(_chave_horario(prestador_id, data_hora))
+
+
+def horarios_bloqueados(prestador_id, horarios):
+    chaves = {_chave_horario(prestador_id, horario): horario for horario in horarios}
+    return {chaves[chave] for chave in cache.get_many(list(chaves))}
+
+
+def prestadores_bloqueados(prestador_ids, data_hora):
+    """Dos prestadores informados, os que têm ``data_hora`` bloqueado."""
+    chaves = {_chave_horario(pk, data_hora): pk for pk in prestador_ids}
+    return {chaves[chave] for chave in cache.get_many(list(chaves))}
+
+
+def liberar_bloqueio(token):
+    """Remove o bloqueio identificado pelo token. Retorna ``False`` se expirado."""
+    chave = cache.get(_chave_token(token))
+    cache.delete(_chave_token(token))
+    if chave is None or cache.get(chave) != token:
+        return False
+    cache.delete(chave)
+    return True
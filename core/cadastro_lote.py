@@ -0,0 +1,174 @@
+"""
+Cadastro de clientes em lote.
+
+O hash das senhas domina o custo de criar um usuário. O comando
+``importar_clientes`` o calcula em um pool de processos criado só para a
+importação, enquanto o processo principal valida as linhas e grava os lotes já
+prontos com ``bulk_create`` de ``User`` e ``Cliente``; a API calcula no próprio
+processo, com poucas linhas por requisição. Linhas inválidas não interrompem a
+importação: são devolvidas no relatório com o número da linha e os erros.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, connections, transaction
+
+from .models import Cliente
+
+User = get_user_model()
+
+
+CAMPOS_TEXTO = ("username", "password", "email", "telefone", "endereco")
+
+
+def processos_padrao():
+    return getattr(settings, "RESERVAS_CADASTRO_PROCESSOS", None) or os.cpu_count()
+
+
+def _inicializar_processo():
+    # Necessário quando o pool usa "spawn": o processo filho começa sem Django.
+    django.setup()
+
+
+def criar_pool(processos):
+    """
+    Pool para o hash das senhas, a ser usado como gerenciador de contexto. As
+    conexões com o banco são fechadas antes: os processos filhos não devem
+    herdar os sockets abertos do pai.
+    """
+    connections.close_all()
+    return ProcessPoolExecutor(max_workers=processos, initializer=_inicializar_processo)
+
+
+def hash_senhas(senhas):
+    return [make_password(senha) for senha in senhas]
+
+
+def validar_linha(linha, usernames_vistos):
+    """Retorna ``{campo: mensagem}`` com os erros da linha (vazio se válida)."""
+    erros = {
+        campo: "Deve ser texto."
+        for campo in CAMPOS_TEXTO
+        if linha.get(campo) is not None and not isinstance(linha[campo], str)
+    }
+    if erros:
+        return erros
+    username = (linha.get("username") or "").strip()
+    if not username:
+        erros["username"] = "Obrigatório."
+    elif len(username) > User._meta.get_field("username").max_length:
+        erros["username"] = "Muito longo."
+    else:
+        try:
+            User.username_validator(username)
+        except ValidationError as erro:
+            erros["username"] = erro.messages[0]
+        else:
+            if username in usernames_vistos:
+                erros["username"] = "Repetido no arquivo."
+    if not linha.get("password"):
+        erros["password"] = "Obrigatório."
+    if linha.get("email"):
+        try:
+            validate_email(linha["email"])
+        except ValidationError as erro:
+            erros["email"] = erro.messages[0]
+    if len(linha.get("telefone") or "") > Cliente._meta.get_field("telefone").max_length:
+        erros["telefone"] = "Muito longo."
+    return erros
+
+
+def _gravar_lote(linhas, hashes):
+    usuarios = [
+        User(
+            username=linha["username"].strip(),
+            email=linha.get("email") or "",
+            password=senha,
+        )
+        for linha, senha in zip(linhas, hashes)
+    ]
+    with transaction.atomic():
+        usuarios = User.objects.bulk_create(usuarios)
+        Cliente.objects.bulk_create(
+            [
+                Cliente(
+                    usuario=usuario,
+                    telefone=linha.get("telefone") or None,
+                    endereco=linha.get("endereco") or None,
+                )
+                for usuario, linha in zip(usuarios, linhas)
+            ]
+        )
+
+
+def _gravar_individualmente(numeros, linhas, hashes, erros):
+    criados = 0
+    for numero, linha, senha in zip(numeros, linhas, hashes):
+        try:
+            _gravar_lote([linha], [senha])
+            criados += 1
+        except IntegrityError:
+            erros.append({"linha": numero, "erros": {"username": "Já cadastrado."}})
+    return criados
+
+
+def cadastrar_clientes(linhas, tamanho_lote=1000, pool=None):
+    """
+    Cadastra ``linhas`` (dicts com username, password, email, telefone e
+    endereco). Retorna ``{"criados": n, "erros": [{"linha": i, "erros": {...}}]}``,
+    com ``linha`` contada a partir de 1. Sem ``pool`` (ver ``criar_pool``), os
+    hashes são calculados no próprio processo.
+    """
+    erros = []
+    validas = []
+    vistos = set()
+    for numero, linha in enumerate(linhas, start=1):
+        problemas = validar_linha(linha, vistos)
+        if problemas:
+            erros.append({"linha": numero, "erros": problemas})
+        else:
+            vistos.add(linha["username"].strip())
+            validas.append((numero, linha))
+
+    existentes = set()
+    nomes = list(vistos)
+    for inicio in range(0, len(nomes), tamanho_lote):
+        existentes.update(
+            User.objects.filter(
+                username__in=nomes[inicio : inicio + tamanho_lote]
+            ).values_list("username", flat=True)
+        )
+    lotes = []
+    for numero, linha in validas:
+        if linha["username"].strip() in existentes:
+            erros.append({"linha": numero, "erros": {"username": "Já cadastrado."}})
+            continue
+        if not lotes or len(lotes[-1]) == tamanho_lote:
+            lotes.append([])
+        lotes[-1].append((numero, linha))
+
+    senhas = [[linha["password"] for _, linha in lote] for lote in lotes]
+    criados = 0
+    if pool is not None:
+        # Os lotes seguintes são calculados enquanto o atual é gravado.
+        resultados = pool.map(hash_senhas, senhas)
+    else:
+        resultados = map(hash_senhas, senhas)
+    for lote, hashes in zip(lotes, resultados):
+        numeros = [numero for numero, _ in lote]
+        dados = [linha for _, linha in lote]
+        try:
+            _gravar_lote(dados, hashes)
+            criados += len(lote)
+        except IntegrityError:
+            # Outro cadastro concorrente: isola as linhas em conflito.
+            criados += _gravar_individualmente(numeros, dados, hashes, erros)
+    erros.sort(key=lambda erro: erro["linha"])
+    return {"criados": criados, "erros": erros}
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.compatibility)
+def verificar_broker_realtime(app_configs, **kwargs):
+    """O ``MemoryBroker`` perde eventos quando há mais de um processo servindo."""
+    caminho = getattr(settings, "RESERVAS_REALTIME_BROKER", "core.realtime.MemoryBroker")
+    if settings.DEBUG or caminho != "core.realtime.MemoryBroker":
+        return []
+    return [
+        Warning(
+            "O MemoryBroker só entrega eventos publicados no próprio processo.",
+            hint=(
+                "Com mais de um worker, defina RESERVAS_REALTIME_BROKER como "
+                "'core.realtime.DatabaseBroker'."
+            ),
+            id="core.W001",
+        )
+    ]
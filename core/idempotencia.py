@@ -0,0 +1,133 @@
+"""
+Suporte ao cabeçalho ``Idempotency-Key`` em requisições de criação.
+
+As respostas 2xx e os erros de validação determinísticos de uma chave são
+guardados no cache por ``RESERVAS_IDEMPOTENCIA_TTL`` segundos e devolvidos às
+repetições sem executar a view novamente. Conflitos passageiros (horário
+bloqueado ou ocupado, códigos em ``CODIGOS_PASSAGEIROS``) e demais erros não são
+guardados: a repetição pode ter sucesso. Enquanto a primeira requisição está
+em andamento, uma trava criada com ``cache.add`` faz as duplicatas receberem
+409 imediatamente em vez de executarem em paralelo.
+"""
+
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .renderers import converter_json
+
+CABECALHO = "Idempotency-Key"
+CODIGO_INDISPONIVEL = "indisponivel"
+# Erros que dependem do estado do banco ou do cache no momento da requisição.
+CODIGOS_PASSAGEIROS = {CODIGO_INDISPONIVEL, "unique"}
+
+
+def tempo_idempotencia():
+    return getattr(settings, "RESERVAS_IDEMPOTENCIA_TTL", 24 * 60 * 60)
+
+
+def tempo_trava():
+    return getattr(settings, "RESERVAS_IDEMPOTENCIA_TRAVA", 300)
+
+
+def _chave(request, chave):
+    if request.user and request.user.is_authenticated:
+        dono = f"usuario:{request.user.pk}"
+    else:
+        dono = f"ip:{request.META.get('REMOTE_ADDR')}"
+    resumo = hashlib.sha256(f"{dono}:{request.path}:{chave}".encode()).hexdigest()
+    return f"idempotencia:{resumo}"
+
+
+def _impressao(request):
+    corpo = json.dumps(request.data, sort_keys=True, default=converter_json)
+    return hashlib.sha256(corpo.encode()).hexdigest()
+
+
+def _repetir(salva, impressao):
+    if salva["impressao"] != impressao:
+        return Response(
+            {CABECALHO: "Chave já utilizada com outro conteúdo."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(
+        salva["dados"],
+        status=salva["status"],
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def codigos_erro(codigos):
+    """Percorre o resultado aninhado de ``ValidationError.get_codes()``."""
+    if isinstance(codigos, dict):
+        for valor in codigos.values():
+            yield from codigos_erro(valor)
+    elif isinstance(codigos, list):
+        for valor in codigos:
+            yield from codigos_erro(valor)
+    else:
+        yield codigos
+
+
+def _erro_deterministico(erro):
+    return isinstance(erro, ValidationError) and CODIGOS_PASSAGEIROS.isdisjoint(
+        codigos_erro(erro.get_codes())
+    )
+
+
+def idempotente(metodo):
+    """Decora um método de view que recebe ``request`` como primeiro argumento."""
+
+    @functools.wraps(metodo)
+    def envolver(self, request, *args, **kwargs):
+        chave = request.headers.get(CABECALHO)
+        if not chave:
+            return metodo(self, request, *args, **kwargs)
+
+        chave = _chave(request, chave)
+        impressao = _impressao(request)
+        salva = cache.get(chave)
+        if salva is not None:
+            return _repetir(salva, impressao)
+
+        # A trava dura mais que o timeout de qualquer requisição e só é
+        # removida depois que a resposta foi guardada.
+        trava = f"{chave}:trava"
+        if not cache.add(trava, impressao, tempo_trava()):
+            return Response(
+                {CABECALHO: "Uma requisição com esta chave ainda está em andamento."},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        try:
+            # A original pode ter terminado entre a leitura e a trava.
+            salva = cache.get(chave)
+            if salva is not None:
+                return _repetir(salva, impressao)
+            try:
+                response = metodo(self, request, *args, **kwargs)
+                guardar = status.is_success(response.status_code)
+            except Exception as erro:
+                # Erros levantados viram a mesma resposta que o DRF daria; os
+                # não tratados são relançados.
+                response = self.handle_exception(erro)
+                guardar = _erro_deterministico(erro)
+            if guardar:
+                dados = json.loads(json.dumps(response.data, default=converter_json))
+                salva = {
+                    "impressao": impressao,
+                    "status": response.status_code,
+                    "dados": dados,
+                }
+                cache.set(chave, salva, tempo_idempotencia())
+            return response
+        finally:
+            cache.delete(trava)
+
+    return envolver
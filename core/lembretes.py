@@ -0,0 +1,174 @@
+"""
+Lembretes de reservas próximas.
+
+A cada ciclo o despachante lê apenas as reservas confirmadas que começam
+dentro da janela de antecedência e ainda não foram lembradas, usando o
+índice parcial ``reserva_lembrete_pendente``. ``lembrete_enviado_em`` é marcado antes do
+envio, o que impede que outro ciclo ou outro processo envie o mesmo
+lembrete; se o envio falhar, a marca é desfeita e a reserva volta a ser
+elegível. O envio é feito por um backend plugável
+(``RESERVAS_LEMBRETES_BACKEND``), em lotes distribuídos por um pool de
+threads.
+"""
+
+import json
+import logging
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Reserva
+from .renderers import converter_json
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_LEMBRETE = {
+    "reserva": "id",
+    "data_hora": "data_hora",
+    "cliente": "cliente_id",
+    "email": "cliente__usuario__email",
+    "nome": "cliente__usuario__first_name",
+    "prestador": "prestador__usuario__username",
+    "servico": "servico__nome",
+}
+
+
+class BackendLembrete:
+    """Interface dos backends: ``enviar`` recebe uma lista de lembretes."""
+
+    def enviar(self, lembretes):
+        raise NotImplementedError
+
+
+class ConsoleBackend(BackendLembrete):
+    def __init__(self, saida=None):
+        self.saida = saida or sys.stdout
+        self._trava = threading.Lock()
+
+    def enviar(self, lembretes):
+        linhas = "".join(
+            f"Lembrete para {item['email'] or item['cliente']}: {item['servico']} com "
+            f"{item['prestador']} em {item['data_hora']}\n"
+            for item in lembretes
+        )
+        with self._trava:
+            self.saida.write(linhas)
+
+
+class ArquivoBackend(BackendLembrete):
+    """Acrescenta um JSON por linha em ``RESERVAS_LEMBRETES_ARQUIVO``."""
+
+    def __init__(self, caminho=None):
+        self.caminho = caminho or getattr(
+            settings,
+            "RESERVAS_LEMBRETES_ARQUIVO",
+            settings.BASE_DIR / "lembretes.jsonl",
+        )
+        self._trava = threading.Lock()
+
+    def enviar(self, lembretes):
+        linhas = "".join(
+            json.dumps(item, default=converter_json) + "\n" for item in lembretes
+        )
+        with self._trava, open(self.caminho, "a", encoding="utf-8") as arquivo:
+            arquivo.write(linhas)
+
+
+class MemoriaBackend(BackendLembrete):
+    """Guarda os lembretes em ``caixa``; útil em testes."""
+
+    def __init__(self):
+        self.caixa = []
+        self._trava = threading.Lock()
+
+    def enviar(self, lembretes):
+        with self._trava:
+            self.caixa.extend(lembretes)
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    caminho = getattr(
+        settings, "RESERVAS_LEMBRETES_BACKEND", "core.lembretes.ConsoleBackend"
+    )
+    return import_string(caminho)()
+
+
+def antecedencia_lembrete():
+    minutos = getattr(settings, "RESERVAS_LEMBRETE_ANTECEDENCIA", 24 * 60)
+    return timedelta(minutes=minutos)
+
+
+def reservar_lote(agora, antecedencia, tamanho):
+    """Marca até ``tamanho`` reservas da janela como lembradas; retorna os ids."""
+    with transaction.atomic():
+        ids = list(
+            Reserva.objects.filter(
+                status="confirmado",
+                data_hora__gt=agora,
+                data_hora__lte=agora + antecedencia,
+                lembrete_enviado_em__isnull=True,
+            )
+            .order_by("data_hora")
+            .select_for_update(skip_locked=True)
+            .values_list("pk", flat=True)[:tamanho]
+        )
+        if ids:
+            Reserva.objects.filter(pk__in=ids).update(lembrete_enviado_em=agora)
+    return ids
+
+
+def _enviar(backend, lembretes):
+    try:
+        backend.enviar(lembretes)
+        return []
+    except Exception:
+        logger.exception("Falha ao enviar %s lembrete(s)", len(lembretes))
+        return [item["reserva"] for item in lembretes]
+
+
+def despachar_lembretes(backend=None, antecedencia=None, lote=1000, workers=8):
+    """
+    Envia os lembretes pendentes da janela atual e retorna quantos foram
+    enviados. Cada lote é dividido entre ``workers`` threads.
+    """
+    backend = backend or get_backend()
+    antecedencia = antecedencia or antecedencia_lembrete()
+    enviados = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            agora = timezone.now()
+            ids = reservar_lote(agora, antecedencia, lote)
+            if not ids:
+                break
+            lembretes = [
+                dict(zip(CAMPOS_LEMBRETE, linha))
+                for linha in Reserva.objects.filter(pk__in=ids).values_list(
+                    *CAMPOS_LEMBRETE.values()
+                )
+            ]
+            tamanho = max(1, -(-len(lembretes) // workers))
+            partes = [
+                lembretes[inicio : inicio + tamanho]
+                for inicio in range(0, len(lembretes), tamanho)
+            ]
+            falhas = [
+                pk
+                for falhou in executor.map(_enviar, [backend] * len(partes), partes)
+                for pk in falhou
+            ]
+            if falhas:
+                # Devolve para o próximo ciclo; não repete neste para não
+                # insistir em um backend fora do ar.
+                Reserva.objects.filter(pk__in=falhas).update(lembrete_enviado_em=None)
+            enviados += len(lembretes) - len(falhas)
+            if falhas:
+                break
+    return enviados
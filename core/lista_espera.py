@@ -0,0 +1,106 @@
+"""
+Lista de espera por horários de prestadores.
+
+Quando uma reserva ativa é cancelada, excluída ou remarcada, o horário
+liberado é oferecido à lista de espera por uma tarefa em segundo plano. A
+busca usa o índice parcial ``lista_espera_aguardando`` (prestador, fim,
+inicio) e lê apenas as primeiras entradas cuja janela contém o horário; a
+lista nunca é percorrida por inteiro. Cada entrada é marcada como expirada
+por ``expirar_lista_espera`` quando sua janela termina e deixa o índice.
+"""
+
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .bloqueios import dono_bloqueio, tempo_bloqueio
+from .models import STATUS_OCUPANTES, ListaEspera, Reserva, normalizar_data_hora
+from .tasks import enfileirar, tarefa
+
+# Entradas examinadas por horário liberado.
+LIMITE_CANDIDATAS = 10
+
+
+def candidatas(prestador_id, data_hora):
+    return ListaEspera.objects.filter(
+        prestador_id=prestador_id,
+        status="aguardando",
+        inicio__lte=data_hora,
+        fim__gte=data_hora,
+    ).order_by("-prioridade", "criada_em", "pk")
+
+
+def horario_liberado(prestador_id, data_hora, atraso=None):
+    """Agenda o atendimento da lista de espera para um horário futuro liberado."""
+    if data_hora <= timezone.now():
+        return
+    enfileirar(
+        "atender_lista_espera",
+        atraso=atraso,
+        prestador_id=prestador_id,
+        data_hora=data_hora.isoformat(),
+    )
+
+
+def agendar_expiracao(entrada):
+    """Agenda a expiração da entrada para o fim da sua janela."""
+    enfileirar(
+        "expirar_lista_espera",
+        chave=f"lista_espera:{entrada.pk}:expirar:{entrada.fim.isoformat()}",
+        atraso=entrada.fim - timezone.now(),
+        entrada_id=entrada.pk,
+    )
+
+
+@tarefa()
+def expirar_lista_espera(entrada_id):
+    """Marca a entrada como expirada se ela ainda aguarda um horário."""
+    return ListaEspera.objects.filter(
+        pk=entrada_id, status="aguardando", fim__lt=timezone.now()
+    ).update(status="expirada")
+
+
+@tarefa()
+def atender_lista_espera(prestador_id, data_hora):
+    """
+    Reserva o horário para a primeira entrada elegível da lista de espera.
+    Retorna a entrada atendida, ou ``None`` se o horário já foi ocupado.
+    """
+    data_hora = normalizar_data_hora(data_hora)
+    if dono_bloqueio(prestador_id, data_hora) is not None:
+        # Outro cliente está concluindo a reserva deste horário. Tenta de novo
+        # quando o bloqueio expirar: se a reserva não for concluída, o horário
+        # continua livre.
+        horario_liberado(
+            prestador_id, data_hora, atraso=timedelta(seconds=tempo_bloqueio())
+        )
+        return None
+
+    entradas = candidatas(prestador_id, data_hora).select_for_update()
+    for entrada in entradas[:LIMITE_CANDIDATAS]:
+        if Reserva.objects.filter(
+            cliente_id=entrada.cliente_id,
+            data_hora=data_hora,
+            status__in=STATUS_OCUPANTES,
+        ).exists():
+            # O cliente já tem outra reserva neste horário.
+            continue
+        try:
+            with transaction.atomic():
+                reserva = Reserva.objects.create(
+                    cliente_id=entrada.cliente_id,
+                    prestador_id=prestador_id,
+                    servico_id=entrada.servico_id,
+                    data_hora=data_hora,
+                    status="confirmado",
+                    notas="Reserva criada pela lista de espera.",
+                )
+        except IntegrityError:
+            # O índice único parcial indica que o horário já foi ocupado.
+            return None
+        entrada.status = "atendida"
+        entrada.reserva_id = reserva.pk
+        entrada.save(update_fields=["status", "reserva_id"])
+        return entrada
+    return None
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from core.arquivamento import arquivar_reservas, dias_para_arquivar
+
+
+class Command(BaseCommand):
+    help = (
+        "Move reservas concluídas ou canceladas antigas para ReservaArquivada, em "
+        "lotes pequenos. Pode ser interrompido e executado novamente a qualquer "
+        "momento."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dias",
+            type=int,
+            default=None,
+            help=f"Idade mínima em dias (padrão: {dias_para_arquivar()}).",
+        )
+        parser.add_argument("--lote", type=int, default=500)
+        parser.add_argument(
+            "--pausa",
+            type=float,
+            default=0.1,
+            help="Segundos de espera entre lotes, para limitar a carga no banco.",
+        )
+        parser.add_argument("--max-lotes", type=int, default=None)
+
+    def handle(self, *args, **options):
+        total = arquivar_reservas(
+            dias=options["dias"],
+            tamanho_lote=options["lote"],
+            pausa=options["pausa"],
+            max_lotes=options["max_lotes"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"{total} reserva(s) arquivada(s)."))
@@ -0,0 +1,157 @@
+import gzip
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from rest_framework.renderers import JSONRenderer
+
+from core import renderers
+from core.middleware import brotli
+from core.models import Cliente, Prestador, Reserva, Servico
+from core.serializers import (
+    ReservaSerializer,
+    campos_leitura_rapida,
+    serializar_valores,
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o custo de uma listagem de reservas: serialização (ReservaSerializer "
+        "x leitura rápida a partir de values()) e renderização JSON (renderer do "
+        "DRF x RapidoJSONRenderer, com o tamanho comprimido). Os dados são "
+        "criados em uma transação desfeita ao final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--alvo", choices=["serializacao", "json", "todos"], default="todos"
+        )
+        parser.add_argument("--linhas", type=int, default=10000)
+        parser.add_argument("--repeticoes", type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.popular(options["linhas"])
+                if options["alvo"] in ("serializacao", "todos"):
+                    self.medir_serializacao(options["repeticoes"])
+                if options["alvo"] in ("json", "todos"):
+                    self.medir_json(options["repeticoes"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def popular(self, linhas):
+        usuario_cliente = User.objects.create(username="benchmark_cliente")
+        usuario_prestador = User.objects.create(username="benchmark_prestador")
+        cliente = Cliente.objects.create(usuario=usuario_cliente)
+        prestador = Prestador.objects.create(usuario=usuario_prestador)
+        servico = Servico.objects.create(
+            nome="Benchmark", descricao="Benchmark", duracao=timedelta(minutes=30)
+        )
+        inicio = timezone.now()
+        Reserva.objects.bulk_create(
+            [
+                Reserva(
+                    cliente=cliente,
+                    prestador=prestador,
+                    servico=servico,
+                    data_hora=inicio + timedelta(minutes=30 * i),
+                    status="confirmado",
+                    notas="Nota de teste",
+                )
+                for i in range(linhas)
+            ],
+            batch_size=1000,
+        )
+        self.queryset = Reserva.objects.order_by("pk")
+
+    def cronometrar(self, funcao, repeticoes):
+        melhor = float("inf")
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            resultado = funcao()
+            melhor = min(melhor, time.perf_counter() - inicio)
+        return melhor, resultado
+
+    def medir_serializacao(self, repeticoes):
+        def serializer():
+            return ReservaSerializer(self.queryset, many=True).data
+
+        campos = campos_leitura_rapida(ReservaSerializer())
+        colunas = [coluna for _, coluna, _ in campos]
+
+        def leitura_rapida():
+            return list(serializar_valores(campos, self.queryset.values(*colunas)))
+
+        def leitura_esparsa():
+            parcial = campos_leitura_rapida(
+                ReservaSerializer(campos=["id", "data_hora", "status"])
+            )
+            return list(
+                serializar_valores(
+                    parcial, self.queryset.values(*[c for _, c, _ in parcial])
+                )
+            )
+
+        tempo_serializer, esperado = self.cronometrar(serializer, repeticoes)
+        tempo_rapido, obtido = self.cronometrar(leitura_rapida, repeticoes)
+        tempo_esparso, _ = self.cronometrar(leitura_esparsa, repeticoes)
+        if [dict(item) for item in esperado] != obtido:
+            self.stderr.write("A leitura rápida produziu um resultado diferente.")
+
+        linhas = len(obtido)
+        self.stdout.write(f"{linhas} reservas, melhor de {repeticoes} execuções:")
+        self.stdout.write(f"  ReservaSerializer:        {tempo_serializer * 1000:8.1f} ms")
+        self.stdout.write(
+            f"  leitura rápida:           {tempo_rapido * 1000:8.1f} ms "
+            f"({tempo_serializer / tempo_rapido:.1f}x)"
+        )
+        self.stdout.write(
+            f"  leitura rápida, 3 campos: {tempo_esparso * 1000:8.1f} ms "
+            f"({tempo_serializer / tempo_esparso:.1f}x)"
+        )
+
+    def medir_json(self, repeticoes):
+        dados = ReservaSerializer(self.queryset, many=True).data
+        drf = JSONRenderer()
+        rapido = renderers.RapidoJSONRenderer()
+
+        tempo_drf, corpo_drf = self.cronometrar(lambda: drf.render(dados), repeticoes)
+        tempo_rapido, corpo = self.cronometrar(
+            lambda: rapido.render(dados), repeticoes
+        )
+        codificador = "orjson" if renderers.orjson is not None else "json (stdlib)"
+        self.stdout.write(f"Renderização JSON de {len(dados)} reservas:")
+        self.stdout.write(f"  JSONRenderer (DRF):       {tempo_drf * 1000:8.1f} ms")
+        self.stdout.write(
+            f"  RapidoJSONRenderer:       {tempo_rapido * 1000:8.1f} ms "
+            f"({tempo_drf / tempo_rapido:.1f}x, {codificador})"
+        )
+
+        self.stdout.write("Bytes transferidos:")
+        self.stdout.write(f"  sem compressão:           {len(corpo):>10,} bytes")
+        tempo, comprimido = self.cronometrar(
+            lambda: gzip.compress(corpo, compresslevel=6), repeticoes
+        )
+        self.stdout.write(
+            f"  gzip:                     {len(comprimido):>10,} bytes "
+            f"({tempo * 1000:.1f} ms)"
+        )
+        if brotli is not None:
+            tempo, comprimido = self.cronometrar(
+                lambda: brotli.compress(corpo, quality=5), repeticoes
+            )
+            self.stdout.write(
+                f"  brotli:                   {len(comprimido):>10,} bytes "
+                f"({tempo * 1000:.1f} ms)"
+            )
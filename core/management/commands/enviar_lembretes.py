@@ -0,0 +1,58 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core.lembretes import antecedencia_lembrete, despachar_lembretes
+
+
+class Command(BaseCommand):
+    help = (
+        "Envia lembretes das reservas confirmadas que começam dentro da janela "
+        "de antecedência. Roda continuamente, verificando a janela a cada "
+        "--intervalo segundos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--antecedencia",
+            type=int,
+            default=None,
+            help="Minutos antes da reserva (padrão: RESERVAS_LEMBRETE_ANTECEDENCIA).",
+        )
+        parser.add_argument("--lote", type=int, default=1000)
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=30.0,
+            help="Segundos de espera quando não há lembretes pendentes.",
+        )
+        parser.add_argument(
+            "--uma-vez",
+            action="store_true",
+            help="Envia os lembretes pendentes e encerra.",
+        )
+
+    def handle(self, *args, **options):
+        antecedencia = (
+            timedelta(minutes=options["antecedencia"])
+            if options["antecedencia"] is not None
+            else antecedencia_lembrete()
+        )
+        total = 0
+        try:
+            while True:
+                enviados = despachar_lembretes(
+                    antecedencia=antecedencia,
+                    lote=options["lote"],
+                    workers=options["workers"],
+                )
+                total += enviados
+                if options["uma_vez"]:
+                    break
+                if not enviados:
+                    time.sleep(options["intervalo"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"{total} lembrete(s) enviado(s)."))
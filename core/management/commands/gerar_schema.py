@@ -0,0 +1,29 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from sistema_reservas.openapi import FORMATOS, gerar_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera os arquivos swagger.json e swagger.yaml servidos em /swagger.json e "
+        "/swagger.yaml, evitando a geração do schema nos workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--destino",
+            type=Path,
+            default=None,
+            help="Diretório de saída (padrão: OPENAPI_SCHEMA_DIR).",
+        )
+
+    def handle(self, *args, **options):
+        destino = options["destino"] or settings.OPENAPI_SCHEMA_DIR
+        destino.mkdir(parents=True, exist_ok=True)
+        for formato in FORMATOS:
+            caminho = destino / f"swagger{formato}"
+            caminho.write_bytes(gerar_schema(formato))
+            self.stdout.write(f"Schema gravado em {caminho}")
@@ -0,0 +1,69 @@
+import contextlib
+import csv
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.cadastro_lote import cadastrar_clientes, criar_pool, processos_padrao
+
+
+def ler_linhas(caminho):
+    """Lê um CSV com cabeçalho ou um arquivo JSON lines."""
+    with open(caminho, encoding="utf-8", newline="") as arquivo:
+        if caminho.endswith((".jsonl", ".ndjson")):
+            return [json.loads(linha) for linha in arquivo if linha.strip()]
+        return list(csv.DictReader(arquivo))
+
+
+class Command(BaseCommand):
+    help = (
+        "Cadastra clientes a partir de um CSV (username,password,email,telefone,"
+        "endereco) ou JSON lines, com o hash das senhas em um pool de processos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("arquivo")
+        parser.add_argument("--lote", type=int, default=1000)
+        parser.add_argument(
+            "--processos",
+            type=int,
+            default=None,
+            help=(
+                f"Processos para o hash das senhas (padrão: {processos_padrao()}; "
+                "0 calcula no próprio processo)."
+            ),
+        )
+        parser.add_argument(
+            "--relatorio", help="Grava os erros por linha neste arquivo JSON."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            linhas = ler_linhas(options["arquivo"])
+        except (OSError, ValueError) as erro:
+            raise CommandError(f"Não foi possível ler o arquivo: {erro}")
+
+        processos = options["processos"]
+        if processos is None:
+            processos = processos_padrao()
+        inicio = time.perf_counter()
+        with criar_pool(processos) if processos else contextlib.nullcontext() as pool:
+            resultado = cadastrar_clientes(
+                linhas, tamanho_lote=options["lote"], pool=pool
+            )
+        duracao = time.perf_counter() - inicio
+
+        for erro in resultado["erros"][:20]:
+            self.stderr.write(f"Linha {erro['linha']}: {erro['erros']}")
+        if len(resultado["erros"]) > 20:
+            self.stderr.write(f"... e mais {len(resultado['erros']) - 20} erro(s).")
+        if options["relatorio"]:
+            with open(options["relatorio"], "w", encoding="utf-8") as arquivo:
+                json.dump(resultado["erros"], arquivo, ensure_ascii=False, indent=2)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{resultado['criados']} cliente(s) cadastrado(s), "
+                f"{len(resultado['erros'])} erro(s), em {duracao:.1f} s."
+            )
+        )
@@ -0,0 +1,84 @@
+import io
+import pstats
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.perfis import agrupar_consultas, carregar_perfis, diretorio_perfis
+
+
+class Command(BaseCommand):
+    help = (
+        "Lista os perfis de requisição gravados pelo PerfilamentoMiddleware ou "
+        "mostra o detalhe de um deles: funções mais custosas e SQL por origem."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("nome", nargs="?", help="Perfil a detalhar.")
+        parser.add_argument("--top", type=int, default=15)
+        parser.add_argument(
+            "--ordenar",
+            default="cumulative",
+            help="Critério do pstats para as funções (cumulative, tottime...).",
+        )
+        parser.add_argument(
+            "--limpar", action="store_true", help="Remove todos os perfis gravados."
+        )
+
+    def handle(self, *args, **options):
+        if options["limpar"]:
+            arquivos = list(diretorio_perfis().glob("*.json")) + list(
+                diretorio_perfis().glob("*.prof")
+            )
+            for arquivo in arquivos:
+                arquivo.unlink()
+            self.stdout.write(f"{len(arquivos)} arquivo(s) removido(s).")
+            return
+        if options["nome"]:
+            self.detalhar(options["nome"], options["top"], options["ordenar"])
+        else:
+            self.listar(options["top"])
+
+    def listar(self, top):
+        perfis = carregar_perfis()
+        if not perfis:
+            self.stdout.write(f"Nenhum perfil em {diretorio_perfis()}.")
+            return
+        self.stdout.write(f"{'nome':<60} {'status':>6} {'ms':>9} {'sql':>5} {'sql ms':>9}")
+        for perfil in perfis[:top]:
+            self.stdout.write(
+                f"{perfil['nome']:<60} {perfil['status']:>6} "
+                f"{perfil['duracao_ms']:>9.1f} {perfil['total_sql']:>5} "
+                f"{perfil['duracao_sql_ms']:>9.1f}"
+            )
+
+    def detalhar(self, nome, top, ordenar):
+        base = diretorio_perfis() / nome
+        perfil = next((p for p in carregar_perfis() if p["nome"] == nome), None)
+        if perfil is None or not base.with_suffix(".prof").exists():
+            raise CommandError(f"Perfil não encontrado: {nome}")
+
+        self.stdout.write(
+            f"{perfil['metodo']} {perfil['caminho']} -> {perfil['status']} em "
+            f"{perfil['duracao_ms']:.1f} ms, {perfil['total_sql']} consulta(s) "
+            f"em {perfil['duracao_sql_ms']:.1f} ms"
+        )
+
+        self.stdout.write("\nSQL por origem:")
+        self.stdout.write(f"{'origem':<70} {'total':>6} {'ms':>9}")
+        for origem, total, ms in agrupar_consultas(perfil["consultas"])[:top]:
+            self.stdout.write(f"{origem:<70} {total:>6} {ms:>9.1f}")
+
+        self.stdout.write("\nConsultas mais lentas:")
+        lentas = sorted(perfil["consultas"], key=lambda c: c["duracao_ms"], reverse=True)
+        for consulta in lentas[:5]:
+            self.stdout.write(
+                f"{consulta['duracao_ms']:>9.1f} ms  {consulta['sql'][:200]}"
+            )
+            for quadro in consulta["origem"]:
+                self.stdout.write(f"{'':>14}{quadro}")
+
+        saida = io.StringIO()
+        estatisticas = pstats.Stats(str(base.with_suffix(".prof")), stream=saida)
+        estatisticas.sort_stats(ordenar).print_stats(top)
+        self.stdout.write("\nFunções:")
+        self.stdout.write(saida.getvalue())
@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.tasks import limpar_finalizadas, processar_pendentes, recuperar_travadas
+
+
+class Command(BaseCommand):
+    help = "Executa as tarefas em segundo plano enfileiradas na tabela Tarefa."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--lote", type=int, default=100)
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=1.0,
+            help="Segundos de espera quando a fila está vazia.",
+        )
+        parser.add_argument(
+            "--manutencao",
+            type=float,
+            default=60.0,
+            help=(
+                "Segundos entre as rodadas que devolvem à fila as tarefas "
+                "travadas e apagam as finalizadas antigas."
+            ),
+        )
+        parser.add_argument(
+            "--uma-vez",
+            action="store_true",
+            help="Processa as tarefas pendentes e encerra.",
+        )
+
+    def manutencao(self):
+        recuperadas = recuperar_travadas()
+        if recuperadas:
+            self.stdout.write(f"{recuperadas} tarefa(s) travada(s) devolvidas à fila.")
+        apagadas = limpar_finalizadas()
+        if apagadas:
+            self.stdout.write(f"{apagadas} tarefa(s) finalizada(s) apagadas.")
+
+    def handle(self, *args, **options):
+        total = 0
+        ultima_manutencao = None
+        try:
+            while True:
+                agora = time.monotonic()
+                if (
+                    ultima_manutencao is None
+                    or agora - ultima_manutencao >= options["manutencao"]
+                ):
+                    self.manutencao()
+                    ultima_manutencao = agora
+                processadas = processar_pendentes(
+                    workers=options["workers"], limite=options["lote"]
+                )
+                total += processadas
+                if options["uma_vez"] and not processadas:
+                    break
+                if not processadas:
+                    time.sleep(options["intervalo"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"{total} tarefa(s) processada(s)."))
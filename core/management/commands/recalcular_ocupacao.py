@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from core.analytics import recalcular_agregados
+
+
+def data(valor):
+    return datetime.strptime(valor, "%Y-%m-%d").date()
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstrói as tabelas OcupacaoDiaria e ContagemServicoDiaria a partir "
+        "das reservas. Use na implantação ou para corrigir divergências."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--inicio", type=data, help="AAAA-MM-DD")
+        parser.add_argument("--fim", type=data, help="AAAA-MM-DD")
+
+    def handle(self, *args, **options):
+        ocupacoes, contagens = recalcular_agregados(options["inicio"], options["fim"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{ocupacoes} linha(s) de ocupação e {contagens} contagem(ns) "
+                "por serviço recalculadas."
+            )
+        )
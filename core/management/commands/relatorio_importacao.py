@@ -0,0 +1,99 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Inicializa um worker como o servidor WSGI faria: settings, apps, middlewares
+# e URLconf.
+SCRIPT_INICIALIZACAO = (
+    "from django.core.wsgi import get_wsgi_application\n"
+    "get_wsgi_application()\n"
+    "from django.urls import get_resolver\n"
+    "get_resolver().url_patterns\n"
+)
+
+
+def analisar_importtime(saida):
+    """
+    Interpreta a saída de ``python -X importtime`` e retorna
+    ``[(modulo, proprio_us, acumulado_us)]``.
+    """
+    modulos = []
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:"):
+            continue
+        colunas = linha[len("import time:") :].split("|")
+        if len(colunas) != 3:
+            continue
+        try:
+            proprio, acumulado = int(colunas[0]), int(colunas[1])
+        except ValueError:
+            # Linha de cabeçalho.
+            continue
+        modulos.append((colunas[2].strip(), proprio, acumulado))
+    return modulos
+
+
+def agrupar_por_pacote(modulos, nivel=1):
+    totais = defaultdict(lambda: [0, 0])
+    for modulo, proprio, _ in modulos:
+        pacote = ".".join(modulo.split(".")[:nivel])
+        totais[pacote][0] += proprio
+        totais[pacote][1] += 1
+    return sorted(
+        ((pacote, tempo, quantidade) for pacote, (tempo, quantidade) in totais.items()),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Inicializa um worker em um processo separado com -X importtime e mostra "
+        "o custo de importação agregado por pacote. O perfil pode ser escolhido "
+        "com as variáveis RESERVAS_PERFIL/RESERVAS_DOCS/RESERVAS_ADMIN."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=20)
+        parser.add_argument(
+            "--nivel",
+            type=int,
+            default=2,
+            help="Profundidade do nome do pacote usada no agrupamento.",
+        )
+        parser.add_argument(
+            "--perfil", help="Valor de RESERVAS_PERFIL para o processo medido."
+        )
+
+    def handle(self, *args, **options):
+        ambiente = dict(os.environ)
+        ambiente.setdefault("DJANGO_SETTINGS_MODULE", "sistema_reservas.settings")
+        if options["perfil"]:
+            ambiente["RESERVAS_PERFIL"] = options["perfil"]
+
+        processo = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", SCRIPT_INICIALIZACAO],
+            env=ambiente,
+            capture_output=True,
+            text=True,
+        )
+        if processo.returncode != 0:
+            raise CommandError(processo.stderr[-2000:])
+
+        modulos = analisar_importtime(processo.stderr)
+        total = sum(proprio for _, proprio, _ in modulos)
+        self.stdout.write(
+            f"{len(modulos)} módulos importados em {total / 1000:.1f} ms "
+            f"(perfil: {ambiente.get('RESERVAS_PERFIL', 'completo')})"
+        )
+        self.stdout.write(f"{'pacote':<45} {'ms':>9} {'%':>6} {'módulos':>8}")
+        for pacote, tempo, quantidade in agrupar_por_pacote(
+            modulos, options["nivel"]
+        )[: options["top"]]:
+            self.stdout.write(
+                f"{pacote:<45} {tempo / 1000:>9.1f} {100 * tempo / total:>5.1f}% "
+                f"{quantidade:>8}"
+            )
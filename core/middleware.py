@@ -0,0 +1,145 @@
+import random
+import threading
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def codificacoes_aceitas(cabecalho):
+    """Interpreta ``Accept-Encoding`` e retorna ``{codificacao: q}``."""
+    aceitas = {}
+    for item in cabecalho.split(","):
+        partes = [parte.strip() for parte in item.split(";")]
+        if not partes[0]:
+            continue
+        q = 1.0
+        for parametro in partes[1:]:
+            if parametro.startswith("q="):
+                try:
+                    q = float(parametro[2:])
+                except ValueError:
+                    q = 0.0
+        aceitas[partes[0].lower()] = q
+    return aceitas
+
+
+class CompressaoMiddleware(MiddlewareMixin):
+    """
+    Comprime respostas com brotli (se o pacote ``brotli`` estiver instalado)
+    ou gzip, conforme o ``Accept-Encoding``, a partir de
+    ``RESERVAS_COMPRESSAO_MINIMO`` bytes. Respostas em streaming usam gzip.
+    Baseado no ``GZipMiddleware`` do Django.
+    """
+
+    max_random_bytes = 100
+
+    def escolher_codificacao(self, request, streaming):
+        aceitas = codificacoes_aceitas(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        candidatas = ["gzip"] if streaming or brotli is None else ["br", "gzip"]
+        candidatas = [c for c in candidatas if aceitas.get(c, aceitas.get("*", 0)) > 0]
+        if not candidatas:
+            return None
+        return max(candidatas, key=lambda c: aceitas.get(c, aceitas.get("*", 0)))
+
+    def process_response(self, request, response):
+        minimo = getattr(settings, "RESERVAS_COMPRESSAO_MINIMO", 1024)
+        if not response.streaming and len(response.content) < minimo:
+            return response
+        if response.has_header("Content-Encoding"):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        codificacao = self.escolher_codificacao(request, response.streaming)
+        if codificacao is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                return response
+            response.streaming_content = compress_sequence(
+                response.streaming_content, max_random_bytes=self.max_random_bytes
+            )
+            del response.headers["Content-Length"]
+        else:
+            if codificacao == "br":
+                comprimido = brotli.compress(response.content, quality=5)
+            else:
+                comprimido = compress_string(
+                    response.content, max_random_bytes=self.max_random_bytes
+                )
+            if len(comprimido) >= len(response.content):
+                return response
+            response.content = comprimido
+            response.headers["Content-Length"] = str(len(comprimido))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = codificacao
+        return response
+
+
+# O cProfile admite um único perfilador ativo por processo (Python 3.12+).
+_perfilando = threading.Lock()
+
+
+class PerfilamentoMiddleware:
+    """
+    Perfila a requisição (cProfile + SQL com origem) quando um staff envia
+    ``X-Perfilar: 1`` ou quando ela é sorteada por
+    ``RESERVAS_PERFIL_AMOSTRAGEM``. Se outra requisição do processo já está
+    sendo perfilada, esta segue sem perfil. O nome do perfil gravado volta no
+    cabeçalho ``X-Perfil`` apenas para staff. Ver ``core.perfis``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pedido = request.headers.get("X-Perfilar") == "1"
+        staff = pedido and self.usuario_staff(request)
+        if not (staff or self.sorteada()):
+            return self.get_response(request)
+        if not _perfilando.acquire(blocking=False):
+            return self.get_response(request)
+
+        from .perfis import perfilar, salvar_perfil
+
+        try:
+            if not pedido:
+                # Lido antes da view: o DRF troca ``request.user`` ao autenticar.
+                staff = self.usuario_staff(request)
+            response, perfil, consultas, duracao = perfilar(
+                self.get_response, request
+            )
+            nome = salvar_perfil(request, response, perfil, consultas, duracao)
+        finally:
+            _perfilando.release()
+        if staff:
+            response.headers["X-Perfil"] = nome
+        return response
+
+    def sorteada(self):
+        taxa = getattr(settings, "RESERVAS_PERFIL_AMOSTRAGEM", 0.0)
+        return taxa > 0 and random.random() < taxa
+
+    def usuario_staff(self, request):
+        usuario = getattr(request, "user", None)
+        if usuario is None or not usuario.is_authenticated:
+            # A API autentica no DRF; o token é lido aqui só quando pedido.
+            from rest_framework.exceptions import AuthenticationFailed
+            from rest_framework_simplejwt.authentication import JWTAuthentication
+
+            try:
+                autenticado = JWTAuthentication().authenticate(request)
+            except AuthenticationFailed:
+                return False
+            usuario = autenticado[0] if autenticado else None
+        return usuario is not None and usuario.is_staff
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_remove_cliente_data_cadastro_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservaAlteracao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reserva_id', models.BigIntegerField()),
+                ('cliente_id', models.BigIntegerField()),
+                ('operacao', models.CharField(choices=[('criado', 'Criado'), ('atualizado', 'Atualizado'), ('excluido', 'Excluído')], max_length=20)),
+                ('data', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['cliente_id', 'id'], name='core_reserv_cliente_a1efb1_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_tarefa'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContagemServicoDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField()),
+                ('status', models.CharField(max_length=50)),
+                ('quantidade', models.IntegerField(default=0)),
+                ('servico', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.servico')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('servico', 'data', 'status'), name='contagem_servico_diaria_unica')],
+            },
+        ),
+        migrations.CreateModel(
+            name='OcupacaoDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField()),
+                ('minutos_reservados', models.IntegerField(default=0)),
+                ('reservas', models.IntegerField(default=0)),
+                ('prestador', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.prestador')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('prestador', 'data'), name='ocupacao_diaria_unica')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_ocupacao_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservaArquivada',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('data_hora', models.DateTimeField()),
+                ('status', models.CharField(max_length=50)),
+                ('notas', models.TextField(blank=True, null=True)),
+                ('arquivada_em', models.DateTimeField(auto_now_add=True)),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservas_arquivadas', to='core.cliente')),
+                ('prestador', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservas_arquivadas', to='core.prestador')),
+                ('servico', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.servico')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['cliente', 'data_hora'], name='core_reserv_cliente_78d40e_idx')],
+            },
+        ),
+    ]
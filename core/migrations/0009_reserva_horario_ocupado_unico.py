@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:49
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def cancelar_duplicadas(apps, schema_editor):
+    """
+    Antes do índice único, mantém uma reserva por horário ocupado (a concluída,
+    senão a mais antiga) e cancela as demais, registrando a alteração para a
+    sincronização e listando os ids cancelados.
+    """
+    Reserva = apps.get_model("core", "Reserva")
+    ReservaAlteracao = apps.get_model("core", "ReservaAlteracao")
+    ocupadas = Reserva.objects.filter(status__in=("confirmado", "concluido"))
+    repetidas = (
+        ocupadas.values("prestador_id", "data_hora")
+        .annotate(total=Count("id"))
+        .filter(total__gt=1)
+    )
+    canceladas = []
+    for horario in repetidas:
+        reservas = list(
+            ocupadas.filter(
+                prestador_id=horario["prestador_id"], data_hora=horario["data_hora"]
+            ).order_by("id")
+        )
+        reservas.sort(key=lambda reserva: reserva.status != "concluido")
+        canceladas.extend(reservas[1:])
+    if not canceladas:
+        return
+    Reserva.objects.filter(id__in=[reserva.id for reserva in canceladas]).update(
+        status="cancelado"
+    )
+    ReservaAlteracao.objects.bulk_create(
+        ReservaAlteracao(
+            reserva_id=reserva.id, cliente_id=reserva.cliente_id, operacao="atualizado"
+        )
+        for reserva in canceladas
+    )
+    print(
+        f"\n  {len(canceladas)} reserva(s) em horário já ocupado foram canceladas: "
+        f"{', '.join(str(reserva.id) for reserva in canceladas)}. Rode "
+        "recalcular_ocupacao para atualizar as agregações."
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_reservaarquivada'),
+    ]
+
+    operations = [
+        migrations.RunPython(cancelar_duplicadas, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='reserva',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ('confirmado', 'concluido'))), fields=('prestador', 'data_hora'), name='reserva_horario_ocupado_unico'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_reserva_horario_ocupado_unico'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListaEspera',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('inicio', models.DateTimeField()),
+                ('fim', models.DateTimeField()),
+                ('prioridade', models.IntegerField(default=0)),
+                ('status', models.CharField(choices=[('aguardando', 'Aguardando'), ('atendida', 'Atendida'), ('cancelada', 'Cancelada')], default='aguardando', max_length=20)),
+                ('reserva_id', models.BigIntegerField(blank=True, null=True)),
+                ('criada_em', models.DateTimeField(auto_now_add=True)),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lista_espera', to='core.cliente')),
+                ('prestador', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lista_espera', to='core.prestador')),
+                ('servico', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.servico')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'aguardando')), fields=['prestador', 'inicio'], name='lista_espera_aguardando')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_listaespera'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reserva',
+            name='lembrete_enviado_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['status', 'data_hora'], name='core_reserv_status_1765bc_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:33
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def expirar_entradas(apps, schema_editor):
+    ListaEspera = apps.get_model("core", "ListaEspera")
+    ListaEspera.objects.filter(status="aguardando", fim__lt=timezone.now()).update(
+        status="expirada"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_reserva_lembrete'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='listaespera',
+            name='lista_espera_aguardando',
+        ),
+        migrations.AlterField(
+            model_name='listaespera',
+            name='status',
+            field=models.CharField(choices=[('aguardando', 'Aguardando'), ('atendida', 'Atendida'), ('cancelada', 'Cancelada'), ('expirada', 'Expirada')], default='aguardando', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='listaespera',
+            index=models.Index(condition=models.Q(('status', 'aguardando')), fields=['prestador', 'fim', 'inicio'], name='lista_espera_aguardando'),
+        ),
+        migrations.RunPython(expirar_entradas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_lista_espera_expiracao'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(condition=models.Q(('lembrete_enviado_em__isnull', True), ('status', 'confirmado')), fields=['data_hora'], name='reserva_lembrete_pendente'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_reserva_lembrete_pendente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoDisponibilidade',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('canal', models.CharField(max_length=50)),
+                ('evento', models.JSONField()),
+                ('criado_em', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
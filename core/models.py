@@ -1,5 +1,22 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+# Status de reserva que ocupam o horário do prestador.
+STATUS_OCUPANTES = ("confirmado", "concluido")
+
+# Status de reservas encerradas, elegíveis para arquivamento.
+STATUS_FINALIZADOS = ("concluido", "cancelado")
+
+
+def normalizar_data_hora(valor):
+    """Converte o valor atribuído a ``Reserva.data_hora`` em datetime com fuso."""
+    if isinstance(valor, str):
+        valor = parse_datetime(valor)
+    if timezone.is_naive(valor):
+        valor = timezone.make_aware(valor)
+    return valor
 
 
 class Cliente(models.Model):
@@ -57,9 +74,203 @@ class Reserva(models.Model):
         ],
     )
     notas = models.TextField(blank=True, null=True)
+    lembrete_enviado_em = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Varredura por janela de horário: arquivamento.
+            models.Index(fields=["status", "data_hora"]),
+            # Apenas as reservas que ainda aguardam lembrete; as já lembradas
+            # saem do índice e não são relidas a cada ciclo do despachante.
+            models.Index(
+                fields=["data_hora"],
+                condition=models.Q(
+                    status="confirmado", lembrete_enviado_em__isnull=True
+                ),
+                name="reserva_lembrete_pendente",
+            ),
+        ]
+        constraints = [
+            # Só reservas ativas ocupam o horário: uma cancelada não impede
+            # uma nova reserva, e a checagem de conflito usa apenas este índice.
+            models.UniqueConstraint(
+                fields=["prestador", "data_hora"],
+                condition=models.Q(status__in=STATUS_OCUPANTES),
+                name="reserva_horario_ocupado_unico",
+            )
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._guardar_original()
+        return instance
+
+    def _guardar_original(self):
+        # Guarda os valores persistidos para detectar mudanças nos sinais.
+        self._original = {
+            campo: getattr(self, campo)
+            for campo in ("prestador_id", "servico_id", "data_hora", "status")
+            if campo in self.__dict__
+        }
 
     def save(self, *args, **kwargs):
-        if self._state.adding and self.status == "confirmado":
-            self.prestador.quantidade_servicos_prestados += 1
-            self.prestador.save()
+        original = getattr(self, "_original", {}).get("data_hora")
+        if original is not None and normalizar_data_hora(
+            self.data_hora
+        ) != normalizar_data_hora(original):
+            # Remarcada: o lembrete do novo horário ainda não foi enviado.
+            self.lembrete_enviado_em = None
         super(Reserva, self).save(*args, **kwargs)
+        self._guardar_original()
+
+
+class ReservaAlteracao(models.Model):
+    """Registro sequencial de alterações em reservas, usado pela sincronização
+    incremental. O ``id`` crescente funciona como cursor."""
+
+    OPERACOES = [
+        ("criado", "Criado"),
+        ("atualizado", "Atualizado"),
+        ("excluido", "Excluído"),
+    ]
+
+    reserva_id = models.BigIntegerField()
+    cliente_id = models.BigIntegerField()
+    operacao = models.CharField(max_length=20, choices=OPERACOES)
+    data = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["cliente_id", "id"])]
+
+
+class Tarefa(models.Model):
+    """Tarefa assíncrona enfileirada para o worker ``processar_tarefas``."""
+
+    STATUS = [
+        ("pendente", "Pendente"),
+        ("executando", "Executando"),
+        ("concluida", "Concluída"),
+        ("falhou", "Falhou"),
+    ]
+
+    nome = models.CharField(max_length=100)
+    argumentos = models.JSONField(default=dict)
+    chave = models.CharField(max_length=255, unique=True, blank=True, null=True)
+    status = models.CharField(max_length=20, choices=STATUS, default="pendente")
+    tentativas = models.PositiveIntegerField(default=0)
+    max_tentativas = models.PositiveIntegerField(default=5)
+    executar_em = models.DateTimeField()
+    erro = models.TextField(blank=True, default="")
+    criada_em = models.DateTimeField(auto_now_add=True)
+    atualizada_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "executar_em"])]
+
+
+class OcupacaoDiaria(models.Model):
+    """Minutos reservados por prestador e dia, mantidos pelos sinais de Reserva."""
+
+    prestador = models.ForeignKey(Prestador, on_delete=models.CASCADE)
+    data = models.DateField()
+    minutos_reservados = models.IntegerField(default=0)
+    reservas = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["prestador", "data"], name="ocupacao_diaria_unica"
+            )
+        ]
+
+
+class ContagemServicoDiaria(models.Model):
+    """Quantidade de reservas por serviço, dia e status."""
+
+    servico = models.ForeignKey(Servico, on_delete=models.CASCADE)
+    data = models.DateField()
+    status = models.CharField(max_length=50)
+    quantidade = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["servico", "data", "status"],
+                name="contagem_servico_diaria_unica",
+            )
+        ]
+
+
+class ReservaArquivada(models.Model):
+    """
+    Reservas finalizadas movidas de ``Reserva`` pelo comando
+    ``arquivar_reservas``. Mantém o mesmo ``id`` da reserva original.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    cliente = models.ForeignKey(
+        Cliente, on_delete=models.CASCADE, related_name="reservas_arquivadas"
+    )
+    prestador = models.ForeignKey(
+        Prestador, on_delete=models.CASCADE, related_name="reservas_arquivadas"
+    )
+    servico = models.ForeignKey(Servico, on_delete=models.CASCADE)
+    data_hora = models.DateTimeField()
+    status = models.CharField(max_length=50)
+    notas = models.TextField(blank=True, null=True)
+    arquivada_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["cliente", "data_hora"])]
+
+
+class ListaEspera(models.Model):
+    """
+    Cliente aguardando um horário do prestador dentro da janela
+    ``inicio``–``fim``. Quando um horário é liberado, a entrada de maior
+    prioridade (e mais antiga) cuja janela o contém recebe a reserva.
+    """
+
+    cliente = models.ForeignKey(
+        Cliente, on_delete=models.CASCADE, related_name="lista_espera"
+    )
+    prestador = models.ForeignKey(
+        Prestador, on_delete=models.CASCADE, related_name="lista_espera"
+    )
+    servico = models.ForeignKey(Servico, on_delete=models.CASCADE)
+    inicio = models.DateTimeField()
+    fim = models.DateTimeField()
+    prioridade = models.IntegerField(default=0)
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            ("aguardando", "Aguardando"),
+            ("atendida", "Atendida"),
+            ("cancelada", "Cancelada"),
+            ("expirada", "Expirada"),
+        ],
+        default="aguardando",
+    )
+    # Sem chave estrangeira: reservas podem ser arquivadas.
+    reserva_id = models.BigIntegerField(null=True, blank=True)
+    criada_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Apenas entradas aguardando são consultadas ao liberar um horário;
+            # ``fim`` antes de ``inicio`` descarta as janelas já encerradas.
+            models.Index(
+                fields=["prestador", "fim", "inicio"],
+                condition=models.Q(status="aguardando"),
+                name="lista_espera_aguardando",
+            )
+        ]
+
+
+class EventoDisponibilidade(models.Model):
+    """Evento de ``core.realtime`` repassado entre processos pelo ``DatabaseBroker``."""
+
+    canal = models.CharField(max_length=50)
+    evento = models.JSONField()
+    criado_em = models.DateTimeField(auto_now_add=True, db_index=True)
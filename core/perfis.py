@@ -0,0 +1,160 @@
+"""
+Perfilamento sob demanda de requisições.
+
+Uma requisição é perfilada quando um usuário staff envia o cabeçalho
+``X-Perfilar: 1`` ou quando é sorteada pela taxa ``RESERVAS_PERFIL_AMOSTRAGEM``
+(0.0 a 1.0). Ela roda sob ``cProfile`` e cada comando SQL é registrado com
+a duração e a origem no código do projeto (view, método do serializer,
+``save`` do modelo). O resultado fica em ``RESERVAS_PERFIS_DIR``: um arquivo
+``.prof`` (pstats) e um ``.json`` com os dados da requisição e as consultas,
+lidos pelo comando ``perfis``. Apenas os ``RESERVAS_PERFIS_MAXIMO`` perfis mais
+recentes são mantidos.
+"""
+
+import cProfile
+import functools
+import json
+import sys
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from django.utils.text import slugify
+
+# Quantos quadros do projeto são guardados como origem de cada consulta.
+PROFUNDIDADE_ORIGEM = 4
+
+
+def diretorio_perfis():
+    return Path(getattr(settings, "RESERVAS_PERFIS_DIR", settings.BASE_DIR / "perfis"))
+
+
+def maximo_perfis():
+    return getattr(settings, "RESERVAS_PERFIS_MAXIMO", 200)
+
+
+@functools.lru_cache(maxsize=None)
+def _arquivo_do_projeto(arquivo):
+    """Caminho relativo ao projeto, ou ``None`` para bibliotecas e este módulo."""
+    caminho = Path(arquivo).resolve()
+    raiz = Path(settings.BASE_DIR).resolve()
+    if caminho == Path(__file__).resolve() or any(
+        parte.endswith("-packages") for parte in caminho.parts
+    ):
+        return None
+    try:
+        return str(caminho.relative_to(raiz))
+    except ValueError:
+        return None
+
+
+def origem_consulta():
+    """Quadros do projeto, do mais interno ao mais externo, que levaram à consulta."""
+    origem = []
+    quadro = sys._getframe(1)
+    while quadro is not None and len(origem) < PROFUNDIDADE_ORIGEM:
+        relativo = _arquivo_do_projeto(quadro.f_code.co_filename)
+        if relativo is not None:
+            nome = getattr(quadro.f_code, "co_qualname", quadro.f_code.co_name)
+            origem.append(f"{relativo}:{quadro.f_lineno} {nome}")
+        quadro = quadro.f_back
+    return origem
+
+
+class CapturaSQL:
+    """``execute_wrapper`` que registra cada consulta com duração e origem."""
+
+    def __init__(self):
+        self.consultas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas.append(
+                {
+                    "sql": sql,
+                    "duracao_ms": round((time.perf_counter() - inicio) * 1000, 3),
+                    "origem": origem_consulta(),
+                }
+            )
+
+
+def perfilar(funcao, *args):
+    """Executa ``funcao(*args)``; retorna ``(resultado, profile, consultas, ms)``."""
+    captura = CapturaSQL()
+    perfil = cProfile.Profile()
+    inicio = time.perf_counter()
+    with ExitStack() as pilha:
+        for conexao in connections.all():
+            pilha.enter_context(conexao.execute_wrapper(captura))
+        perfil.enable()
+        try:
+            resultado = funcao(*args)
+        finally:
+            perfil.disable()
+    duracao = (time.perf_counter() - inicio) * 1000
+    return resultado, perfil, captura.consultas, duracao
+
+
+def salvar_perfil(request, response, perfil, consultas, duracao):
+    """Grava o ``.prof`` e o ``.json`` da requisição; retorna o nome base."""
+    diretorio = diretorio_perfis()
+    diretorio.mkdir(parents=True, exist_ok=True)
+    agora = timezone.now()
+    nome = "{}-{}-{}".format(
+        agora.strftime("%Y%m%dT%H%M%S%f"),
+        request.method.lower(),
+        slugify(request.path.replace("/", "-"))[:60] or "raiz",
+    )
+    perfil.dump_stats(diretorio / f"{nome}.prof")
+    dados = {
+        "nome": nome,
+        "criado_em": agora.isoformat(),
+        "metodo": request.method,
+        "caminho": request.get_full_path(),
+        "status": response.status_code,
+        "duracao_ms": round(duracao, 3),
+        "total_sql": len(consultas),
+        "duracao_sql_ms": round(sum(c["duracao_ms"] for c in consultas), 3),
+        "consultas": consultas,
+    }
+    (diretorio / f"{nome}.json").write_text(json.dumps(dados, indent=2))
+    rotacionar_perfis(diretorio)
+    return nome
+
+
+def rotacionar_perfis(diretorio):
+    """Remove os perfis mais antigos além de ``RESERVAS_PERFIS_MAXIMO``."""
+    # O nome começa pelo instante da gravação: a ordem alfabética é a cronológica.
+    nomes = sorted(arquivo.stem for arquivo in diretorio.glob("*.json"))
+    for nome in nomes[: max(0, len(nomes) - maximo_perfis())]:
+        for sufixo in (".json", ".prof"):
+            # Outro processo pode ter rotacionado o mesmo perfil.
+            (diretorio / f"{nome}{sufixo}").unlink(missing_ok=True)
+
+
+def carregar_perfis():
+    """Resumos de todos os perfis gravados, do mais recente ao mais antigo."""
+    perfis = []
+    for arquivo in sorted(diretorio_perfis().glob("*.json"), reverse=True):
+        perfis.append(json.loads(arquivo.read_text()))
+    return perfis
+
+
+def agrupar_consultas(consultas):
+    """Soma as consultas por origem mais interna: ``[(origem, total, ms)]``."""
+    grupos = {}
+    for consulta in consultas:
+        origem = consulta["origem"][0] if consulta["origem"] else "(fora do projeto)"
+        total, ms = grupos.get(origem, (0, 0.0))
+        grupos[origem] = (total + 1, ms + consulta["duracao_ms"])
+    return sorted(
+        ((origem, total, round(ms, 3)) for origem, (total, ms) in grupos.items()),
+        key=lambda grupo: grupo[2],
+        reverse=True,
+    )
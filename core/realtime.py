@@ -0,0 +1,238 @@
+"""
+Canal de eventos em tempo real sobre a disponibilidade dos prestadores.
+
+Clientes assinam um prestador em uma data via Server-Sent Events em
+``/api/eventos/prestadores/<id>/<AAAA-MM-DD>/`` e recebem ``horario_ocupado`` e
+``horario_liberado`` quando reservas são criadas, canceladas ou removidas.
+A distribuição é feita por um broker configurável em
+``RESERVAS_REALTIME_BROKER``. O ``MemoryBroker`` só entrega eventos publicados
+no próprio processo e serve ao desenvolvimento com um único processo; com
+vários workers use o ``DatabaseBroker``, que repassa os eventos pela tabela
+``EventoDisponibilidade``.
+"""
+
+import asyncio
+import json
+import re
+import logging
+import threading
+import time
+from datetime import date, timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import EventoDisponibilidade, normalizar_data_hora
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_HEARTBEAT = 25
+TAMANHO_FILA = 100
+INTERVALO_CONSULTA = 1
+RETENCAO_EVENTOS = timedelta(minutes=5)
+ROTA_EVENTOS = re.compile(
+    r"^/api/eventos/prestadores/(?P<prestador>\d+)/(?P<data>\d{4}-\d{2}-\d{2})/$"
+)
+
+
+def canal_disponibilidade(prestador_id, data):
+    return f"{prestador_id}:{data.isoformat()}"
+
+
+class Broker:
+    """Interface dos brokers de eventos."""
+
+    def inscrever(self, canal):
+        """Retorna uma ``asyncio.Queue`` que recebe os eventos do canal."""
+        raise NotImplementedError
+
+    def cancelar(self, canal, fila):
+        raise NotImplementedError
+
+    def publicar(self, canal, evento):
+        raise NotImplementedError
+
+
+class MemoryBroker(Broker):
+    """
+    Distribui eventos para as filas inscritas no próprio processo. A publicação
+    pode vir de qualquer thread; a entrega ocorre no loop de cada inscrito.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inscricoes = {}
+
+    def inscrever(self, canal):
+        fila = asyncio.Queue(maxsize=TAMANHO_FILA)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._inscricoes.setdefault(canal, {})[fila] = loop
+        return fila
+
+    def cancelar(self, canal, fila):
+        with self._lock:
+            filas = self._inscricoes.get(canal)
+            if filas is not None:
+                filas.pop(fila, None)
+                if not filas:
+                    del self._inscricoes[canal]
+
+    def publicar(self, canal, evento):
+        with self._lock:
+            destinos = list(self._inscricoes.get(canal, {}).items())
+        for fila, loop in destinos:
+            loop.call_soon_threadsafe(self._entregar, fila, evento)
+
+    def total_inscritos(self, canal):
+        with self._lock:
+            return len(self._inscricoes.get(canal, ()))
+
+    @staticmethod
+    def _entregar(fila, evento):
+        try:
+            fila.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Assinante lento: descarta o evento em vez de acumular memória.
+            pass
+
+
+class DatabaseBroker(MemoryBroker):
+    """
+    Publica gravando em ``EventoDisponibilidade``; em cada processo com
+    inscritos, uma thread consulta os eventos novos a cada
+    ``INTERVALO_CONSULTA`` segundos e os entrega às filas locais. Eventos com
+    mais de ``RETENCAO_EVENTOS`` são apagados pela própria consulta.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._inicio = None
+        self._ultimo = 0
+        self._thread = None
+
+    def inscrever(self, canal):
+        fila = super().inscrever(canal)
+        with self._lock:
+            if self._thread is None:
+                # Entrega apenas os eventos publicados a partir da primeira inscrição.
+                self._inicio = timezone.now()
+                self._thread = threading.Thread(
+                    target=self._consultar_sempre, name="realtime", daemon=True
+                )
+                self._thread.start()
+        return fila
+
+    def publicar(self, canal, evento):
+        EventoDisponibilidade.objects.create(canal=canal, evento=evento)
+
+    def _consultar_sempre(self):
+        while True:
+            try:
+                self.consultar()
+            except Exception:
+                logger.exception("Falha ao consultar os eventos de disponibilidade.")
+            finally:
+                close_old_connections()
+            time.sleep(INTERVALO_CONSULTA)
+
+    def consultar(self):
+        """Entrega às filas locais os eventos gravados desde a última consulta."""
+        novos = EventoDisponibilidade.objects.filter(
+            id__gt=self._ultimo, criado_em__gte=self._inicio
+        ).order_by("id")
+        for pk, canal, evento in novos.values_list("id", "canal", "evento"):
+            super().publicar(canal, evento)
+            self._ultimo = pk
+        EventoDisponibilidade.objects.filter(
+            criado_em__lt=timezone.now() - RETENCAO_EVENTOS
+        ).delete()
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    caminho = getattr(settings, "RESERVAS_REALTIME_BROKER", "core.realtime.MemoryBroker")
+    return import_string(caminho)()
+
+
+def publicar_evento(tipo, prestador_id, data_hora):
+    data_hora = normalizar_data_hora(data_hora)
+    data_local = timezone.localtime(data_hora)
+    get_broker().publicar(
+        canal_disponibilidade(prestador_id, data_local.date()),
+        {"tipo": tipo, "prestador": prestador_id, "data_hora": data_hora.isoformat()},
+    )
+
+
+def _formatar_evento(evento):
+    dados = json.dumps(evento, ensure_ascii=False)
+    return f"event: {evento['tipo']}\ndata: {dados}\n\n".encode("utf-8")
+
+
+async def _aguardar_desconexao(receive):
+    while True:
+        mensagem = await receive()
+        if mensagem["type"] == "http.disconnect":
+            return
+
+
+async def transmitir_eventos(scope, receive, send, canal):
+    broker = get_broker()
+    fila = broker.inscrever(canal)
+    desconexao = asyncio.ensure_future(_aguardar_desconexao(receive))
+    try:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream; charset=utf-8"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),
+                ],
+            }
+        )
+        await send(
+            {"type": "http.response.body", "body": b": conectado\n\n", "more_body": True}
+        )
+        while True:
+            proximo = asyncio.ensure_future(fila.get())
+            prontos, _ = await asyncio.wait(
+                {proximo, desconexao},
+                timeout=INTERVALO_HEARTBEAT,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if proximo in prontos:
+                corpo = _formatar_evento(proximo.result())
+            else:
+                proximo.cancel()
+                if desconexao in prontos:
+                    break
+                corpo = b": ping\n\n"
+            await send({"type": "http.response.body", "body": corpo, "more_body": True})
+    finally:
+        desconexao.cancel()
+        broker.cancelar(canal, fila)
+
+
+class EventosASGIMiddleware:
+    """Atende o canal de eventos e repassa as demais requisições ao Django."""
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "GET":
+            rota = ROTA_EVENTOS.match(scope["path"])
+            if rota is not None:
+                try:
+                    data = date.fromisoformat(rota["data"])
+                except ValueError:
+                    pass
+                else:
+                    canal = canal_disponibilidade(int(rota["prestador"]), data)
+                    return await transmitir_eventos(scope, receive, send, canal)
+        return await self.application(scope, receive, send)
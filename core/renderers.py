@@ -0,0 +1,84 @@
+"""
+Renderer e parser JSON com codificador em C opcional.
+
+Com o pacote ``orjson`` instalado ele é usado para codificar e decodificar;
+caso contrário, o ``json`` da biblioteca padrão. ``Decimal``, ``timedelta`` e
+datas são convertidos no mesmo formato dos campos do DRF, de modo que dados
+ainda não serializados (como os da leitura rápida) saem idênticos.
+"""
+
+import datetime
+import decimal
+import json
+import uuid
+
+from django.utils.duration import duration_string
+from django.utils.functional import Promise
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _iso(valor):
+    texto = valor.isoformat()
+    if texto.endswith("+00:00"):
+        texto = texto[:-6] + "Z"
+    return texto
+
+
+def converter_json(valor):
+    """Converte os tipos que o codificador JSON não conhece."""
+    if isinstance(valor, decimal.Decimal):
+        return str(valor) if api_settings.COERCE_DECIMAL_TO_STRING else float(valor)
+    if isinstance(valor, datetime.timedelta):
+        return duration_string(valor)
+    if isinstance(valor, (datetime.datetime, datetime.date, datetime.time)):
+        return _iso(valor)
+    if isinstance(valor, (uuid.UUID, Promise)):
+        return str(valor)
+    if hasattr(valor, "tolist"):
+        return valor.tolist()
+    if hasattr(valor, "__iter__"):
+        return list(valor)
+    raise TypeError(f"Objeto do tipo {type(valor).__name__} não é serializável em JSON")
+
+
+class RapidoJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if orjson is not None:
+            return orjson.dumps(
+                data,
+                default=converter_json,
+                option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS,
+            )
+        return json.dumps(
+            data,
+            default=converter_json,
+            ensure_ascii=self.ensure_ascii,
+            separators=(",", ":") if self.compact else (", ", ": "),
+            allow_nan=not self.strict,
+        ).encode("utf-8")
+
+
+class RapidoJSONParser(JSONParser):
+    renderer_class = RapidoJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
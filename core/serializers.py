@@ -1,43 +1,259 @@
 from django.contrib.auth import get_user_model
-from rest_framework import serializers
-from .models import Reserva, Prestador, Servico, Cliente
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from .bloqueios import dono_bloqueio, liberar_bloqueio
+from .idempotencia import CODIGO_INDISPONIVEL
+from .models import STATUS_OCUPANTES, ListaEspera, Reserva, Prestador, Servico, Cliente
 
 User = get_user_model()
 
+MENSAGEM_HORARIO_OCUPADO = (
+    "Já existe uma reserva neste horário para o prestador selecionado."
+)
+RESTRICAO_HORARIO_OCUPADO = "reserva_horario_ocupado_unico"
+
+
+def _horario_ocupado(erro):
+    # PostgreSQL e MySQL citam o nome da restrição; o SQLite, só as colunas.
+    mensagem = str(erro)
+    tabela = Reserva._meta.db_table
+    return (
+        RESTRICAO_HORARIO_OCUPADO in mensagem
+        or f"{tabela}.prestador_id, {tabela}.data_hora" in mensagem
+    )
+
+
+class CamposDinamicosMixin:
+    """Aceita ``campos=[...]`` para serializar apenas um subconjunto dos campos."""
+
+    def __init__(self, *args, **kwargs):
+        campos = kwargs.pop("campos", None)
+        super().__init__(*args, **kwargs)
+        if campos is not None:
+            for nome in set(self.fields) - set(campos):
+                self.fields.pop(nome)
+
+
+# Campos cujo valor vindo de ``values()`` já é a representação final.
+CAMPOS_SEM_CONVERSAO = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+def _conversor_data_hora(campo):
+    # Equivalente ao DateTimeField.to_representation para valores vindos do
+    # banco, que já são datetimes com fuso quando USE_TZ está ativo.
+    formato = getattr(campo, "format", api_settings.DATETIME_FORMAT)
+    fuso = campo.timezone if hasattr(campo, "timezone") else campo.default_timezone()
+    if formato is None or formato.lower() != ISO_8601 or fuso is None:
+        return campo.to_representation
+
+    def converter(valor):
+        texto = valor.astimezone(fuso).isoformat()
+        if texto.endswith("+00:00"):
+            texto = texto[:-6] + "Z"
+        return texto
+
+    return converter
+
+
+def campos_leitura_rapida(serializer):
+    """
+    Retorna ``[(nome, coluna, conversor)]`` para os campos de leitura do
+    serializer, ou ``None`` se algum campo não puder ser lido direto de
+    ``values()`` (campos aninhados, muitos-para-muitos ou calculados).
+    """
+    campos = []
+    for nome, campo in serializer.fields.items():
+        if campo.write_only:
+            continue
+        if (
+            isinstance(campo, (serializers.BaseSerializer, serializers.ManyRelatedField))
+            or "." in campo.source
+            or campo.source == "*"
+        ):
+            return None
+        if isinstance(campo, serializers.PrimaryKeyRelatedField) and campo.pk_field:
+            return None
+        if isinstance(campo, CAMPOS_SEM_CONVERSAO):
+            conversor = None
+        elif isinstance(campo, serializers.DateTimeField):
+            conversor = _conversor_data_hora(campo)
+        else:
+            conversor = campo.to_representation
+        campos.append((nome, campo.source, conversor))
+    return campos
+
+
+def serializar_valores(campos, linhas):
+    """Monta as representações a partir das linhas de ``values()``."""
+    for linha in linhas:
+        item = {}
+        for nome, coluna, conversor in campos:
+            valor = linha[coluna]
+            if conversor is not None and valor is not None:
+                valor = conversor(valor)
+            item[nome] = valor
+        yield item
+
+
+class ReservaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    bloqueio = serializers.CharField(write_only=True, required=False)
 
-class ReservaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Reserva
-        fields = "__all__"
+        # Estado interno do despachante de lembretes (core.lembretes).
+        exclude = ["lembrete_enviado_em"]
+
+    # Relações que podem vir embutidas com ``expandir=[...]``.
+    EXPANSIVEIS = ("prestador", "servico")
+
+    def __init__(self, *args, **kwargs):
+        expandir = kwargs.pop("expandir", ())
+        super().__init__(*args, **kwargs)
+        for nome in expandir:
+            if nome in self.fields:
+                self.fields[nome] = self._serializer_expandido(nome)
+
+    @staticmethod
+    def _serializer_expandido(nome):
+        if nome == "prestador":
+            return PrestadorSerializer(read_only=True)
+        return ServicoSerializer(read_only=True)
 
     def validate(self, data):
         prestador = data.get("prestador")
         data_hora = data.get("data_hora")
+        self.token_bloqueio = data.pop("bloqueio", None)
 
         if prestador and data_hora:
-            if Prestador.objects.filter(
+            # Verificado no cache antes das consultas ao banco.
+            dono = dono_bloqueio(prestador.id, data_hora)
+            if dono is not None and dono != self.token_bloqueio:
+                raise serializers.ValidationError(
+                    {
+                        "data_hora": "Este horário está temporariamente bloqueado por outro cliente."
+                    },
+                    code=CODIGO_INDISPONIVEL,
+                )
+
+            local = timezone.localtime(data_hora)
+            if not Prestador.objects.filter(
                 id=prestador.id,
-                horariotrabalho__dia_semana=data_hora.weekday(),
-                horariotrabalho__inicio__lte=data_hora.time(),
-                horariotrabalho__fim__gte=data_hora.time(),
+                horariotrabalho__dia_semana=local.weekday(),
+                horariotrabalho__inicio__lte=local.time(),
+                horariotrabalho__fim__gte=local.time(),
             ).exists():
                 raise serializers.ValidationError(
                     {"prestador": "O prestador não está disponível neste horário."}
                 )
 
-            if Reserva.objects.filter(
-                prestador=prestador, data_hora=data_hora
-            ).exists():
-                raise serializers.ValidationError(
-                    {
-                        "data_hora": "Já existe uma reserva neste horário para o prestador selecionado."
-                    }
+            status = data.get("status", getattr(self.instance, "status", None))
+            if status in STATUS_OCUPANTES:
+                ocupantes = Reserva.objects.filter(
+                    prestador=prestador,
+                    data_hora=data_hora,
+                    status__in=STATUS_OCUPANTES,
                 )
+                if self.instance is not None:
+                    ocupantes = ocupantes.exclude(pk=self.instance.pk)
+                if ocupantes.exists():
+                    raise serializers.ValidationError(
+                        {"data_hora": MENSAGEM_HORARIO_OCUPADO},
+                        code=CODIGO_INDISPONIVEL,
+                    )
         else:
             raise serializers.ValidationError("Prestador e data/hora são obrigatórios.")
 
         return data
 
+    def create(self, validated_data):
+        reserva = self._salvar(super().create, validated_data)
+        if self.token_bloqueio:
+            liberar_bloqueio(self.token_bloqueio)
+        return reserva
+
+    def update(self, instance, validated_data):
+        return self._salvar(super().update, instance, validated_data)
+
+    def _salvar(self, salvar, *args):
+        # Duas requisições podem passar pela validação ao mesmo tempo; o índice
+        # único parcial decide qual delas fica com o horário.
+        try:
+            with transaction.atomic():
+                return salvar(*args)
+        except IntegrityError as erro:
+            if not _horario_ocupado(erro):
+                raise
+            raise serializers.ValidationError(
+                {"data_hora": MENSAGEM_HORARIO_OCUPADO}, code=CODIGO_INDISPONIVEL
+            )
+
+
+class ListaEsperaSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ListaEspera
+        fields = [
+            "id",
+            "prestador",
+            "servico",
+            "inicio",
+            "fim",
+            "prioridade",
+            "status",
+            "reserva_id",
+            "criada_em",
+        ]
+        read_only_fields = ["status", "reserva_id", "criada_em"]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+        # A prioridade só é definida pela equipe.
+        if request is None or not request.user.is_staff:
+            fields["prioridade"].read_only = True
+        return fields
+
+    def validate(self, data):
+        atual = {
+            campo: data.get(campo, getattr(self.instance, campo, None))
+            for campo in ("prestador", "servico", "inicio", "fim")
+        }
+        if atual["inicio"] >= atual["fim"]:
+            raise serializers.ValidationError(
+                {"fim": "O fim da janela deve ser posterior ao início."}
+            )
+        if not atual["prestador"].servicos.filter(pk=atual["servico"].pk).exists():
+            raise serializers.ValidationError(
+                {"servico": "O prestador não oferece este serviço."}
+            )
+        return data
+
+
+# Critérios de escolha do prestador em core.alocacao.
+CRITERIOS_ALOCACAO = ("menor_carga", "melhor_avaliacao")
+
+
+class ReservaAutomaticaSerializer(serializers.Serializer):
+    servico = serializers.PrimaryKeyRelatedField(queryset=Servico.objects.all())
+    data_hora = serializers.DateTimeField()
+    criterio = serializers.ChoiceField(
+        choices=CRITERIOS_ALOCACAO, default="menor_carga"
+    )
+    notas = serializers.CharField(required=False, allow_blank=True)
+
+
+class BloqueioHorarioSerializer(serializers.Serializer):
+    # Apenas o id: a disputa pelo horário é resolvida no cache, sem consultas.
+    prestador = serializers.IntegerField(min_value=1)
+    data_hora = serializers.DateTimeField()
+
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password2 = serializers.CharField(style={"input_type": "password"}, write_only=True)
@@ -94,7 +310,7 @@ class PrestadorSerializer(serializers.ModelSerializer):
         return instance
 
 
-class ServicoSerializer(serializers.ModelSerializer):
+class ServicoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Servico
         fields = "__all__"
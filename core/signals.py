@@ -0,0 +1,174 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .agenda import invalidar_agenda
+from .analytics import aplicar_reservas
+from .lista_espera import agendar_expiracao, horario_liberado
+from .models import (
+    STATUS_OCUPANTES,
+    HorarioTrabalho,
+    ListaEspera,
+    Prestador,
+    Reserva,
+    ReservaAlteracao,
+    Servico,
+    normalizar_data_hora,
+)
+from .realtime import publicar_evento
+from .tasks import enfileirar
+
+
+@receiver(post_save, sender=Reserva)
+def registrar_alteracao_reserva(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    ReservaAlteracao.objects.create(
+        reserva_id=instance.pk,
+        cliente_id=instance.cliente_id,
+        operacao="criado" if created else "atualizado",
+    )
+
+
+@receiver(post_save, sender=Reserva)
+def enfileirar_efeitos_reserva(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    if instance.status == "confirmado":
+        enfileirar(
+            "incrementar_servicos_prestados",
+            chave=f"reserva:{instance.pk}:servicos_prestados",
+            prestador_id=instance.prestador_id,
+        )
+
+
+@receiver(post_delete, sender=Reserva)
+def registrar_exclusao_reserva(sender, instance, **kwargs):
+    ReservaAlteracao.objects.create(
+        reserva_id=instance.pk,
+        cliente_id=instance.cliente_id,
+        operacao="excluido",
+    )
+
+
+def _invalidar_agendas(*prestadores):
+    for prestador_id in set(prestadores):
+        if prestador_id is not None:
+            transaction.on_commit(lambda pk=prestador_id: invalidar_agenda(pk))
+
+
+@receiver(post_save, sender=Reserva)
+@receiver(post_delete, sender=Reserva)
+def invalidar_agenda_reserva(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    original = getattr(instance, "_original", {})
+    _invalidar_agendas(instance.prestador_id, original.get("prestador_id"))
+
+
+@receiver(post_save, sender=HorarioTrabalho)
+@receiver(post_delete, sender=HorarioTrabalho)
+def invalidar_agenda_horario(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _invalidar_agendas(instance.prestador_id)
+
+
+@receiver(post_save, sender=Servico)
+@receiver(pre_delete, sender=Servico)
+def invalidar_agenda_servico(sender, instance, raw=False, **kwargs):
+    # O feed traz nome e duração do serviço. Na exclusão os vínculos ainda
+    # existem apenas antes do delete; as reservas removidas em cascata
+    # invalidam a agenda pelos próprios sinais.
+    if raw:
+        return
+    _invalidar_agendas(
+        *Prestador.objects.filter(servicos=instance).values_list("pk", flat=True),
+        *Reserva.objects.filter(servico=instance)
+        .values_list("prestador_id", flat=True)
+        .distinct(),
+    )
+
+
+@receiver(post_save, sender=ListaEspera)
+def agendar_expiracao_lista_espera(sender, instance, raw=False, **kwargs):
+    # A chave da tarefa inclui o fim da janela: só uma alteração do fim agenda
+    # uma nova expiração.
+    if raw or instance.status != "aguardando":
+        return
+    agendar_expiracao(instance)
+
+
+def _publicar(tipo, prestador_id, data_hora):
+    transaction.on_commit(lambda: publicar_evento(tipo, prestador_id, data_hora))
+
+
+def _liberar(prestador_id, data_hora):
+    _publicar("horario_liberado", prestador_id, data_hora)
+    horario_liberado(prestador_id, normalizar_data_hora(data_hora))
+
+
+@receiver(post_save, sender=Reserva)
+def publicar_disponibilidade_reserva(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    original = getattr(instance, "_original", {})
+    ocupava = not created and original.get("status") in STATUS_OCUPANTES
+    ocupa = instance.status in STATUS_OCUPANTES
+    anterior = (original.get("prestador_id"), original.get("data_hora"))
+    atual = (instance.prestador_id, instance.data_hora)
+
+    if ocupava and (not ocupa or anterior != atual):
+        _liberar(*anterior)
+    if ocupa and (not ocupava or anterior != atual):
+        _publicar("horario_ocupado", *atual)
+
+
+@receiver(post_delete, sender=Reserva)
+def publicar_exclusao_reserva(sender, instance, **kwargs):
+    if instance.status in STATUS_OCUPANTES:
+        _liberar(instance.prestador_id, instance.data_hora)
+
+
+def _campos_agregados(original):
+    return (
+        original.get("prestador_id"),
+        original.get("servico_id"),
+        original.get("data_hora"),
+        original.get("status"),
+    )
+
+
+@receiver(post_save, sender=Reserva)
+def atualizar_agregados_reserva(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    atual = (
+        instance.prestador_id,
+        instance.servico_id,
+        instance.data_hora,
+        instance.status,
+    )
+    alteracoes = [(1, *atual)]
+    if not created:
+        anterior = _campos_agregados(getattr(instance, "_original", {}))
+        if anterior == atual:
+            return
+        if None not in anterior:
+            alteracoes.insert(0, (-1, *anterior))
+    aplicar_reservas(alteracoes)
+
+
+@receiver(post_delete, sender=Reserva)
+def remover_agregados_reserva(sender, instance, **kwargs):
+    aplicar_reservas(
+        [
+            (
+                -1,
+                instance.prestador_id,
+                instance.servico_id,
+                instance.data_hora,
+                instance.status,
+            )
+        ]
+    )
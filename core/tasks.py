@@ -0,0 +1,149 @@
+"""
+Fila de tarefas em segundo plano, persistida na tabela ``Tarefa``.
+
+Efeitos colaterais das requisições são registrados com ``enfileirar`` e só
+entram na fila quando a transação atual é confirmada. O comando
+``processar_tarefas`` executa as tarefas pendentes em um pool de threads,
+com novas tentativas e backoff exponencial, e periodicamente devolve à fila as
+tarefas travadas e apaga as finalizadas há mais de
+``RESERVAS_TAREFAS_RETENCAO_DIAS`` dias.
+"""
+
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Prestador, Tarefa
+
+logger = logging.getLogger(__name__)
+
+_tarefas = {}
+
+
+def tarefa(nome=None, max_tentativas=5):
+    """Registra a função como tarefa executável pelo worker."""
+
+    def registrar(funcao):
+        _tarefas[nome or funcao.__name__] = (funcao, max_tentativas)
+        return funcao
+
+    return registrar
+
+
+def enfileirar(nome, chave=None, atraso=None, **argumentos):
+    """
+    Enfileira a tarefa após o commit da transação atual. Tarefas com a mesma
+    ``chave`` são enfileiradas uma única vez.
+    """
+    if nome not in _tarefas:
+        raise ValueError(f"Tarefa desconhecida: {nome}")
+    max_tentativas = _tarefas[nome][1]
+
+    def inserir():
+        Tarefa.objects.bulk_create(
+            [
+                Tarefa(
+                    nome=nome,
+                    argumentos=argumentos,
+                    chave=chave,
+                    max_tentativas=max_tentativas,
+                    executar_em=timezone.now() + (atraso or timedelta()),
+                )
+            ],
+            ignore_conflicts=True,
+        )
+
+    transaction.on_commit(inserir)
+
+
+def recuperar_travadas(tempo_limite=timedelta(minutes=10)):
+    """Devolve à fila tarefas presas em execução por um worker interrompido."""
+    return Tarefa.objects.filter(
+        status="executando", atualizada_em__lt=timezone.now() - tempo_limite
+    ).update(status="pendente", atualizada_em=timezone.now())
+
+
+def limpar_finalizadas(retencao=None):
+    """Apaga as tarefas concluídas ou que falharam há mais de ``retencao``."""
+    if retencao is None:
+        retencao = timedelta(
+            days=getattr(settings, "RESERVAS_TAREFAS_RETENCAO_DIAS", 7)
+        )
+    apagadas, _ = Tarefa.objects.filter(
+        status__in=("concluida", "falhou"),
+        atualizada_em__lt=timezone.now() - retencao,
+    ).delete()
+    return apagadas
+
+
+def reservar_tarefas(limite):
+    candidatas = Tarefa.objects.filter(
+        status="pendente", executar_em__lte=timezone.now()
+    ).order_by("executar_em")[:limite]
+    reservadas = []
+    for pk in candidatas.values_list("pk", flat=True):
+        # Atualização condicional: apenas um worker consegue reservar a tarefa.
+        if Tarefa.objects.filter(pk=pk, status="pendente").update(
+            status="executando",
+            tentativas=F("tentativas") + 1,
+            atualizada_em=timezone.now(),
+        ):
+            reservadas.append(pk)
+    return reservadas
+
+
+def executar_tarefa(pk):
+    tarefa = Tarefa.objects.get(pk=pk)
+    funcao, _ = _tarefas.get(tarefa.nome, (None, None))
+    try:
+        if funcao is None:
+            raise LookupError(f"Tarefa desconhecida: {tarefa.nome}")
+        with transaction.atomic():
+            funcao(**tarefa.argumentos)
+            tarefa.status = "concluida"
+            tarefa.erro = ""
+            tarefa.save(update_fields=["status", "erro", "atualizada_em"])
+    except Exception:
+        logger.exception("Falha ao executar a tarefa %s (%s)", tarefa.pk, tarefa.nome)
+        tarefa.erro = traceback.format_exc()
+        if funcao is None or tarefa.tentativas >= tarefa.max_tentativas:
+            tarefa.status = "falhou"
+        else:
+            tarefa.status = "pendente"
+            tarefa.executar_em = timezone.now() + timedelta(
+                seconds=2**tarefa.tentativas
+            )
+        tarefa.save(update_fields=["status", "erro", "executar_em", "atualizada_em"])
+    return tarefa.status
+
+
+def _executar_em_thread(pk):
+    try:
+        return executar_tarefa(pk)
+    finally:
+        close_old_connections()
+
+
+def processar_pendentes(workers=1, limite=100):
+    """Executa um lote de tarefas pendentes e retorna quantas foram processadas."""
+    pks = reservar_tarefas(limite)
+    if workers <= 1:
+        for pk in pks:
+            executar_tarefa(pk)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_executar_em_thread, pks))
+    return len(pks)
+
+
+@tarefa()
+def incrementar_servicos_prestados(prestador_id):
+    Prestador.objects.filter(pk=prestador_id).update(
+        quantidade_servicos_prestados=F("quantidade_servicos_prestados") + 1
+    )
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.test import APITestCase
+
+from core.alocacao import prestadores_elegiveis
+from core.bloqueios import bloquear_horario
+from core.models import Cliente, HorarioTrabalho, Prestador, Reserva, Servico
+
+
+class ReservaAutomaticaAPITest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="auto_cli", password="x")
+        self.cliente = Cliente.objects.create(usuario=self.user)
+        self.servico = Servico.objects.create(
+            nome="Corte", descricao="Corte", duracao=timedelta(minutes=60)
+        )
+        # Terça-feira, dentro do expediente de todos.
+        self.data_hora = timezone.make_aware(datetime(2030, 1, 8, 10, 0))
+        self.ocupado = self.criar_prestador("auto_ocupado", "5.00")
+        self.avaliado = self.criar_prestador("auto_avaliado", "4.50")
+        self.livre = self.criar_prestador("auto_livre", "3.00")
+        self.sem_servico = self.criar_prestador("auto_sem", "5.00", servico=False)
+        self.reservar(self.ocupado, self.data_hora)
+        self.reservar(self.avaliado, self.data_hora + timedelta(hours=2))
+        self.client.force_authenticate(user=self.user)
+
+    def criar_prestador(self, nome, rank, servico=True):
+        prestador = Prestador.objects.create(
+            usuario=User.objects.create_user(username=nome, password="x"),
+            rank_avaliacao=Decimal(rank),
+        )
+        HorarioTrabalho.objects.create(
+            prestador=prestador, dia_semana=1, inicio="09:00", fim="17:00"
+        )
+        if servico:
+            prestador.servicos.add(self.servico)
+        return prestador
+
+    def reservar(self, prestador, data_hora):
+        return Reserva.objects.create(
+            cliente=self.cliente,
+            prestador=prestador,
+            servico=self.servico,
+            data_hora=data_hora,
+            status="confirmado",
+        )
+
+    def pedir(self, **extra):
+        dados = {
+            "servico": self.servico.id,
+            "data_hora": self.data_hora.isoformat(),
+            **extra,
+        }
+        return self.client.post("/api/reservas/auto/", dados, format="json")
+
+    def test_elegiveis(self):
+        elegiveis = {
+            pk: carga
+            for pk, _, carga in prestadores_elegiveis(self.servico, self.data_hora)
+        }
+        self.assertEqual(elegiveis, {self.avaliado.id: 60, self.livre.id: 0})
+        fora_do_expediente = self.data_hora.replace(hour=16, minute=30)
+        self.assertEqual(prestadores_elegiveis(self.servico, fora_do_expediente), [])
+
+    def test_menor_carga(self):
+        response = self.pedir()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["prestador"], self.livre.id)
+        self.assertEqual(response.data["cliente"], self.cliente.id)
+
+    def test_melhor_avaliacao(self):
+        response = self.pedir(criterio="melhor_avaliacao")
+        self.assertEqual(response.data["prestador"], self.avaliado.id)
+
+    def test_ignora_horario_bloqueado(self):
+        bloquear_horario(self.livre.id, self.data_hora)
+        response = self.pedir()
+        self.assertEqual(response.data["prestador"], self.avaliado.id)
+
+    def test_tenta_proximo_em_conflito(self):
+        # Simula uma consulta feita antes de outra requisição ocupar o horário.
+        elegiveis = [
+            (self.ocupado.id, Decimal("5.00"), 0),
+            (self.livre.id, Decimal("3.00"), 10),
+        ]
+        with mock.patch("core.alocacao.prestadores_elegiveis", return_value=elegiveis):
+            response = self.pedir()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["prestador"], self.livre.id)
+
+    def test_erro_que_nao_e_de_horario_nao_tenta_o_proximo(self):
+        erro = serializers.ValidationError({"notas": "Inválido."})
+        with mock.patch(
+            "core.alocacao.ReservaSerializer.validate", side_effect=erro
+        ) as validar:
+            response = self.pedir()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {"notas": ["Inválido."]})
+        self.assertEqual(validar.call_count, 1)
+
+    def test_sem_prestador_disponivel(self):
+        self.reservar(self.avaliado, self.data_hora)
+        self.reservar(self.livre, self.data_hora)
+        response = self.pedir()
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Reserva.objects.filter(data_hora=self.data_hora).count(), 3)
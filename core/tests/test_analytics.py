@@ -0,0 +1,158 @@
+from datetime import date, datetime, timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import (
+    Cliente,
+    ContagemServicoDiaria,
+    HorarioTrabalho,
+    OcupacaoDiaria,
+    Prestador,
+    Reserva,
+    Servico,
+)
+
+
+class OcupacaoAnalyticsTest(APITestCase):
+    def setUp(self):
+        cliente_user = User.objects.create_user(username="an_cliente", password="x")
+        self.cliente = Cliente.objects.create(usuario=cliente_user)
+        prestador_user = User.objects.create_user(username="an_prest", password="x")
+        self.prestador = Prestador.objects.create(usuario=prestador_user)
+        # Segunda e terça, 8 horas cada.
+        for dia in (0, 1):
+            HorarioTrabalho.objects.create(
+                prestador=self.prestador, dia_semana=dia, inicio="09:00", fim="17:00"
+            )
+        self.servico = Servico.objects.create(
+            nome="Corte", descricao="Corte", duracao=timedelta(minutes=60)
+        )
+        self.admin = User.objects.create_superuser("an_admin", "a@a.com", "x")
+
+    def reservar(self, dia, hora, status_reserva="confirmado"):
+        return Reserva.objects.create(
+            cliente=self.cliente,
+            prestador=self.prestador,
+            servico=self.servico,
+            data_hora=timezone.make_aware(datetime(2030, 1, dia, hora)),
+            status=status_reserva,
+        )
+
+    def ocupacao(self, dia):
+        return OcupacaoDiaria.objects.get(prestador=self.prestador, data=date(2030, 1, dia))
+
+    def test_agregados_incrementais(self):
+        primeira = self.reservar(7, 9)
+        self.reservar(7, 10)
+        self.assertEqual(self.ocupacao(7).minutos_reservados, 120)
+        self.assertEqual(self.ocupacao(7).reservas, 2)
+
+        primeira.status = "cancelado"
+        primeira.save()
+        self.assertEqual(self.ocupacao(7).minutos_reservados, 60)
+        self.assertEqual(
+            ContagemServicoDiaria.objects.get(
+                servico=self.servico, data=date(2030, 1, 7), status="cancelado"
+            ).quantidade,
+            1,
+        )
+
+        primeira.data_hora = timezone.make_aware(datetime(2030, 1, 8, 9))
+        primeira.status = "confirmado"
+        primeira.save()
+        self.assertEqual(self.ocupacao(8).minutos_reservados, 60)
+
+        primeira.delete()
+        self.assertEqual(self.ocupacao(8).minutos_reservados, 0)
+
+    def test_recalcular_coincide_com_incremental(self):
+        self.reservar(7, 9)
+        self.reservar(8, 9, "cancelado")
+        self.reservar(15, 9, "concluido")
+        incremental = sorted(
+            OcupacaoDiaria.objects.values_list("data", "minutos_reservados", "reservas")
+        )
+        contagens = sorted(
+            ContagemServicoDiaria.objects.filter(quantidade__gt=0).values_list(
+                "servico", "data", "status", "quantidade"
+            )
+        )
+        OcupacaoDiaria.objects.all().delete()
+        call_command("recalcular_ocupacao", stdout=StringIO())
+        self.assertEqual(
+            sorted(
+                OcupacaoDiaria.objects.values_list(
+                    "data", "minutos_reservados", "reservas"
+                )
+            ),
+            incremental,
+        )
+        self.assertEqual(
+            sorted(
+                ContagemServicoDiaria.objects.values_list(
+                    "servico", "data", "status", "quantidade"
+                )
+            ),
+            contagens,
+        )
+
+    def test_api_ocupacao_semanal(self):
+        self.reservar(7, 9)
+        self.reservar(8, 9)
+        self.reservar(8, 10, "cancelado")
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(
+            reverse("analytics-ocupacao"), {"inicio": "2030-01-07", "fim": "2030-01-13"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            [
+                {
+                    "prestador": self.prestador.id,
+                    "semana": "2030-01-07",
+                    "minutos_reservados": 120,
+                    "capacidade_minutos": 960,
+                    "utilizacao": 0.125,
+                    "reservas": 2,
+                }
+            ],
+        )
+
+        response = self.client.get(
+            reverse("analytics-servicos"), {"inicio": "2030-01-07", "fim": "2030-01-13"}
+        )
+        self.assertEqual(
+            list(response.data),
+            [
+                {"servico": self.servico.id, "status": "cancelado", "quantidade": 1},
+                {"servico": self.servico.id, "status": "confirmado", "quantidade": 2},
+            ],
+        )
+
+    def test_api_apenas_staff(self):
+        response = self.client.get(reverse("analytics-ocupacao"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_periodo_invalido(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(reverse("analytics-ocupacao"), {"inicio": "ontem"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_prestador_invalido(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(reverse("analytics-ocupacao"), {"prestador": "abc"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_exclusao_em_cascata(self):
+        self.reservar(7, 9)
+        self.servico.delete()
+        self.prestador.delete()
+        self.assertFalse(OcupacaoDiaria.objects.exists())
+        self.assertFalse(ContagemServicoDiaria.objects.exists())
@@ -1,10 +1,27 @@
 from rest_framework.test import APITestCase, APIClient
+from rest_framework import serializers
 from rest_framework import status
+from core.agenda import _chave_conteudo, token_agenda, versao_agenda
 from core.models import Prestador, Servico, HorarioTrabalho, Reserva, Cliente
 from django.contrib.auth.models import User
 from datetime import datetime, timedelta
+from unittest import mock
 from django.urls import reverse
 from django.utils import timezone
+from django.core.cache import cache
+from django.db import IntegrityError
+from core.serializers import ReservaSerializer
+from core.tasks import processar_pendentes
+
+
+def expediente_integral(prestador):
+    """Disponibiliza o prestador o dia inteiro, todos os dias da semana."""
+    return [
+        HorarioTrabalho.objects.create(
+            prestador=prestador, dia_semana=dia, inicio="00:00", fim="23:59:59"
+        )
+        for dia in range(7)
+    ]
 
 
 class ClienteCreateTestCase(APITestCase):
@@ -152,12 +169,7 @@ class ReservaAPITest(APITestCase):
         self.prestador = Prestador.objects.create(
             usuario=self.prestador_user, biografia="Prestador de serviços"
         )
-        self.horario = HorarioTrabalho.objects.create(
-            prestador=self.prestador,
-            dia_semana=0,
-            inicio=datetime.now().time(),
-            fim=(datetime.now() + timedelta(hours=1)).time(),
-        )
+        self.horarios = expediente_integral(self.prestador)
 
         self.servico = Servico.objects.create(
             nome="Serviço Teste",
@@ -246,6 +258,107 @@ class ReservaAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["status"], "confirmado")
 
+    def test_reserva_respeita_expediente(self):
+        for horario in self.horarios:
+            horario.delete()
+        # Terça-feira das 9h às 12h.
+        HorarioTrabalho.objects.create(
+            prestador=self.prestador, dia_semana=1, inicio="09:00", fim="12:00"
+        )
+        dados = {
+            "cliente": self.cliente.id,
+            "prestador": self.prestador.id,
+            "servico": self.servico.id,
+            "status": "confirmado",
+        }
+        dentro = timezone.make_aware(datetime(2030, 1, 8, 10, 0, 0))
+        fora = timezone.make_aware(datetime(2030, 1, 8, 14, 0, 0))
+
+        response = self.client.post(
+            "/api/reservas/", {**dados, "data_hora": fora.isoformat()}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("prestador", response.data)
+
+        response = self.client.post(
+            "/api/reservas/", {**dados, "data_hora": dentro.isoformat()}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_horario_cancelado_pode_ser_reservado_novamente(self):
+        data_hora = timezone.make_aware(datetime(2030, 1, 8, 15, 0, 0))
+        reserva_data = {
+            "cliente": self.cliente.id,
+            "prestador": self.prestador.id,
+            "servico": self.servico.id,
+            "data_hora": data_hora.isoformat(),
+            "status": "confirmado",
+        }
+        response = self.client.post("/api/reservas/", reserva_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        primeira = response.data["id"]
+
+        response = self.client.post("/api/reservas/", reserva_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.patch(
+            f"/api/reservas/{primeira}/",
+            {**reserva_data, "status": "cancelado"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.post("/api/reservas/", reserva_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # Reativar a cancelada esbarraria na nova reserva.
+        response = self.client.patch(
+            f"/api/reservas/{primeira}/",
+            {**reserva_data, "status": "confirmado"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_indice_unico_resolve_corrida(self):
+        data_hora = timezone.make_aware(datetime(2030, 1, 8, 16, 0, 0))
+        dados = {
+            "cliente": self.cliente.id,
+            "prestador": self.prestador.id,
+            "servico": self.servico.id,
+            "data_hora": data_hora.isoformat(),
+            "status": "confirmado",
+        }
+        serializer = ReservaSerializer(data=dados)
+        self.assertTrue(serializer.is_valid())
+        # Outra requisição grava o horário depois da validação desta.
+        Reserva.objects.create(
+            cliente=self.cliente,
+            prestador=self.prestador,
+            servico=self.servico,
+            data_hora=data_hora,
+            status="confirmado",
+        )
+        with self.assertRaises(serializers.ValidationError):
+            serializer.save()
+        self.assertEqual(Reserva.objects.filter(data_hora=data_hora).count(), 1)
+
+    def test_outra_violacao_de_integridade_e_relancada(self):
+        dados = {
+            "cliente": self.cliente.id,
+            "prestador": self.prestador.id,
+            "servico": self.servico.id,
+            "data_hora": timezone.make_aware(datetime(2030, 1, 8, 16, 0)).isoformat(),
+            "status": "confirmado",
+        }
+        serializer = ReservaSerializer(data=dados)
+        self.assertTrue(serializer.is_valid())
+        erro = IntegrityError("FOREIGN KEY constraint failed")
+        with mock.patch(
+            "rest_framework.serializers.ModelSerializer.create", side_effect=erro
+        ):
+            with self.assertRaises(IntegrityError):
+                serializer.save()
+
 
 class PrestadorAPITest(APITestCase):
     @classmethod
@@ -330,6 +443,7 @@ class PrestadorAPITest(APITestCase):
         prestador = self.create_prestador(
             quantidade_servicos_prestados=0, rank_avaliacao=0
         )
+        expediente_integral(prestador)
         cliente_user = User.objects.create_user(
             username="cliente_user", password="testpass123"
         )
@@ -346,8 +460,467 @@ class PrestadorAPITest(APITestCase):
             "notas": "Por favor, chegar 10 minutos antes.",
         }
         url = reverse("reservas-list")
-        response = self.client.post(url, reserva_data, format="json")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, reserva_data, format="json")
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # O contador é atualizado pelo worker de tarefas, fora da requisição.
+        prestador.refresh_from_db()
+        self.assertEqual(prestador.quantidade_servicos_prestados, 0)
+        processar_pendentes()
         prestador.refresh_from_db()
         self.assertEqual(prestador.quantidade_servicos_prestados, 1)
+
+
+class ReservaSincronizacaoAPITest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="sync_user", password="x")
+        self.cliente = Cliente.objects.create(usuario=self.user)
+        prestador_user = User.objects.create_user(username="sync_prest", password="x")
+        self.prestador = Prestador.objects.create(usuario=prestador_user)
+        self.servico = Servico.objects.create(
+            nome="Serviço", descricao="Descrição", duracao=timedelta(minutes=30)
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("reservas-sincronizar")
+
+    def criar_reserva(self, dias):
+        return Reserva.objects.create(
+            cliente=self.cliente,
+            prestador=self.prestador,
+            servico=self.servico,
+            data_hora=timezone.now() + timedelta(days=dias),
+            status="confirmado",
+        )
+
+    def test_sincronizacao_inicial_retorna_cursor(self):
+        reserva = self.criar_reserva(1)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["alteracoes"]), 1)
+        self.assertEqual(response.data["alteracoes"][0]["id"], reserva.id)
+        self.assertGreater(response.data["cursor"], 0)
+
+    def test_sincronizacao_incremental(self):
+        antiga = self.criar_reserva(1)
+        removida = self.criar_reserva(2)
+        cursor = self.client.get(self.url).data["cursor"]
+
+        nova = self.criar_reserva(3)
+        antiga.status = "cancelado"
+        antiga.save()
+        removida_id = removida.id
+        removida.delete()
+
+        response = self.client.get(self.url, {"since": cursor})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(r["id"] for r in response.data["alteracoes"]),
+            sorted([antiga.id, nova.id]),
+        )
+        self.assertEqual(response.data["removidas"], [removida_id])
+
+        response = self.client.get(self.url, {"since": response.data["cursor"]})
+        self.assertEqual(response.data["alteracoes"], [])
+        self.assertEqual(response.data["removidas"], [])
+
+    def test_sincronizacao_paginada(self):
+        for dias in range(1, 4):
+            self.criar_reserva(dias)
+        response = self.client.get(self.url, {"since": 0, "limite": 2})
+        self.assertTrue(response.data["mais"])
+        self.assertEqual(len(response.data["alteracoes"]), 2)
+        response = self.client.get(
+            self.url, {"since": response.data["cursor"], "limite": 2}
+        )
+        self.assertFalse(response.data["mais"])
+        self.assertEqual(len(response.data["alteracoes"]), 1)
+
+    def test_limite_invalido(self):
+        for limite in ("0", "-5", "abc"):
+            response = self.client.get(self.url, {"since": 0, "limite": limite})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AgendaPrestadorAPITest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        cliente_user = User.objects.create_user(username="agenda_cli", password="x")
+        self.cliente = Cliente.objects.create(usuario=cliente_user)
+        prestador_user = User.objects.create_user(username="agenda_prest", password="x")
+        self.prestador = Prestador.objects.create(usuario=prestador_user)
+        HorarioTrabalho.objects.create(
+            prestador=self.prestador, dia_semana=2, inicio="09:00", fim="17:00"
+        )
+        self.servico = Servico.objects.create(
+            nome="Corte, barba; e lavagem",
+            descricao="Descrição",
+            duracao=timedelta(minutes=45),
+        )
+        self.reserva = Reserva.objects.create(
+            cliente=self.cliente,
+            prestador=self.prestador,
+            servico=self.servico,
+            data_hora=timezone.make_aware(datetime(2024, 3, 15, 10, 0, 0)),
+            status="confirmado",
+        )
+        self.url = (
+            reverse("prestador-agenda", args=[self.prestador.id])
+            + f"?token={token_agenda(self.prestador.id)}"
+        )
+
+    def test_get_agenda(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/calendar"))
+        conteudo = b"".join(response.streaming_content).decode()
+        self.assertIn(f"UID:reserva-{self.reserva.id}@sistema-reservas", conteudo)
+        self.assertIn("DTSTART:20240315T100000Z", conteudo)
+        self.assertIn("DTEND:20240315T104500Z", conteudo)
+        self.assertIn("SUMMARY:Corte\\, barba\\; e lavagem", conteudo)
+        self.assertIn("RRULE:FREQ=WEEKLY;BYDAY=WE", conteudo)
+        self.assertTrue(conteudo.endswith("END:VCALENDAR\r\n"))
+
+        # A segunda consulta é servida do cache com o mesmo conteúdo.
+        response = self.client.get(self.url)
+        self.assertEqual(response.content.decode(), conteudo)
+
+    def etag(self):
+        # A primeira consulta gera o feed em streaming; o ETag vem do cache.
+        b"".join(self.client.get(self.url).streaming_content)
+        return self.client.get(self.url)["ETag"]
+
+    def test_etag_nao_modificado(self):
+        etag = self.etag()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_muda_quando_reservas_mudam(self):
+        etag = self.etag()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reserva.status = "cancelado"
+            self.reserva.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("STATUS:CANCELLED", b"".join(response.streaming_content).decode())
+        self.assertNotEqual(self.client.get(self.url)["ETag"], etag)
+
+    def test_agenda_muda_quando_servico_muda(self):
+        self.prestador.servicos.add(self.servico)
+        etag = self.etag()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.servico.nome = "Coloração"
+            self.servico.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("SUMMARY:Coloração", b"".join(response.streaming_content).decode())
+
+    def test_etag_segue_o_conteudo(self):
+        etag = self.etag()
+        # Conteúdo expirado do cache com a mesma versão: o ETag antigo não vale.
+        versao = versao_agenda(self.prestador.id)
+        cache.delete(_chave_conteudo(self.prestador.id, versao))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_agenda_prestador_inexistente(self):
+        response = self.client.get(
+            reverse("prestador-agenda", args=[9999]), {"token": token_agenda(9999)}
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_agenda_exige_token(self):
+        url = reverse("prestador-agenda", args=[self.prestador.id])
+        for parametros in ({}, {"token": token_agenda(self.prestador.id + 1)}):
+            response = self.client.get(url, parametros)
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_link_da_agenda(self):
+        url = reverse("prestadores-agenda-link", args=[self.prestador.id])
+        self.client.force_authenticate(user=self.cliente.usuario)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.prestador.usuario)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["url"].endswith(self.url))
+
+
+class BloqueioHorarioAPITest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="bloq_cli", password="x")
+        self.cliente = Cliente.objects.create(usuario=self.user)
+        prestador_user = User.objects.create_user(username="bloq_prest", password="x")
+        self.prestador = Prestador.objects.create(usuario=prestador_user)
+        self.servico = Servico.objects.create(
+            nome="Serviço", descricao="Descrição", duracao=timedelta(minutes=30)
+        )
+        self.data_hora = timezone.make_aware(datetime(2030, 1, 7, 9, 0))
+        self.client.force_authenticate(user=self.user)
+
+    def bloquear(self):
+        return self.client.post(
+            reverse("bloqueio-create"),
+            {"prestador": self.prestador.id, "data_hora": self.data_hora.isoformat()},
+            format="json",
+        )
+
+    def reservar(self, **extra):
+        dados = {
+            "cliente": self.cliente.id,
+            "prestador": self.prestador.id,
+            "servico": self.servico.id,
+            "data_hora": self.data_hora.isoformat(),
+            "status": "confirmado",
+        }
+        dados.update(extra)
+        return self.client.post("/api/reservas/", dados, format="json")
+
+    def test_bloqueio_exclusivo(self):
+        response = self.bloquear()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn("token", response.data)
+        self.assertEqual(self.bloquear().status_code, status.HTTP_409_CONFLICT)
+
+    def test_reserva_respeita_bloqueio(self):
+        HorarioTrabalho.objects.create(
+            prestador=self.prestador, dia_semana=0, inicio="09:00", fim="11:00"
+        )
+        token = self.bloquear().data["token"]
+        response = self.reservar()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("data_hora", response.data)
+
+        response = self.reservar(bloqueio=token)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # O bloqueio é liberado quando a reserva é criada.
+        self.assertEqual(
+            self.client.delete(reverse("bloqueio-detail", args=[token])).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+
+    def test_liberar_bloqueio(self):
+        token = self.bloquear().data["token"]
+        response = self.client.delete(reverse("bloqueio-detail", args=[token]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.bloquear().status_code, status.HTTP_201_CREATED)
+
+    def test_disponibilidade_respeita_reservas_e_bloqueios(self):
+        HorarioTrabalho.objects.create(
+            prestador=self.prestador, dia_semana=0, inicio="09:00", fim="11:00"
+        )
+        Reserva.objects.create(
+            cliente=self.cliente,
+            prestador=self.prestador,
+            servico=self.servico,
+            data_hora=self.data_hora + timedelta(minutes=30),
+            status="confirmado",
+        )
+        self.bloquear()
+        url = reverse("prestadores-disponibilidade", args=[self.prestador.id])
+        response = self.client.get(url, {"data": "2030-01-07"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["horarios"], ["2030-01-07T10:00:00Z", "2030-01-07T10:30:00Z"]
+        )
+
+        response = self.client.get(url, {"data": "07/01/2030"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Todo horário anunciado pode ser reservado.
+        response = self.client.get(url, {"data": "2030-01-07"})
+        for horario in response.data["horarios"]:
+            self.assertEqual(
+                self.reservar(data_hora=horario).status_code, status.HTTP_201_CREATED
+            )
+
+    def test_disponibilidade_valida_servico(self):
+        HorarioTrabalho.objects.create(
+            prestador=self.prestador, dia_semana=0, inicio="09:00", fim="11:00"
+        )
+        url = reverse("prestadores-disponibilidade", args=[self.prestador.id])
+        response = self.client.get(url, {"data": "2030-01-07", "servico": "abc"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        instantaneo = Servico.objects.create(
+            nome="Instantâneo", descricao="Sem duração", duracao=timedelta(0)
+        )
+        response = self.client.get(
+            url, {"data": "2030-01-07", "servico": instantaneo.id}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CamposEsparsosAPITest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="campos_cli", password="x")
+        self.cliente = Cliente.objects.create(usuario=self.user)
+        prestador_user = User.objects.create_user(username="campos_prest", password="x")
+        self.prestador = Prestador.objects.create(usuario=prestador_user)
+        self.servico = Servico.objects.create(
+            nome="Serviço", descricao="Descrição", duracao=timedelta(minutes=90)
+        )
+        self.reserva = Reserva.objects.create(
+            cliente=self.cliente,
+            prestador=self.prestador,
+            servico=self.servico,
+            data_hora=timezone.make_aware(datetime(2024, 3, 15, 10, 0, 0)),
+            status="confirmado",
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_listagem_rapida_igual_ao_serializer(self):
+        lista = self.client.get("/api/reservas/")
+        detalhe = self.client.get(f"/api/reservas/{self.reserva.id}/")
+        self.assertEqual(lista.status_code, status.HTTP_200_OK)
+        self.assertEqual(lista.data, [detalhe.data])
+
+        lista = self.client.get("/api/servicos/")
+        detalhe = self.client.get(f"/api/servicos/{self.servico.id}/")
+        self.assertEqual(lista.data, [detalhe.data])
+        self.assertEqual(lista.data[0]["duracao"], "01:30:00")
+
+    def test_campos_esparsos(self):
+        response = self.client.get("/api/reservas/", {"fields": "id,status"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{"id": self.reserva.id, "status": "confirmado"}])
+
+        response = self.client.get(
+            f"/api/reservas/{self.reserva.id}/", {"fields": "data_hora"}
+        )
+        self.assertEqual(response.data, {"data_hora": "2024-03-15T10:00:00Z"})
+
+    def test_campo_invalido(self):
+        response = self.client.get("/api/servicos/", {"fields": "nome,senha"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("fields", response.data)
+
+    def test_campo_somente_escrita(self):
+        response = self.client.get("/api/reservas/", {"fields": "bloqueio"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("fields", response.data)
+
+
+class LoteAPITest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="lote_cli", password="x")
+        self.cliente = Cliente.objects.create(usuario=self.user)
+        self.servicos = [
+            Servico.objects.create(
+                nome=f"Serviço {i}",
+                descricao="Descrição",
+                duracao=timedelta(minutes=30),
+            )
+            for i in range(3)
+        ]
+        self.prestadores = []
+        for i in range(3):
+            prestador = Prestador.objects.create(
+                usuario=User.objects.create_user(username=f"lote_prest{i}", password="x")
+            )
+            prestador.servicos.set(self.servicos[: i + 1])
+            self.prestadores.append(prestador)
+        self.reserva = Reserva.objects.create(
+            cliente=self.cliente,
+            prestador=self.prestadores[1],
+            servico=self.servicos[0],
+            data_hora=timezone.make_aware(datetime(2030, 1, 8, 15, 0, 0)),
+            status="confirmado",
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_prestadores_por_ids(self):
+        ids = f"{self.prestadores[0].id},{self.prestadores[2].id}"
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/prestadores/", {"ids": ids})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([len(item["servicos"]) for item in response.data], [1, 3])
+
+    def test_servicos_e_clientes_por_ids(self):
+        response = self.client.get(
+            "/api/servicos/", {"ids": str(self.servicos[1].id), "fields": "id,nome"}
+        )
+        self.assertEqual(
+            response.data, [{"id": self.servicos[1].id, "nome": "Serviço 1"}]
+        )
+
+        response = self.client.get("/api/clientes/", {"ids": str(self.cliente.id)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]["usuario"]["username"], "lote_cli")
+
+        self.client.force_authenticate(user=None)
+        response = self.client.get("/api/clientes/", {"ids": str(self.cliente.id)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cliente_comum_ve_apenas_o_proprio_cadastro(self):
+        outro = Cliente.objects.create(
+            usuario=User.objects.create_user(username="lote_outro", password="x"),
+            telefone="555",
+        )
+        response = self.client.get("/api/clientes/")
+        self.assertEqual(
+            [item["usuario"]["username"] for item in response.data], ["lote_cli"]
+        )
+        response = self.client.get(
+            "/api/clientes/", {"ids": f"{self.cliente.id},{outro.id}"}
+        )
+        self.assertEqual(len(response.data), 1)
+        response = self.client.get(f"/api/clientes/{outro.id}/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        admin = User.objects.create_superuser("lote_admin", "a@a.com", "x")
+        self.client.force_authenticate(user=admin)
+        response = self.client.get(
+            "/api/clientes/", {"ids": f"{self.cliente.id},{outro.id}"}
+        )
+        self.assertEqual(len(response.data), 2)
+
+    def test_ids_invalidos_ou_acima_do_limite(self):
+        response = self.client.get("/api/servicos/", {"ids": "1,a"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with self.settings(RESERVAS_LOTE_MAXIMO=2):
+            response = self.client.get("/api/servicos/", {"ids": "1,2,3"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_reservas_com_expand(self):
+        response = self.client.get("/api/reservas/", {"expand": "prestador,servico"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        item = response.data[0]
+        self.assertEqual(item["servico"]["nome"], "Serviço 0")
+        self.assertEqual(item["prestador"]["usuario"], self.prestadores[1].usuario_id)
+        self.assertEqual(len(item["prestador"]["servicos"]), 2)
+
+        response = self.client.get(
+            f"/api/reservas/{self.reserva.id}/",
+            {"expand": "servico", "fields": "id,servico"},
+        )
+        self.assertEqual(response.data["servico"]["id"], self.servicos[0].id)
+        self.assertEqual(set(response.data), {"id", "servico"})
+
+        response = self.client.get("/api/reservas/", {"expand": "cliente"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expand_fora_de_fields_nao_adia_a_chave(self):
+        for hora in (11, 12, 13):
+            Reserva.objects.create(
+                cliente=self.cliente,
+                prestador=self.prestadores[hora % 3],
+                servico=self.servicos[0],
+                data_hora=timezone.make_aware(datetime(2024, 3, 15, hora, 0)),
+                status="confirmado",
+            )
+        parametros = {"fields": "id,servico", "expand": "prestador,servico"}
+        # Cliente, reservas, prestadores, serviços dos prestadores e serviços:
+        # uma consulta cada, sem carregar ``prestador_id`` reserva a reserva.
+        with self.assertNumQueries(5):
+            response = self.client.get("/api/reservas/", parametros)
+        self.assertEqual(len(response.data), 4)
+
+        with self.assertNumQueries(4):
+            response = self.client.get(
+                f"/api/reservas/{self.reserva.id}/",
+                {"fields": "id", "expand": "prestador"},
+            )
+        self.assertEqual(response.data, {"id": self.reserva.id})
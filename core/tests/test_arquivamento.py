@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.agenda import versao_agenda
+from core.arquivamento import arquivar_reservas
+from core.models import (
+    Cliente,
+    OcupacaoDiaria,
+    Prestador,
+    Reserva,
+    ReservaAlteracao,
+    ReservaArquivada,
+    Servico,
+)
+
+
+class ArquivamentoTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="arq_cli", password="x")
+        self.cliente = Cliente.objects.create(usuario=self.user)
+        prestador_user = User.objects.create_user(username="arq_prest", password="x")
+        self.prestador = Prestador.objects.create(usuario=prestador_user)
+        self.servico = Servico.objects.create(
+            nome="Corte", descricao="Corte", duracao=timedelta(minutes=30)
+        )
+        agora = timezone.now().replace(microsecond=0)
+        self.antigas = [
+            self.reservar(agora - timedelta(days=400 + i), "concluido") for i in range(3)
+        ]
+        self.antiga_confirmada = self.reservar(agora - timedelta(days=500), "confirmado")
+        self.recente = self.reservar(agora - timedelta(days=10), "concluido")
+        self.client.force_authenticate(user=self.user)
+
+    def reservar(self, data_hora, status_reserva):
+        return Reserva.objects.create(
+            cliente=self.cliente,
+            prestador=self.prestador,
+            servico=self.servico,
+            data_hora=data_hora,
+            status=status_reserva,
+        )
+
+    def test_arquiva_em_lotes_apenas_finalizadas_antigas(self):
+        alteracoes = ReservaAlteracao.objects.order_by("id").last().id
+        ocupacao = list(OcupacaoDiaria.objects.values_list("minutos_reservados"))
+
+        self.assertEqual(arquivar_reservas(tamanho_lote=2, max_lotes=1), 2)
+        self.assertEqual(arquivar_reservas(tamanho_lote=2), 1)
+        self.assertEqual(arquivar_reservas(tamanho_lote=2), 0)
+
+        self.assertEqual(
+            set(ReservaArquivada.objects.values_list("id", flat=True)),
+            {reserva.id for reserva in self.antigas},
+        )
+        self.assertEqual(
+            set(Reserva.objects.values_list("id", flat=True)),
+            {self.antiga_confirmada.id, self.recente.id},
+        )
+        # Para a sincronização as arquivadas saem; as agregações não mudam.
+        self.assertEqual(
+            set(
+                ReservaAlteracao.objects.filter(
+                    id__gt=alteracoes, operacao="excluido"
+                ).values_list("reserva_id", flat=True)
+            ),
+            {reserva.id for reserva in self.antigas},
+        )
+        self.assertEqual(
+            list(OcupacaoDiaria.objects.values_list("minutos_reservados")), ocupacao
+        )
+
+    def test_recalcular_mantem_arquivadas(self):
+        ocupacao = sorted(
+            OcupacaoDiaria.objects.values_list("data", "minutos_reservados", "reservas")
+        )
+        arquivar_reservas()
+        call_command("recalcular_ocupacao", stdout=StringIO())
+        self.assertEqual(
+            sorted(
+                OcupacaoDiaria.objects.values_list(
+                    "data", "minutos_reservados", "reservas"
+                )
+            ),
+            ocupacao,
+        )
+
+    def test_invalida_agenda_do_prestador(self):
+        versao = versao_agenda(self.prestador.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            arquivar_reservas()
+        self.assertNotEqual(versao_agenda(self.prestador.id), versao)
+
+    def test_comando(self):
+        saida = StringIO()
+        call_command("arquivar_reservas", "--pausa", "0", stdout=saida)
+        self.assertIn("3 reserva(s) arquivada(s)", saida.getvalue())
+
+    def test_listagem_consulta_arquivo_apenas_com_historico(self):
+        arquivar_reservas()
+
+        response = self.client.get("/api/reservas/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+
+        response = self.client.get("/api/reservas/", {"historico": "true"})
+        self.assertEqual(len(response.data), 5)
+
+        response = self.client.get(
+            "/api/reservas/", {"historico": "true", "fields": "id,status"}
+        )
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual(set(response.data[0]), {"id", "status"})
+
+        inicio = (self.antigas[0].data_hora + timedelta(days=100)).date()
+        response = self.client.get(
+            "/api/reservas/", {"inicio": inicio.isoformat(), "fim": inicio.isoformat()}
+        )
+        self.assertEqual(response.data, [])
+
+        response = self.client.get(
+            "/api/reservas/",
+            {"inicio": self.antigas[0].data_hora.date().isoformat()},
+        )
+        self.assertEqual(
+            {item["id"] for item in response.data},
+            {self.antigas[0].id, self.recente.id},
+        )
+
+    def test_detalhe_recorre_ao_arquivo(self):
+        detalhe = self.client.get(f"/api/reservas/{self.antigas[0].id}/").data
+        arquivar_reservas()
+
+        response = self.client.get(f"/api/reservas/{self.antigas[0].id}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, detalhe)
+
+        response = self.client.get("/api/reservas/999999/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_periodo_invalido(self):
+        response = self.client.get("/api/reservas/", {"inicio": "ontem"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
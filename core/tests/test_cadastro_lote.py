@@ -0,0 +1,116 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.cadastro_lote import cadastrar_clientes, criar_pool
+from core.models import Cliente
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class CadastroLoteTest(APITestCase):
+    def setUp(self):
+        User.objects.create_user("lote_existente", password="x")
+
+    def linhas(self, quantidade, prefixo="lote"):
+        return [
+            {
+                "username": f"{prefixo}{i}",
+                "password": f"senha{i}",
+                "email": f"{prefixo}{i}@example.com",
+                "telefone": "1199999",
+            }
+            for i in range(quantidade)
+        ]
+
+    def test_cadastra_em_lotes_e_reporta_erros(self):
+        linhas = self.linhas(5)
+        linhas[1]["email"] = "invalido"
+        linhas[3]["username"] = "lote_existente"
+        linhas.append({"username": "lote0", "password": "x"})
+        linhas.append({"username": "sem_senha"})
+
+        resultado = cadastrar_clientes(linhas, tamanho_lote=2)
+
+        self.assertEqual(resultado["criados"], 3)
+        self.assertEqual([erro["linha"] for erro in resultado["erros"]], [2, 4, 6, 7])
+        self.assertIn("email", resultado["erros"][0]["erros"])
+        self.assertEqual(resultado["erros"][1]["erros"], {"username": "Já cadastrado."})
+        usuario = User.objects.get(username="lote4")
+        self.assertTrue(usuario.check_password("senha4"))
+        self.assertEqual(Cliente.objects.get(usuario=usuario).telefone, "1199999")
+
+    def test_tipos_invalidos(self):
+        linhas = [
+            {"username": 123, "password": "x"},
+            {"username": "tipo_ok", "password": 456},
+            {"username": "tipo_email", "password": "x", "email": ["a@a.com"]},
+        ]
+        resultado = cadastrar_clientes(linhas)
+        self.assertEqual(resultado["criados"], 0)
+        self.assertEqual(
+            [erro["erros"] for erro in resultado["erros"]],
+            [
+                {"username": "Deve ser texto."},
+                {"password": "Deve ser texto."},
+                {"email": "Deve ser texto."},
+            ],
+        )
+
+    def test_pool_de_processos(self):
+        with criar_pool(2) as pool:
+            resultado = cadastrar_clientes(self.linhas(6), tamanho_lote=2, pool=pool)
+        self.assertEqual(resultado, {"criados": 6, "erros": []})
+        self.assertTrue(User.objects.get(username="lote5").check_password("senha5"))
+
+    def test_api_apenas_admin(self):
+        dados = {"clientes": self.linhas(2, prefixo="api")}
+        response = self.client.post("/api/clientes/lote/", dados, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        admin = User.objects.create_superuser("lote_admin", "a@a.com", "x")
+        self.client.force_authenticate(user=admin)
+        with mock.patch("core.cadastro_lote.ProcessPoolExecutor") as pool:
+            response = self.client.post("/api/clientes/lote/", dados, format="json")
+        pool.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {"criados": 2, "erros": []})
+
+        response = self.client.post(
+            "/api/clientes/lote/",
+            [{"username": 1, "password": "x"}, {"username": "api_int", "password": 2}],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([erro["linha"] for erro in response.data["erros"]], [1, 2])
+
+        with override_settings(RESERVAS_CADASTRO_LOTE_MAXIMO=1):
+            response = self.client.post("/api/clientes/lote/", dados, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_comando(self):
+        with tempfile.TemporaryDirectory() as diretorio:
+            arquivo = Path(diretorio) / "clientes.csv"
+            arquivo.write_text(
+                "username,password,email,telefone,endereco\n"
+                "csv1,senha,csv1@example.com,,Rua A\n"
+                "csv2,,csv2@example.com,,\n"
+            )
+            saida, erros = StringIO(), StringIO()
+            call_command(
+                "importar_clientes",
+                str(arquivo),
+                "--processos",
+                "0",
+                stdout=saida,
+                stderr=erros,
+            )
+        self.assertIn("1 cliente(s) cadastrado(s), 1 erro(s)", saida.getvalue())
+        self.assertIn("Linha 2", erros.getvalue())
+        self.assertEqual(Cliente.objects.get(usuario__username="csv1").endereco, "Rua A")
@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.idempotencia import _chave
+from core.models import Cliente, HorarioTrabalho, Prestador, Reserva, Servico
+
+
+class IdempotenciaAPITest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="idem_cli", password="x")
+        self.cliente = Cliente.objects.create(usuario=self.user)
+        prestador_user = User.objects.create_user(username="idem_prest", password="x")
+        self.prestador = Prestador.objects.create(usuario=prestador_user)
+        self.servico = Servico.objects.create(
+            nome="Corte", descricao="Corte", duracao=timedelta(minutes=30)
+        )
+        # Terça-feira, das 9h às 17h.
+        HorarioTrabalho.objects.create(
+            prestador=self.prestador, dia_semana=1, inicio="09:00", fim="17:00"
+        )
+        self.dados = {
+            "cliente": self.cliente.id,
+            "prestador": self.prestador.id,
+            "servico": self.servico.id,
+            "data_hora": timezone.make_aware(datetime(2030, 1, 8, 15, 0)).isoformat(),
+            "status": "confirmado",
+        }
+        self.client.force_authenticate(user=self.user)
+
+    def reservar(self, chave, dados=None):
+        return self.client.post(
+            "/api/reservas/",
+            dados or self.dados,
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=chave,
+        )
+
+    def test_repeticao_devolve_a_primeira_resposta(self):
+        primeira = self.reservar("abc")
+        self.assertEqual(primeira.status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(0):
+            repetida = self.reservar("abc")
+        self.assertEqual(repetida.status_code, status.HTTP_201_CREATED, repetida.data)
+        self.assertEqual(repetida.data, primeira.data)
+        self.assertEqual(repetida["Idempotent-Replayed"], "true")
+        self.assertEqual(Reserva.objects.count(), 1)
+
+        # Sem a chave, a repetição esbarra no horário já reservado.
+        response = self.client.post("/api/reservas/", self.dados, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_erro_de_validacao_e_repetido(self):
+        fora_do_expediente = timezone.make_aware(datetime(2030, 1, 8, 20, 0))
+        dados = {**self.dados, "data_hora": fora_do_expediente.isoformat()}
+        primeira = self.reservar("invalida", dados)
+        self.assertEqual(primeira.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with self.assertNumQueries(0):
+            repetida = self.reservar("invalida", dados)
+        self.assertEqual(repetida.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(repetida.data, primeira.data)
+        self.assertEqual(repetida["Idempotent-Replayed"], "true")
+
+    def test_chave_com_outro_conteudo(self):
+        self.reservar("abc")
+        response = self.reservar("abc", {**self.dados, "notas": "outra"})
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_cadastro_de_cliente(self):
+        self.client.force_authenticate(user=None)
+        dados = {
+            "usuario": {"username": "idem_novo", "password": "x", "email": "n@x.com"},
+            "telefone": "123",
+        }
+        for _ in range(2):
+            response = self.client.post(
+                "/api/clientes/", dados, format="json", HTTP_IDEMPOTENCY_KEY="novo"
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(User.objects.filter(username="idem_novo").count(), 1)
+
+    def test_duplicata_em_andamento_recebe_409(self):
+        request = mock.Mock(user=self.user, path="/api/reservas/")
+        cache.add(f"{_chave(request, 'abc')}:trava", "x")
+        response = self.reservar("abc")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Reserva.objects.count(), 0)
+
+    def test_original_concluida_antes_da_trava(self):
+        request = mock.Mock(user=self.user, path="/api/reservas/")
+        chave = _chave(request, "abc")
+        salva = {"impressao": None, "status": 201, "dados": {"id": 1}}
+        original = cache.get
+
+        def concluir_original(chave_lida, *args):
+            # A primeira leitura não vê a resposta; ela chega antes da trava.
+            if chave_lida == chave and not hasattr(concluir_original, "lida"):
+                concluir_original.lida = True
+                cache.set(chave, salva)
+                return None
+            return original(chave_lida, *args)
+
+        with mock.patch("core.idempotencia.cache.get", side_effect=concluir_original):
+            with mock.patch("core.idempotencia._impressao", return_value=None):
+                response = self.reservar("abc")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {"id": 1})
+        self.assertEqual(Reserva.objects.count(), 0)
+
+    def test_conflito_passageiro_nao_e_guardado(self):
+        Reserva.objects.create(
+            cliente=self.cliente,
+            prestador=self.prestador,
+            servico=self.servico,
+            data_hora=timezone.make_aware(datetime(2030, 1, 8, 15, 0)),
+            status="confirmado",
+        )
+        primeira = self.reservar("ocupado")
+        self.assertEqual(primeira.status_code, status.HTTP_400_BAD_REQUEST)
+
+        Reserva.objects.all().delete()
+        repetida = self.reservar("ocupado")
+        self.assertEqual(repetida.status_code, status.HTTP_201_CREATED, repetida.data)
+        self.assertNotIn("Idempotent-Replayed", repetida)
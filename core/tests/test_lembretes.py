@@ -0,0 +1,102 @@
+import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.lembretes import (
+    ArquivoBackend,
+    MemoriaBackend,
+    despachar_lembretes,
+    get_backend,
+)
+from core.models import Cliente, Prestador, Reserva, Servico
+
+
+class FalhaBackend:
+    def enviar(self, lembretes):
+        raise ConnectionError("fora do ar")
+
+
+class LembretesTest(TestCase):
+    def setUp(self):
+        usuario = User.objects.create_user(
+            "lembrete_cli", email="cli@example.com", password="x"
+        )
+        self.cliente = Cliente.objects.create(usuario=usuario)
+        self.prestador = Prestador.objects.create(
+            usuario=User.objects.create_user("lembrete_prest", password="x")
+        )
+        self.servico = Servico.objects.create(
+            nome="Corte", descricao="Corte", duracao=timedelta(minutes=30)
+        )
+        agora = timezone.now()
+        self.proximas = [
+            self.reservar(agora + timedelta(hours=horas)) for horas in (1, 2, 3)
+        ]
+        self.reservar(agora + timedelta(hours=4), "cancelado")
+        self.distante = self.reservar(agora + timedelta(days=3))
+        self.reservar(agora - timedelta(hours=1))
+
+    def reservar(self, data_hora, status="confirmado"):
+        return Reserva.objects.create(
+            cliente=self.cliente,
+            prestador=self.prestador,
+            servico=self.servico,
+            data_hora=data_hora,
+            status=status,
+        )
+
+    def test_envia_apenas_a_janela_uma_vez(self):
+        backend = MemoriaBackend()
+        self.assertEqual(despachar_lembretes(backend, lote=2, workers=2), 3)
+        self.assertEqual(
+            sorted(item["reserva"] for item in backend.caixa),
+            [reserva.id for reserva in self.proximas],
+        )
+        self.assertEqual(backend.caixa[0]["email"], "cli@example.com")
+        self.assertEqual(backend.caixa[0]["servico"], "Corte")
+
+        self.assertEqual(despachar_lembretes(backend), 0)
+        self.assertEqual(len(backend.caixa), 3)
+
+    def test_remarcacao_gera_novo_lembrete(self):
+        backend = MemoriaBackend()
+        despachar_lembretes(backend)
+        reserva = self.proximas[0]
+        reserva.data_hora += timedelta(minutes=30)
+        reserva.save()
+        self.assertEqual(despachar_lembretes(backend), 1)
+
+    def test_falha_devolve_para_o_proximo_ciclo(self):
+        with self.assertLogs("core.lembretes", level="ERROR"):
+            self.assertEqual(despachar_lembretes(FalhaBackend()), 0)
+        self.assertFalse(
+            Reserva.objects.filter(lembrete_enviado_em__isnull=False).exists()
+        )
+        self.assertEqual(despachar_lembretes(MemoriaBackend()), 3)
+
+    def test_backend_arquivo(self):
+        with tempfile.TemporaryDirectory() as diretorio:
+            caminho = Path(diretorio) / "lembretes.jsonl"
+            despachar_lembretes(ArquivoBackend(caminho))
+            linhas = [json.loads(linha) for linha in caminho.read_text().splitlines()]
+        self.assertEqual(len(linhas), 3)
+        self.assertEqual(linhas[0]["prestador"], "lembrete_prest")
+
+    @override_settings(RESERVAS_LEMBRETES_BACKEND="core.lembretes.MemoriaBackend")
+    def test_comando(self):
+        get_backend.cache_clear()
+        self.addCleanup(get_backend.cache_clear)
+        saida = StringIO()
+        antecedencia = str(4 * 24 * 60)
+        call_command(
+            "enviar_lembretes", "--uma-vez", "--antecedencia", antecedencia, stdout=saida
+        )
+        self.assertIn("4 lembrete(s) enviado(s)", saida.getvalue())
+        self.assertEqual(len(get_backend().caixa), 4)
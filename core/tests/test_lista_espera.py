@@ -0,0 +1,202 @@
+from datetime import datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.bloqueios import bloquear_horario, liberar_bloqueio
+from core.lista_espera import atender_lista_espera
+from core.models import Cliente, ListaEspera, Prestador, Reserva, Servico, Tarefa
+from core.tasks import processar_pendentes
+
+
+class ListaEsperaTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="espera_cli", password="x")
+        self.cliente = Cliente.objects.create(usuario=self.user)
+        outros = [
+            Cliente.objects.create(
+                usuario=User.objects.create_user(username=f"espera_{i}", password="x")
+            )
+            for i in range(2)
+        ]
+        self.outro, self.terceiro = outros
+        prestador_user = User.objects.create_user(username="espera_prest", password="x")
+        self.prestador = Prestador.objects.create(usuario=prestador_user)
+        self.servico = Servico.objects.create(
+            nome="Corte", descricao="Corte", duracao=timedelta(minutes=30)
+        )
+        self.prestador.servicos.add(self.servico)
+        self.data_hora = timezone.make_aware(datetime(2030, 1, 8, 15, 0))
+        self.reserva = Reserva.objects.create(
+            cliente=self.outro,
+            prestador=self.prestador,
+            servico=self.servico,
+            data_hora=self.data_hora,
+            status="confirmado",
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def aguardar(self, cliente, inicio_horas, fim_horas, prioridade=0):
+        return ListaEspera.objects.create(
+            cliente=cliente,
+            prestador=self.prestador,
+            servico=self.servico,
+            inicio=self.data_hora + timedelta(hours=inicio_horas),
+            fim=self.data_hora + timedelta(hours=fim_horas),
+            prioridade=prioridade,
+        )
+
+    def cancelar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reserva.status = "cancelado"
+            self.reserva.save()
+        processar_pendentes()
+
+    def test_cancelamento_reserva_para_a_entrada_prioritaria(self):
+        fora_da_janela = self.aguardar(self.terceiro, 1, 3, prioridade=5)
+        comum = self.aguardar(self.cliente, -1, 1)
+        prioritaria = self.aguardar(self.terceiro, -2, 0, prioridade=1)
+
+        self.cancelar()
+
+        prioritaria.refresh_from_db()
+        self.assertEqual(prioritaria.status, "atendida")
+        nova = Reserva.objects.get(pk=prioritaria.reserva_id)
+        self.assertEqual(
+            (nova.cliente_id, nova.data_hora, nova.status),
+            (self.terceiro.id, self.data_hora, "confirmado"),
+        )
+        comum.refresh_from_db()
+        fora_da_janela.refresh_from_db()
+        self.assertEqual(comum.status, "aguardando")
+        self.assertEqual(fora_da_janela.status, "aguardando")
+
+    def test_horario_ja_ocupado_nao_atende(self):
+        entrada = self.aguardar(self.cliente, -1, 1)
+        self.reserva.status = "cancelado"
+        self.reserva.save()
+        Reserva.objects.create(
+            cliente=self.terceiro,
+            prestador=self.prestador,
+            servico=self.servico,
+            data_hora=self.data_hora,
+            status="confirmado",
+        )
+
+        self.assertIsNone(atender_lista_espera(self.prestador.id, self.data_hora))
+        entrada.refresh_from_db()
+        self.assertEqual(entrada.status, "aguardando")
+
+    def test_horario_bloqueado_reagenda_atendimento(self):
+        entrada = self.aguardar(self.cliente, -1, 1)
+        token = bloquear_horario(self.prestador.id, self.data_hora)
+        self.addCleanup(liberar_bloqueio, token)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reserva.status = "cancelado"
+            self.reserva.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            processar_pendentes()
+        entrada.refresh_from_db()
+        self.assertEqual(entrada.status, "aguardando")
+        reagendada = Tarefa.objects.get(
+            nome="atender_lista_espera", status="pendente"
+        )
+        self.assertGreater(reagendada.executar_em, timezone.now())
+
+        liberar_bloqueio(token)
+        Tarefa.objects.filter(pk=reagendada.pk).update(executar_em=timezone.now())
+        with self.captureOnCommitCallbacks(execute=True):
+            processar_pendentes()
+        entrada.refresh_from_db()
+        self.assertEqual(entrada.status, "atendida")
+
+    def test_entrada_expira_ao_fim_da_janela(self):
+        agora = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            vencida = ListaEspera.objects.create(
+                cliente=self.cliente,
+                prestador=self.prestador,
+                servico=self.servico,
+                inicio=agora - timedelta(hours=2),
+                fim=agora - timedelta(hours=1),
+            )
+            vigente = self.aguardar(self.cliente, -1, 1)
+        processar_pendentes()
+        vencida.refresh_from_db()
+        vigente.refresh_from_db()
+        self.assertEqual(vencida.status, "expirada")
+        self.assertEqual(vigente.status, "aguardando")
+
+    def test_alterar_o_fim_reagenda_a_expiracao(self):
+        agora = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            entrada = self.aguardar(self.cliente, -1, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            entrada.prioridade = 5
+            entrada.save()
+        self.assertEqual(Tarefa.objects.filter(nome="expirar_lista_espera").count(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            entrada.fim = agora - timedelta(minutes=1)
+            entrada.save()
+        self.assertEqual(Tarefa.objects.filter(nome="expirar_lista_espera").count(), 2)
+        processar_pendentes()
+        entrada.refresh_from_db()
+        self.assertEqual(entrada.status, "expirada")
+
+    def test_prioridade_definida_pela_equipe(self):
+        entrada = self.aguardar(self.cliente, -1, 1)
+        url = f"/api/lista-espera/{entrada.id}/"
+        response = self.client.patch(url, {"prioridade": 10}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        equipe = User.objects.create_user(
+            username="espera_staff", password="x", is_staff=True
+        )
+        self.client.force_authenticate(user=equipe)
+        response = self.client.patch(url, {"prioridade": 10}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        entrada.refresh_from_db()
+        self.assertEqual(entrada.prioridade, 10)
+
+    def test_api(self):
+        dados = {
+            "prestador": self.prestador.id,
+            "servico": self.servico.id,
+            "inicio": self.data_hora.isoformat(),
+            "fim": (self.data_hora + timedelta(hours=2)).isoformat(),
+            "prioridade": 10,
+        }
+        response = self.client.post("/api/lista-espera/", dados, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["prioridade"], 0)
+        entrada = ListaEspera.objects.get(pk=response.data["id"])
+        self.assertEqual(entrada.cliente, self.cliente)
+
+        response = self.client.get("/api/lista-espera/")
+        self.assertEqual([item["id"] for item in response.data], [entrada.id])
+
+        response = self.client.delete(f"/api/lista-espera/{entrada.id}/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        entrada.refresh_from_db()
+        self.assertEqual(entrada.status, "cancelada")
+
+        outro_servico = Servico.objects.create(
+            nome="Barba", descricao="Barba", duracao=timedelta(minutes=30)
+        )
+        response = self.client.post(
+            "/api/lista-espera/",
+            {**dados, "servico": outro_servico.id},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Usuários sem cadastro de cliente, como a equipe, não entram na lista.
+        equipe = User.objects.create_user(
+            username="espera_staff", password="x", is_staff=True
+        )
+        self.client.force_authenticate(user=equipe)
+        response = self.client.post("/api/lista-espera/", dados, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,123 @@
+import json
+import tempfile
+from datetime import datetime, timedelta
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.middleware import _perfilando
+from core.models import Cliente, HorarioTrabalho, Prestador, Servico
+
+
+class PerfilamentoTest(APITestCase):
+    def setUp(self):
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        self.diretorio = Path(diretorio.name)
+        configuracao = override_settings(RESERVAS_PERFIS_DIR=self.diretorio)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+        self.staff = User.objects.create_user(
+            "perfil_staff", password="x", is_staff=True
+        )
+        self.cliente = Cliente.objects.create(usuario=self.staff)
+        self.prestador = Prestador.objects.create(
+            usuario=User.objects.create_user("perfil_prest", password="x")
+        )
+        self.servico = Servico.objects.create(
+            nome="Corte", descricao="Corte", duracao=timedelta(minutes=30)
+        )
+        # Terça-feira, das 9h às 17h.
+        HorarioTrabalho.objects.create(
+            prestador=self.prestador, dia_semana=1, inicio="09:00", fim="17:00"
+        )
+
+    def autorizacao(self, usuario):
+        return f"Bearer {RefreshToken.for_user(usuario).access_token}"
+
+    def reservar(self, **cabecalhos):
+        dados = {
+            "cliente": self.cliente.id,
+            "prestador": self.prestador.id,
+            "servico": self.servico.id,
+            "data_hora": timezone.make_aware(datetime(2030, 1, 8, 15, 0)).isoformat(),
+            "status": "confirmado",
+        }
+        return self.client.post("/api/reservas/", dados, format="json", **cabecalhos)
+
+    def test_staff_pede_perfil(self):
+        response = self.reservar(
+            HTTP_AUTHORIZATION=self.autorizacao(self.staff), HTTP_X_PERFILAR="1"
+        )
+        self.assertEqual(response.status_code, 201)
+        nome = response["X-Perfil"]
+        self.assertTrue((self.diretorio / f"{nome}.prof").exists())
+
+        dados = json.loads((self.diretorio / f"{nome}.json").read_text())
+        self.assertEqual((dados["metodo"], dados["status"]), ("POST", 201))
+        self.assertEqual(dados["total_sql"], len(dados["consultas"]))
+        origens = [quadro for c in dados["consultas"] for quadro in c["origem"]]
+        self.assertTrue(any("ReservaSerializer.validate" in o for o in origens))
+        self.assertTrue(any("Reserva.save" in o for o in origens))
+
+        saida = StringIO()
+        call_command("perfis", stdout=saida)
+        self.assertIn(nome, saida.getvalue())
+        saida = StringIO()
+        call_command("perfis", nome, stdout=saida)
+        self.assertIn("ReservaSerializer.validate", saida.getvalue())
+        self.assertIn("Funções:", saida.getvalue())
+
+    def test_cabecalho_ignorado_para_nao_staff(self):
+        comum = User.objects.create_user("perfil_comum", password="x")
+        response = self.client.get(
+            "/api/servicos/",
+            HTTP_AUTHORIZATION=self.autorizacao(comum),
+            HTTP_X_PERFILAR="1",
+        )
+        self.assertNotIn("X-Perfil", response)
+        response = self.client.get("/api/servicos/", HTTP_X_PERFILAR="1")
+        self.assertNotIn("X-Perfil", response)
+        self.assertEqual(list(self.diretorio.iterdir()), [])
+
+    @override_settings(RESERVAS_PERFIL_AMOSTRAGEM=1.0)
+    def test_amostragem(self):
+        response = self.client.get("/api/servicos/")
+        # O perfil é gravado, mas o nome só é revelado a staff.
+        self.assertNotIn("X-Perfil", response)
+        self.assertEqual(len(list(self.diretorio.glob("*.json"))), 1)
+
+        response = self.client.get(
+            "/api/servicos/", HTTP_AUTHORIZATION=self.autorizacao(self.staff)
+        )
+        self.assertIn("X-Perfil", response)
+
+    def test_ignora_quando_outro_perfil_esta_ativo(self):
+        self.client.force_login(self.staff)
+        with _perfilando:
+            response = self.client.get("/api/servicos/", HTTP_X_PERFILAR="1")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Perfil", response)
+        self.assertEqual(list(self.diretorio.iterdir()), [])
+
+    @override_settings(RESERVAS_PERFIL_AMOSTRAGEM=1.0, RESERVAS_PERFIS_MAXIMO=2)
+    def test_mantem_apenas_os_mais_recentes(self):
+        self.client.force_login(self.staff)
+        nomes = [self.client.get("/api/servicos/")["X-Perfil"] for _ in range(3)]
+        for sufixo in ("json", "prof"):
+            self.assertEqual(
+                sorted(arquivo.stem for arquivo in self.diretorio.glob(f"*.{sufixo}")),
+                nomes[1:],
+            )
+
+    def test_staff_logado_na_sessao(self):
+        self.client.force_login(self.staff)
+        response = self.client.get("/api/servicos/", HTTP_X_PERFILAR="1")
+        self.assertIn("X-Perfil", response)
@@ -0,0 +1,168 @@
+import asyncio
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.checks import run_checks
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Cliente, EventoDisponibilidade, Prestador, Reserva, Servico
+from core.realtime import (
+    DatabaseBroker,
+    EventosASGIMiddleware,
+    MemoryBroker,
+    get_broker,
+)
+
+
+class MemoryBrokerTest(SimpleTestCase):
+    def test_publicacao_de_outra_thread(self):
+        broker = MemoryBroker()
+
+        async def cenario():
+            fila = broker.inscrever("1:2024-03-15")
+            thread = threading.Thread(
+                target=broker.publicar, args=("1:2024-03-15", {"tipo": "teste"})
+            )
+            thread.start()
+            thread.join()
+            evento = await asyncio.wait_for(fila.get(), timeout=1)
+            broker.cancelar("1:2024-03-15", fila)
+            return evento
+
+        self.assertEqual(asyncio.run(cenario()), {"tipo": "teste"})
+        self.assertEqual(broker.total_inscritos("1:2024-03-15"), 0)
+
+    @override_settings(RESERVAS_REALTIME_BROKER="core.realtime.MemoryBroker")
+    def test_asgi_transmite_eventos(self):
+        get_broker.cache_clear()
+        self.addCleanup(get_broker.cache_clear)
+
+        async def django_app(scope, receive, send):
+            raise AssertionError("A rota de eventos não deve chegar ao Django.")
+
+        app = EventosASGIMiddleware(django_app)
+        canal = "7:2024-03-15"
+        enviados = []
+        desconectar = asyncio.Event()
+
+        async def receive():
+            await desconectar.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(mensagem):
+            enviados.append(mensagem)
+            if len(enviados) == 2:
+                get_broker().publicar(canal, {"tipo": "horario_ocupado"})
+            elif len(enviados) == 3:
+                desconectar.set()
+
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/api/eventos/prestadores/7/2024-03-15/",
+        }
+        asyncio.run(asyncio.wait_for(app(scope, receive, send), timeout=2))
+
+        self.assertEqual(enviados[0]["status"], 200)
+        self.assertIn(b"event: horario_ocupado\n", enviados[2]["body"])
+        self.assertEqual(get_broker().total_inscritos(canal), 0)
+
+
+class DatabaseBrokerTest(TestCase):
+    def test_entrega_eventos_gravados_por_outro_processo(self):
+        broker = DatabaseBroker()
+        EventoDisponibilidade.objects.create(canal="1:2024-03-15", evento={"n": 0})
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+
+        async def inscrever():
+            return broker.inscrever("1:2024-03-15")
+
+        with mock.patch("core.realtime.threading.Thread"):
+            fila = loop.run_until_complete(inscrever())
+        # Outro processo publica; a consulta desta instância repassa o evento.
+        DatabaseBroker().publicar("1:2024-03-15", {"n": 1})
+        DatabaseBroker().publicar("2:2024-03-15", {"n": 2})
+        broker.consultar()
+
+        evento = loop.run_until_complete(asyncio.wait_for(fila.get(), timeout=1))
+        self.assertEqual(evento, {"n": 1})
+        self.assertTrue(fila.empty())
+
+        EventoDisponibilidade.objects.update(
+            criado_em=timezone.now() - timedelta(hours=1)
+        )
+        broker.consultar()
+        self.assertFalse(EventoDisponibilidade.objects.exists())
+
+    def test_aviso_para_memory_broker_em_producao(self):
+        with self.settings(
+            DEBUG=False, RESERVAS_REALTIME_BROKER="core.realtime.MemoryBroker"
+        ):
+            ids = [aviso.id for aviso in run_checks()]
+        self.assertIn("core.W001", ids)
+        with self.settings(DEBUG=False):
+            ids = [aviso.id for aviso in run_checks()]
+        self.assertNotIn("core.W001", ids)
+
+
+class EventosReservaTest(TestCase):
+    def setUp(self):
+        cliente_user = User.objects.create_user(username="rt_cliente", password="x")
+        self.cliente = Cliente.objects.create(usuario=cliente_user)
+        prestador_user = User.objects.create_user(username="rt_prest", password="x")
+        self.prestador = Prestador.objects.create(usuario=prestador_user)
+        self.servico = Servico.objects.create(
+            nome="Serviço", descricao="Descrição", duracao=timedelta(minutes=30)
+        )
+        self.data_hora = timezone.now() + timedelta(days=1)
+
+    @mock.patch("core.signals.publicar_evento")
+    def test_criacao_e_cancelamento_publicam_eventos(self, publicar_evento):
+        with self.captureOnCommitCallbacks(execute=True):
+            reserva = Reserva.objects.create(
+                cliente=self.cliente,
+                prestador=self.prestador,
+                servico=self.servico,
+                data_hora=self.data_hora,
+                status="confirmado",
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            reserva.status = "cancelado"
+            reserva.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            reserva.delete()
+
+        self.assertEqual(
+            publicar_evento.call_args_list,
+            [
+                mock.call("horario_ocupado", self.prestador.id, self.data_hora),
+                mock.call("horario_liberado", self.prestador.id, self.data_hora),
+            ],
+        )
+
+    @mock.patch("core.signals.publicar_evento")
+    def test_remarcacao_libera_horario_anterior(self, publicar_evento):
+        reserva = Reserva.objects.create(
+            cliente=self.cliente,
+            prestador=self.prestador,
+            servico=self.servico,
+            data_hora=self.data_hora,
+            status="confirmado",
+        )
+        nova_data_hora = self.data_hora + timedelta(hours=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            reserva = Reserva.objects.get(pk=reserva.pk)
+            reserva.data_hora = nova_data_hora
+            reserva.save()
+
+        self.assertEqual(
+            publicar_evento.call_args_list,
+            [
+                mock.call("horario_liberado", self.prestador.id, self.data_hora),
+                mock.call("horario_ocupado", self.prestador.id, nova_data_hora),
+            ],
+        )
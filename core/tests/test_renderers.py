@@ -0,0 +1,82 @@
+import gzip
+import io
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock, skipIf
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core import renderers
+from core.middleware import CompressaoMiddleware, brotli, codificacoes_aceitas
+
+DADOS = {
+    "rank_avaliacao": Decimal("4.50"),
+    "duracao": timedelta(minutes=30),
+    "data_hora": datetime(2024, 3, 15, 10, 0, tzinfo=dt_timezone.utc),
+    "nome": "Serviço",
+}
+ESPERADO = {
+    "rank_avaliacao": "4.50",
+    "duracao": "00:30:00",
+    "data_hora": "2024-03-15T10:00:00Z",
+    "nome": "Serviço",
+}
+
+
+class RapidoJSONRendererTest(SimpleTestCase):
+    def test_tipos_nativos(self):
+        corpo = renderers.RapidoJSONRenderer().render(DADOS)
+        self.assertEqual(json.loads(corpo), ESPERADO)
+
+    def test_tipos_nativos_sem_orjson(self):
+        with mock.patch.object(renderers, "orjson", None):
+            corpo = renderers.RapidoJSONRenderer().render(DADOS)
+        self.assertEqual(json.loads(corpo), ESPERADO)
+
+    def test_parser(self):
+        parser = renderers.RapidoJSONParser()
+        for orjson in (renderers.orjson, None):
+            with mock.patch.object(renderers, "orjson", orjson):
+                dados = parser.parse(io.BytesIO('{"nome": "Serviço"}'.encode()))
+            self.assertEqual(dados, {"nome": "Serviço"})
+
+
+@override_settings(RESERVAS_COMPRESSAO_MINIMO=100)
+class CompressaoMiddlewareTest(SimpleTestCase):
+    conteudo = b'{"nome": "Corte de cabelo"}' * 50
+
+    def processar(self, accept_encoding, conteudo=None):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept_encoding)
+        response = HttpResponse(conteudo or self.conteudo)
+        response["ETag"] = '"abc"'
+        return CompressaoMiddleware(lambda r: response)(request)
+
+    def test_codificacoes_aceitas(self):
+        self.assertEqual(
+            codificacoes_aceitas("gzip;q=0.5, br, identity;q=0"),
+            {"gzip": 0.5, "br": 1.0, "identity": 0.0},
+        )
+
+    def test_gzip(self):
+        response = self.processar("gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), self.conteudo)
+        self.assertEqual(response["ETag"], 'W/"abc"')
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    @skipIf(brotli is None, "brotli não instalado")
+    def test_brotli_preferido(self):
+        response = self.processar("gzip, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(response.content), self.conteudo)
+
+    def test_abaixo_do_minimo(self):
+        response = self.processar("gzip", conteudo=b"{}")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_sem_accept_encoding(self):
+        response = self.processar("")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response.content, self.conteudo)
@@ -0,0 +1,46 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from sistema_reservas import openapi
+
+
+class SchemaOpenAPITest(TestCase):
+    def setUp(self):
+        openapi.obter_schema.cache_clear()
+        openapi._conteudo_schema.cache_clear()
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        self.diretorio = Path(diretorio.name)
+
+    def test_schema_memoizado(self):
+        with override_settings(OPENAPI_SCHEMA_DIR=self.diretorio), mock.patch.object(
+            openapi.OpenAPISchemaGenerator,
+            "get_schema",
+            wraps=openapi.OpenAPISchemaGenerator(openapi.info).get_schema,
+        ) as get_schema:
+            response = self.client.get("/swagger.json")
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("max-age=86400", response["Cache-Control"])
+            self.client.get("/swagger.json")
+            self.client.get("/swagger/")
+            self.assertEqual(get_schema.call_count, 1)
+
+    def test_etag(self):
+        with override_settings(OPENAPI_SCHEMA_DIR=self.diretorio):
+            etag = self.client.get("/swagger.yaml")["ETag"]
+            response = self.client.get("/swagger.yaml", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_arquivo_gerado_no_build(self):
+        call_command("gerar_schema", destino=self.diretorio, stdout=StringIO())
+        arquivo = self.diretorio / "swagger.json"
+        arquivo.write_bytes(b'{"swagger": "2.0", "gerado": true}')
+        with override_settings(OPENAPI_SCHEMA_DIR=self.diretorio):
+            response = self.client.get("/swagger.json")
+        self.assertEqual(response.content, b'{"swagger": "2.0", "gerado": true}')
+        self.assertTrue((self.diretorio / "swagger.yaml").exists())
@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from core.management.commands.relatorio_importacao import (
+    agrupar_por_pacote,
+    analisar_importtime,
+)
+
+SAIDA_IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   django.utils.version
+import time:       300 |        420 | django
+import time:      1000 |       1000 |     drf_yasg.openapi
+import time:       500 |       1500 |   drf_yasg
+"""
+
+
+class RelatorioImportacaoTest(SimpleTestCase):
+    def test_analisar_importtime(self):
+        modulos = analisar_importtime(SAIDA_IMPORTTIME)
+        self.assertEqual(modulos[0], ("django.utils.version", 120, 120))
+        self.assertEqual(len(modulos), 4)
+        self.assertEqual(
+            agrupar_por_pacote(modulos), [("drf_yasg", 1500, 2), ("django", 420, 2)]
+        )
+
+
+class PerfilApiTest(SimpleTestCase):
+    def test_perfil_api_nao_carrega_docs_nem_sessoes(self):
+        script = (
+            "import sys\n"
+            "from django.core.wsgi import get_wsgi_application\n"
+            "get_wsgi_application()\n"
+            "from django.urls import get_resolver\n"
+            "get_resolver().url_patterns\n"
+            "from django.conf import settings\n"
+            "print('drf_yasg' in sys.modules, "
+            "'django.contrib.sessions' in settings.INSTALLED_APPS)\n"
+        )
+        ambiente = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE="sistema_reservas.settings",
+            RESERVAS_PERFIL="api",
+        )
+        ambiente.pop("RESERVAS_DOCS", None)
+        ambiente.pop("RESERVAS_ADMIN", None)
+        processo = subprocess.run(
+            [sys.executable, "-c", script],
+            env=ambiente,
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(processo.returncode, 0, processo.stderr)
+        self.assertEqual(processo.stdout.strip(), "False False")
@@ -0,0 +1,114 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import Tarefa
+from core.tasks import enfileirar, limpar_finalizadas, processar_pendentes, tarefa
+
+execucoes = []
+
+
+@tarefa(nome="teste_registrar", max_tentativas=2)
+def registrar(valor):
+    execucoes.append(valor)
+
+
+@tarefa(nome="teste_falhar", max_tentativas=2)
+def falhar():
+    raise RuntimeError("falha")
+
+
+class TarefaTest(TestCase):
+    def setUp(self):
+        execucoes.clear()
+
+    def test_enfileirar_apos_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            enfileirar("teste_registrar", valor=1)
+            self.assertEqual(Tarefa.objects.count(), 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(processar_pendentes(), 1)
+        self.assertEqual(execucoes, [1])
+        self.assertEqual(Tarefa.objects.get().status, "concluida")
+
+    def test_chave_idempotente(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enfileirar("teste_registrar", chave="unica", valor=1)
+            enfileirar("teste_registrar", chave="unica", valor=1)
+        self.assertEqual(Tarefa.objects.count(), 1)
+
+    def test_novas_tentativas_ate_falhar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enfileirar("teste_falhar")
+        with self.assertLogs("core.tasks", level="ERROR"):
+            processar_pendentes()
+        tarefa = Tarefa.objects.get()
+        self.assertEqual(tarefa.status, "pendente")
+        self.assertEqual(tarefa.tentativas, 1)
+        self.assertGreater(tarefa.executar_em, timezone.now())
+        self.assertIn("RuntimeError", tarefa.erro)
+
+        Tarefa.objects.update(executar_em=timezone.now() - timedelta(seconds=1))
+        with self.assertLogs("core.tasks", level="ERROR"):
+            processar_pendentes()
+        tarefa.refresh_from_db()
+        self.assertEqual(tarefa.status, "falhou")
+        self.assertEqual(tarefa.tentativas, 2)
+
+    def test_enfileirar_tarefa_desconhecida(self):
+        with self.assertRaises(ValueError):
+            enfileirar("inexistente")
+
+    def test_comando_processar_tarefas(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for valor in range(3):
+                enfileirar("teste_registrar", valor=valor)
+        saida = StringIO()
+        call_command("processar_tarefas", "--uma-vez", "--workers=1", stdout=saida)
+        self.assertEqual(sorted(execucoes), [0, 1, 2])
+        self.assertIn("3 tarefa(s) processada(s)", saida.getvalue())
+
+    def test_limpar_finalizadas(self):
+        antiga = timezone.now() - timedelta(days=8)
+        for status in ("concluida", "falhou", "pendente", "concluida"):
+            Tarefa.objects.create(
+                nome="teste_registrar", status=status, executar_em=timezone.now()
+            )
+        Tarefa.objects.exclude(pk=Tarefa.objects.last().pk).update(
+            atualizada_em=antiga
+        )
+        self.assertEqual(limpar_finalizadas(), 2)
+        self.assertEqual(
+            sorted(Tarefa.objects.values_list("status", flat=True)),
+            ["concluida", "pendente"],
+        )
+
+    def test_comando_faz_manutencao_durante_o_laco(self):
+        travada = Tarefa.objects.create(
+            nome="teste_registrar",
+            argumentos={"valor": 1},
+            status="executando",
+            executar_em=timezone.now(),
+        )
+        Tarefa.objects.filter(pk=travada.pk).update(
+            atualizada_em=timezone.now() - timedelta(minutes=11)
+        )
+        comando = "core.management.commands.processar_tarefas"
+        saida = StringIO()
+        with mock.patch(f"{comando}.time.sleep", side_effect=[None, KeyboardInterrupt]):
+            with mock.patch(
+                f"{comando}.recuperar_travadas", return_value=0
+            ) as recuperar:
+                call_command(
+                    "processar_tarefas", "--manutencao=0", "--workers=1", stdout=saida
+                )
+        self.assertEqual(recuperar.call_count, 2)
+
+        call_command("processar_tarefas", "--uma-vez", "--workers=1", stdout=saida)
+        self.assertEqual(execucoes, [1])
+        self.assertIn("1 tarefa(s) travada(s) devolvidas à fila", saida.getvalue())
@@ -0,0 +1,82 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+RATES = {"token": "2/min", "cadastro": "2/min", "reservas": "30/min", "clientes": "10/min"}
+
+
+@override_settings(
+    REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": RATES}
+)
+class TokenBucketThrottleTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("token_obtain_pair")
+        self.dados = {"username": "ninguem", "password": "errada"}
+
+    def test_limite_retorna_retry_after(self):
+        for _ in range(2):
+            response = self.client.post(self.url, self.dados, format="json")
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post(self.url, self.dados, format="json")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(response["Retry-After"]), 0)
+
+    def test_balde_reabastece_com_o_tempo(self):
+        with mock.patch("core.throttling.time.time", return_value=1000.0):
+            for _ in range(3):
+                response = self.client.post(self.url, self.dados, format="json")
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # Uma ficha a cada 30 segundos.
+        with mock.patch("core.throttling.time.time", return_value=1031.0):
+            response = self.client.post(self.url, self.dados, format="json")
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+            response = self.client.post(self.url, self.dados, format="json")
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_estado_do_balde_expira_junto(self):
+        def pedir(instante):
+            with mock.patch("core.throttling.time.time", return_value=instante):
+                return self.client.post(self.url, self.dados, format="json")
+
+        pedir(1000.0)
+        self.assertEqual(pedir(1040.0).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(pedir(1041.0).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(
+            pedir(1042.0).status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        # Passado o timeout da primeira requisição, o consumo não pode expirar
+        # antes do instante inicial e devolver fichas ao balde.
+        self.assertEqual(pedir(1062.0).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(
+            pedir(1062.0).status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+
+    def test_escopos_independentes(self):
+        for _ in range(3):
+            self.client.post(self.url, self.dados, format="json")
+        response = self.client.post(
+            reverse("cadastro_usuario"),
+            {"username": "a", "email": "a@a.com", "password": "x", "password2": "y"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_metricas(self):
+        for _ in range(3):
+            self.client.post(self.url, self.dados, format="json")
+        admin = User.objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.force_authenticate(user=admin)
+        response = self.client.get(reverse("metricas-throttle"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["token"], {"permitidas": 2, "negadas": 1})
+
+    def test_metricas_apenas_staff(self):
+        response = self.client.get(reverse("metricas-throttle"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,101 @@
+"""
+Limitação de taxa por token bucket.
+
+Cada view declara um ``throttle_scope`` e a taxa vem de
+``REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]``: ``"10/min"`` significa um balde
+de 10 fichas reabastecido à razão de 10 por minuto. O estado de cada balde é um
+instante inicial e um contador de consumo no cache, alterado apenas com
+``add``/``incr``/``decr``, operações atômicas em backends compartilhados.
+"""
+
+import time
+
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURACOES = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def _chave_metrica(escopo, resultado):
+    return f"throttle:metricas:{escopo}:{resultado}"
+
+
+def _incrementar(chave, delta=1, timeout=None):
+    cache.add(chave, 0, timeout)
+    try:
+        return cache.incr(chave, delta)
+    except ValueError:
+        # A chave expirou entre o ``add`` e o ``incr``.
+        cache.set(chave, delta, timeout)
+        return delta
+
+
+def metricas_throttle():
+    escopos = api_settings.DEFAULT_THROTTLE_RATES
+    chaves = [
+        _chave_metrica(escopo, resultado)
+        for escopo in escopos
+        for resultado in ("permitidas", "negadas")
+    ]
+    valores = cache.get_many(chaves)
+    return {
+        escopo: {
+            resultado: valores.get(_chave_metrica(escopo, resultado), 0)
+            for resultado in ("permitidas", "negadas")
+        }
+        for escopo in escopos
+    }
+
+
+class TokenBucketThrottle(BaseThrottle):
+    def parse_rate(self, rate):
+        num, period = rate.split("/")
+        return int(num), DURACOES[period[0]]
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f"usuario:{request.user.pk}"
+        else:
+            ident = f"ip:{self.get_ident(request)}"
+        return f"throttle:{self.escopo}:{ident}"
+
+    def allow_request(self, request, view):
+        self.escopo = getattr(view, "throttle_scope", None)
+        taxa = api_settings.DEFAULT_THROTTLE_RATES.get(self.escopo)
+        if not self.escopo or taxa is None:
+            return True
+
+        self.capacidade, periodo = self.parse_rate(taxa)
+        self.reposicao = self.capacidade / periodo
+        chave = self.get_cache_key(request, view)
+        chave_inicio, chave_consumo = f"{chave}:inicio", f"{chave}:consumo"
+        # Sem requisições por um período completo o balde estaria cheio, então
+        # o estado pode expirar.
+        timeout = periodo + 1
+        agora = time.time()
+
+        cache.add(chave_inicio, agora, timeout)
+        inicio = cache.get(chave_inicio, agora)
+        consumo = _incrementar(chave_consumo, timeout=timeout)
+        # ``incr`` não renova o timeout: as duas chaves precisam expirar juntas,
+        # ou o consumo zeraria com o instante inicial ainda valendo.
+        cache.touch(chave_inicio, timeout)
+        cache.touch(chave_consumo, timeout)
+
+        fichas = self.capacidade + (agora - inicio) * self.reposicao - consumo
+        if fichas >= 0:
+            excedente = int(fichas - (self.capacidade - 1))
+            if excedente > 0:
+                # O balde não acumula além da capacidade.
+                _incrementar(chave_consumo, excedente, timeout)
+            _incrementar(_chave_metrica(self.escopo, "permitidas"))
+            return True
+
+        cache.decr(chave_consumo)
+        self.espera = (-fichas) / self.reposicao
+        _incrementar(_chave_metrica(self.escopo, "negadas"))
+        return False
+
+    def wait(self):
+        return getattr(self, "espera", None)
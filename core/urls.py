@@ -1,24 +1,53 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     ReservaViewSet,
     UserRegistrationView,
     PrestadorViewSet,
     ServicoViewSet,
-    ClienteCreateView,
+    ClienteViewSet,
+    AgendaPrestadorView,
+    BloqueioHorarioView,
+    BloqueioHorarioDetailView,
+    TokenView,
+    MetricasThrottleView,
+    AnalyticsViewSet,
+    ListaEsperaViewSet,
 )
 
 router = DefaultRouter()
 router.register(r"prestadores", PrestadorViewSet, basename="prestadores")
 router.register(r"servicos", ServicoViewSet, basename="servicos")
 router.register(r"reservas", ReservaViewSet, basename="reservas")
+router.register(r"analytics", AnalyticsViewSet, basename="analytics")
+router.register(r"lista-espera", ListaEsperaViewSet, basename="lista-espera")
+router.register(r"clientes", ClienteViewSet, basename="clientes")
 
 urlpatterns = [
+    # Nome mantido para o cadastro de clientes, agora servido pelo ClienteViewSet.
+    path(
+        "clientes/",
+        ClienteViewSet.as_view({"get": "list", "post": "create"}),
+        name="cliente-create",
+    ),
     path("", include(router.urls)),
     path("cadastro/", UserRegistrationView.as_view(), name="cadastro_usuario"),
-    path("clientes/", ClienteCreateView.as_view(), name="cliente-create"),
+    path(
+        "prestadores/<int:pk>/agenda.ics",
+        AgendaPrestadorView.as_view(),
+        name="prestador-agenda",
+    ),
+    path("bloqueios/", BloqueioHorarioView.as_view(), name="bloqueio-create"),
+    path(
+        "bloqueios/<str:token>/",
+        BloqueioHorarioDetailView.as_view(),
+        name="bloqueio-detail",
+    ),
+    path(
+        "metricas/throttle/", MetricasThrottleView.as_view(), name="metricas-throttle"
+    ),
     # Adiciona as URLs do JWT aqui
-    path("token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
+    path("token/", TokenView.as_view(), name="token_obtain_pair"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
 ]
@@ -1,41 +1,386 @@
-from rest_framework import viewsets
-from .models import Reserva, Prestador, Servico, Cliente
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import Max
+from django.http import Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from rest_framework import mixins, viewsets
+from rest_framework.decorators import action
+from .models import (
+    STATUS_OCUPANTES,
+    Reserva,
+    Prestador,
+    Servico,
+    Cliente,
+    ReservaAlteracao,
+    ReservaArquivada,
+    HorarioTrabalho,
+    ListaEspera,
+)
 from .serializers import ReservaSerializer
 from rest_framework import generics, status
 from rest_framework.response import Response
 from .serializers import (
+    campos_leitura_rapida,
+    serializar_valores,
+    BloqueioHorarioSerializer,
+    ListaEsperaSerializer,
+    ReservaAutomaticaSerializer,
     UserRegistrationSerializer,
     PrestadorSerializer,
     ServicoSerializer,
     ClienteSerializer,
 )
 from django.contrib.auth import get_user_model
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.views import APIView
+from rest_framework_simplejwt.views import TokenObtainPairView
+from .throttling import metricas_throttle
+from .analytics import contagem_por_servico, ocupacao_semanal
+from .alocacao import reservar_automaticamente
+from .arquivamento import data_corte
+from .cadastro_lote import cadastrar_clientes
+from .idempotencia import idempotente
+from rest_framework import serializers
+from .bloqueios import (
+    bloquear_horario,
+    horarios_bloqueados,
+    liberar_bloqueio,
+    tempo_bloqueio,
+)
+from .agenda import (
+    agenda_em_cache,
+    gerar_agenda_com_cache,
+    token_agenda,
+    token_agenda_valido,
+    versao_agenda,
+)
 
 
-class ClienteCreateView(APIView):
-    def post(self, request, format=None):
-        serializer = ClienteSerializer(data=request.data)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+def _data_parametro(valor):
+    if not valor:
+        return None
+    return datetime.strptime(valor, "%Y-%m-%d").date()
+
+
+class CamposEsparsosMixin:
+    """
+    Suporte a ``?fields=a,b`` em leituras: o serializer devolve só esses campos
+    e a consulta carrega só as colunas correspondentes. Listagens cujos campos
+    são todos simples são montadas direto das linhas de ``values()``, sem
+    instanciar modelos nem percorrer o serializer a cada objeto.
+    """
+
+    def get_campos(self):
+        if not hasattr(self, "_campos"):
+            self._campos = self._ler_campos()
+        return self._campos
+
+    def _ler_campos(self):
+        if self.request is None or self.request.method not in ("GET", "HEAD"):
+            return None
+        parametro = self.request.query_params.get("fields")
+        if not parametro:
+            return None
+        campos = [campo.strip() for campo in parametro.split(",") if campo.strip()]
+        disponiveis = {
+            nome
+            for nome, campo in self.get_serializer_class()().fields.items()
+            if not campo.write_only
+        }
+        invalidos = [campo for campo in campos if campo not in disponiveis]
+        if invalidos:
+            raise serializers.ValidationError(
+                {"fields": f"Campos inválidos: {', '.join(invalidos)}."}
+            )
+        return campos
+
+    def get_serializer(self, *args, **kwargs):
+        campos = self.get_campos()
+        if campos is not None:
+            kwargs.setdefault("campos", campos)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_colunas_obrigatorias(self):
+        """Colunas carregadas mesmo fora de ``?fields=`` (ex.: chaves prefetchadas)."""
+        return []
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        campos = self.get_campos()
+        if campos is not None:
+            serializer = self.get_serializer_class()(campos=campos)
+            fontes = [
+                campo.source.split(".")[0]
+                for campo in serializer.fields.values()
+                if campo.source != "*"
+            ]
+            queryset = queryset.only(*fontes, *self.get_colunas_obrigatorias())
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        campos = campos_leitura_rapida(self.get_serializer())
+        if campos is None:
+            return super().list(request, *args, **kwargs)
 
+        linhas = self.get_linhas([coluna for _, coluna, _ in campos])
+        pagina = self.paginate_queryset(linhas)
+        if pagina is not None:
+            return self.get_paginated_response(
+                list(serializar_valores(campos, pagina))
+            )
+        return Response(list(serializar_valores(campos, linhas)))
 
-class ReservaViewSet(viewsets.ModelViewSet):
+    def get_linhas(self, colunas):
+        return self.filter_queryset(self.get_queryset()).values(*colunas)
+
+
+class LoteIdsMixin:
+    """
+    ``?ids=1,2,3`` na listagem devolve vários objetos com uma única consulta
+    ``IN``, limitada a ``RESERVAS_LOTE_MAXIMO`` ids por requisição.
+    """
+
+    def get_ids(self):
+        parametro = self.request.query_params.get("ids")
+        if self.action != "list" or not parametro:
+            return None
+        try:
+            ids = {int(valor) for valor in parametro.split(",") if valor.strip()}
+        except ValueError:
+            raise serializers.ValidationError(
+                {"ids": "Informe ids numéricos separados por vírgula."}
+            )
+        maximo = getattr(settings, "RESERVAS_LOTE_MAXIMO", 100)
+        if len(ids) > maximo:
+            raise serializers.ValidationError(
+                {"ids": f"Informe no máximo {maximo} ids por requisição."}
+            )
+        return ids
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        ids = self.get_ids()
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
+        return queryset
+
+
+class ReservaViewSet(CamposEsparsosMixin, viewsets.ModelViewSet):
     queryset = Reserva.objects.all()
     serializer_class = ReservaSerializer
 
+    @property
+    def throttle_scope(self):
+        return "reservas" if self.action in ("create", "auto") else None
+
     def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return Reserva.objects.none()
         user = self.request.user
         cliente = Cliente.objects.get(usuario=user)
-        return Reserva.objects.filter(cliente=cliente)
+        return self.expandir_queryset(Reserva.objects.filter(cliente=cliente))
+
+    def get_expandir(self):
+        if not hasattr(self, "_expandir"):
+            parametro = self.request.query_params.get("expand", "")
+            expandir = [nome.strip() for nome in parametro.split(",") if nome.strip()]
+            invalidos = set(expandir) - set(ReservaSerializer.EXPANSIVEIS)
+            if invalidos:
+                raise serializers.ValidationError(
+                    {"expand": f"Relações inválidas: {', '.join(sorted(invalidos))}."}
+                )
+            self._expandir = expandir
+        return self._expandir
+
+    def expandir_queryset(self, queryset):
+        # prefetch em vez de select_related para combinar com o .only() de ?fields=.
+        expandir = self.get_expandir()
+        if "prestador" in expandir:
+            queryset = queryset.prefetch_related("prestador__servicos")
+        if "servico" in expandir:
+            queryset = queryset.prefetch_related("servico")
+        return queryset
+
+    def get_colunas_obrigatorias(self):
+        # Sem a chave estrangeira no .only(), o prefetch a buscaria reserva a reserva.
+        return self.get_expandir()
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request is not None and self.request.method in ("GET", "HEAD"):
+            kwargs.setdefault("expandir", self.get_expandir())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_periodo(self):
+        try:
+            inicio = _data_parametro(self.request.query_params.get("inicio"))
+            fim = _data_parametro(self.request.query_params.get("fim"))
+        except ValueError:
+            raise serializers.ValidationError(
+                {"periodo": "Informe as datas no formato AAAA-MM-DD."}
+            )
+        if inicio is not None:
+            inicio = timezone.make_aware(datetime.combine(inicio, time.min))
+        if fim is not None:
+            fim = timezone.make_aware(datetime.combine(fim + timedelta(days=1), time.min))
+        return inicio, fim
+
+    def filtrar_periodo(self, queryset):
+        inicio, fim = self.get_periodo()
+        if inicio is not None:
+            queryset = queryset.filter(data_hora__gte=inicio)
+        if fim is not None:
+            queryset = queryset.filter(data_hora__lt=fim)
+        return queryset
+
+    def filter_queryset(self, queryset):
+        return self.filtrar_periodo(super().filter_queryset(queryset))
+
+    def precisa_historico(self):
+        """
+        O arquivo só é consultado com ``?historico=true`` ou quando o período
+        pedido começa antes da data de corte do arquivamento.
+        """
+        if self.request.query_params.get("historico", "").lower() in ("1", "true"):
+            return True
+        inicio, _ = self.get_periodo()
+        return inicio is not None and inicio < data_corte()
+
+    def get_arquivadas(self):
+        cliente = Cliente.objects.get(usuario=self.request.user)
+        return self.expandir_queryset(
+            self.filtrar_periodo(ReservaArquivada.objects.filter(cliente=cliente))
+        )
+
+    def get_linhas(self, colunas):
+        linhas = super().get_linhas(colunas)
+        if self.precisa_historico():
+            linhas = linhas.union(self.get_arquivadas().values(*colunas), all=True)
+        return linhas
+
+    def list(self, request, *args, **kwargs):
+        if (
+            self.precisa_historico()
+            and campos_leitura_rapida(self.get_serializer()) is None
+        ):
+            reservas = [
+                *self.filter_queryset(self.get_queryset()),
+                *self.get_arquivadas(),
+            ]
+            return Response(self.get_serializer(reservas, many=True).data)
+        return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            arquivada = get_object_or_404(self.get_arquivadas(), pk=kwargs["pk"])
+            return Response(self.get_serializer(arquivada).data)
+
+    @idempotente
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    @action(detail=False, methods=["post"])
+    @idempotente
+    def auto(self, request):
+        """
+        Reserva o ``servico`` em ``data_hora`` com o prestador livre de menor
+        carga no dia (ou melhor avaliado, com ``criterio=melhor_avaliacao``).
+        """
+        dados = ReservaAutomaticaSerializer(data=request.data)
+        dados.is_valid(raise_exception=True)
+        reserva = reservar_automaticamente(
+            Cliente.objects.get(usuario=request.user), **dados.validated_data
+        )
+        if reserva is None:
+            return Response(
+                {
+                    "data_hora": "Nenhum prestador disponível para este serviço e horário."
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(ReservaSerializer(reserva).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["get"])
+    def sincronizar(self, request):
+        """
+        Feed de alterações para sincronização incremental. Sem ``since`` devolve
+        todas as reservas atuais; com ``since=<cursor>`` apenas as reservas
+        criadas ou alteradas desde o cursor e os ids das excluídas.
+        """
+        cliente = Cliente.objects.get(usuario=request.user)
+        since = request.query_params.get("since")
+        try:
+            limite = min(int(request.query_params.get("limite", 500)), 1000)
+            if limite < 1:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"limite": "Valor inválido."}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if since is None:
+            cursor = (
+                ReservaAlteracao.objects.filter(cliente_id=cliente.id).aggregate(
+                    cursor=Max("id")
+                )["cursor"]
+                or 0
+            )
+            reservas = Reserva.objects.filter(cliente=cliente)
+            return Response(
+                {
+                    "cursor": cursor,
+                    "alteracoes": self.get_serializer(reservas, many=True).data,
+                    "removidas": [],
+                    "mais": False,
+                }
+            )
+
+        try:
+            since = int(since)
+        except ValueError:
+            return Response(
+                {"since": "Cursor inválido."}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        registros = list(
+            ReservaAlteracao.objects.filter(cliente_id=cliente.id, id__gt=since)
+            .order_by("id")
+            .values_list("id", "reserva_id", "operacao")[: limite + 1]
+        )
+        mais = len(registros) > limite
+        registros = registros[:limite]
+
+        # Vale apenas a última operação de cada reserva dentro da janela.
+        ultimas = {}
+        for _, reserva_id, operacao in registros:
+            ultimas[reserva_id] = operacao
+        removidas = [pk for pk, op in ultimas.items() if op == "excluido"]
+        alteradas = Reserva.objects.filter(
+            cliente=cliente,
+            pk__in=[pk for pk, op in ultimas.items() if op != "excluido"],
+        ).order_by("pk")
+
+        return Response(
+            {
+                "cursor": registros[-1][0] if registros else since,
+                "alteracoes": self.get_serializer(alteradas, many=True).data,
+                "removidas": removidas,
+                "mais": mais,
+            }
+        )
 
 
 class UserRegistrationView(generics.CreateAPIView):
     User = get_user_model()
     queryset = User.objects.all()
     serializer_class = UserRegistrationSerializer
+    throttle_scope = "cadastro"
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -52,16 +397,313 @@ class UserRegistrationView(generics.CreateAPIView):
         )
 
 
-class PrestadorViewSet(viewsets.ModelViewSet):
-    queryset = Prestador.objects.all()
+class PrestadorViewSet(LoteIdsMixin, viewsets.ModelViewSet):
+    queryset = Prestador.objects.prefetch_related("servicos")
     serializer_class = PrestadorSerializer
 
+    @action(detail=True, methods=["get"], url_path="agenda-link")
+    def agenda_link(self, request, pk=None):
+        """Link secreto de assinatura da agenda (para o prestador ou a equipe)."""
+        prestador = self.get_object()
+        if not request.user.is_staff and prestador.usuario_id != request.user.pk:
+            raise PermissionDenied
+        caminho = reverse("prestador-agenda", args=[prestador.pk])
+        token = token_agenda(prestador.pk)
+        return Response(
+            {"url": request.build_absolute_uri(f"{caminho}?token={token}")}
+        )
+
+    @action(detail=True, methods=["get"])
+    def disponibilidade(self, request, pk=None):
+        """
+        Horários livres do prestador em ``?data=AAAA-MM-DD``, em intervalos da
+        duração do ``?servico=`` informado (30 minutos por padrão). Horários já
+        reservados ou bloqueados durante o checkout não são listados.
+        """
+        prestador = self.get_object()
+        try:
+            data = datetime.strptime(request.query_params.get("data", ""), "%Y-%m-%d")
+        except ValueError:
+            return Response(
+                {"data": "Informe a data no formato AAAA-MM-DD."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        duracao = timedelta(minutes=30)
+        if "servico" in request.query_params:
+            try:
+                servico_id = int(request.query_params["servico"])
+            except ValueError:
+                return Response(
+                    {"servico": "Informe o id numérico do serviço."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            duracao = get_object_or_404(Servico, pk=servico_id).duracao
+            if duracao <= timedelta(0):
+                return Response(
+                    {"servico": "O serviço não tem duração positiva."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
 
-class ServicoViewSet(viewsets.ModelViewSet):
+        horarios = []
+        for horario in HorarioTrabalho.objects.filter(
+            prestador=prestador, dia_semana=data.weekday()
+        ).order_by("inicio"):
+            inicio = timezone.make_aware(datetime.combine(data, horario.inicio))
+            fim = timezone.make_aware(datetime.combine(data, horario.fim))
+            while inicio + duracao <= fim:
+                horarios.append(inicio)
+                inicio += duracao
+
+        ocupados = set(
+            Reserva.objects.filter(
+                prestador=prestador,
+                data_hora__in=horarios,
+                status__in=STATUS_OCUPANTES,
+            ).values_list("data_hora", flat=True)
+        )
+        bloqueados = horarios_bloqueados(prestador.id, horarios)
+        campo = serializers.DateTimeField()
+        return Response(
+            {
+                "data": data.date().isoformat(),
+                "horarios": [
+                    campo.to_representation(horario)
+                    for horario in horarios
+                    if horario not in ocupados and horario not in bloqueados
+                ],
+            }
+        )
+
+
+class ServicoViewSet(LoteIdsMixin, CamposEsparsosMixin, viewsets.ModelViewSet):
     queryset = Servico.objects.all()
     serializer_class = ServicoSerializer
 
 
-class ClienteViewSet(viewsets.ModelViewSet):
-    queryset = Cliente.objects.all()
+class ListaEsperaViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.UpdateModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    Entradas do cliente autenticado na lista de espera dos prestadores. A
+    equipe vê todas as entradas e pode alterá-las, inclusive a prioridade.
+    """
+
+    serializer_class = ListaEsperaSerializer
+
+    def get_permissions(self):
+        if self.action in ("update", "partial_update"):
+            return [IsAdminUser()]
+        return super().get_permissions()
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return ListaEspera.objects.none()
+        queryset = ListaEspera.objects.order_by("-criada_em")
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(cliente__usuario=self.request.user)
+
+    def perform_create(self, serializer):
+        cliente = Cliente.objects.filter(usuario_id=self.request.user.pk).first()
+        if cliente is None:
+            raise PermissionDenied("Apenas clientes podem entrar na lista de espera.")
+        serializer.save(cliente=cliente)
+
+    def perform_destroy(self, instance):
+        # Mantém o histórico: a entrada apenas deixa de aguardar.
+        if instance.status == "aguardando":
+            instance.status = "cancelada"
+            instance.save(update_fields=["status"])
+
+
+class ClienteViewSet(LoteIdsMixin, viewsets.ModelViewSet):
+    queryset = Cliente.objects.select_related("usuario")
     serializer_class = ClienteSerializer
+
+    @property
+    def throttle_scope(self):
+        return "clientes" if self.action == "create" else None
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return Cliente.objects.none()
+        queryset = super().get_queryset()
+        # Clientes comuns só enxergam o próprio cadastro, inclusive em ?ids=.
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(usuario=self.request.user)
+        return queryset
+
+    def get_permissions(self):
+        # O cadastro é público; a leitura exige login e as alterações, admin.
+        if self.action == "create":
+            return [AllowAny()]
+        if self.action in ("list", "retrieve"):
+            return [IsAuthenticated()]
+        return [IsAdminUser()]
+
+    @idempotente
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    @action(detail=False, methods=["post"])
+    def lote(self, request):
+        """
+        Cadastro em lote (admin): ``{"clientes": [{username, password, email,
+        telefone, endereco}, ...]}`` ou a lista diretamente. Responde com o
+        total criado e os erros por linha. Os hashes são calculados no próprio
+        worker; importações grandes usam o comando ``importar_clientes``.
+        """
+        linhas = request.data
+        if isinstance(linhas, dict):
+            linhas = linhas.get("clientes")
+        if not isinstance(linhas, list) or not all(
+            isinstance(linha, dict) for linha in linhas
+        ):
+            raise serializers.ValidationError(
+                {"clientes": "Informe uma lista de objetos."}
+            )
+        maximo = getattr(settings, "RESERVAS_CADASTRO_LOTE_MAXIMO", 20)
+        if len(linhas) > maximo:
+            raise serializers.ValidationError(
+                {"clientes": f"Informe no máximo {maximo} clientes por requisição."}
+            )
+        resultado = cadastrar_clientes(linhas)
+        codigo = status.HTTP_201_CREATED if resultado["criados"] else status.HTTP_200_OK
+        return Response(resultado, status=codigo)
+
+
+class AgendaPrestadorView(APIView):
+    """
+    Feed iCalendar da agenda do prestador, para assinatura em calendários.
+    Exige o ``?token=`` do link devolvido por ``/prestadores/<pk>/agenda-link/``.
+    """
+
+    def get(self, request, pk, format=None):
+        if not token_agenda_valido(pk, request.query_params.get("token")):
+            raise Http404
+        versao = versao_agenda(pk)
+        guardado = agenda_em_cache(pk, versao)
+        if guardado is None:
+            # O ETag só é conhecido depois de gerado o conteúdo; a próxima
+            # consulta já o recebe do cache.
+            prestador = get_object_or_404(Prestador, pk=pk)
+            response = StreamingHttpResponse(
+                gerar_agenda_com_cache(prestador, versao),
+                content_type="text/calendar; charset=utf-8",
+            )
+        else:
+            etag, conteudo = guardado
+            if etag in request.headers.get("If-None-Match", ""):
+                response = HttpResponseNotModified()
+            else:
+                response = HttpResponse(
+                    conteudo, content_type="text/calendar; charset=utf-8"
+                )
+            response["ETag"] = etag
+        patch_cache_control(response, no_cache=True)
+        return response
+
+
+class BloqueioHorarioView(APIView):
+    """Bloqueia um horário por alguns segundos enquanto o cliente conclui a reserva."""
+
+    def post(self, request, format=None):
+        serializer = BloqueioHorarioSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        prestador_id = serializer.validated_data["prestador"]
+        data_hora = serializer.validated_data["data_hora"]
+
+        token = bloquear_horario(prestador_id, data_hora)
+        if token is None:
+            return Response(
+                {"data_hora": "Este horário já está bloqueado por outro cliente."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        if Reserva.objects.filter(
+            prestador_id=prestador_id,
+            data_hora=data_hora,
+            status__in=STATUS_OCUPANTES,
+        ).exists():
+            liberar_bloqueio(token)
+            return Response(
+                {"data_hora": "Já existe uma reserva neste horário."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        ttl = tempo_bloqueio()
+        return Response(
+            {
+                "token": token,
+                "prestador": prestador_id,
+                "data_hora": serializer.data["data_hora"],
+                "expira_em": serializers.DateTimeField().to_representation(
+                    timezone.now() + timedelta(seconds=ttl)
+                ),
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class BloqueioHorarioDetailView(APIView):
+    def delete(self, request, token, format=None):
+        if not liberar_bloqueio(token):
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class TokenView(TokenObtainPairView):
+    throttle_scope = "token"
+
+
+class MetricasThrottleView(APIView):
+    """Requisições permitidas e negadas pela limitação de taxa, por escopo."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, format=None):
+        return Response(metricas_throttle())
+
+
+class AnalyticsViewSet(viewsets.ViewSet):
+    """
+    Relatórios gerenciais lidos apenas das tabelas de agregação diária.
+    Período em ``?inicio=`` e ``?fim=`` (AAAA-MM-DD); padrão: últimas 4 semanas.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get_periodo(self):
+        try:
+            fim = _data_parametro(self.request.query_params.get("fim"))
+            inicio = _data_parametro(self.request.query_params.get("inicio"))
+        except ValueError:
+            raise serializers.ValidationError(
+                {"periodo": "Informe as datas no formato AAAA-MM-DD."}
+            )
+        fim = fim or timezone.localdate()
+        inicio = inicio or fim - timedelta(days=27)
+        if inicio > fim:
+            raise serializers.ValidationError(
+                {"periodo": "A data inicial deve ser anterior à final."}
+            )
+        return inicio, fim
+
+    @action(detail=False, methods=["get"])
+    def ocupacao(self, request):
+        inicio, fim = self.get_periodo()
+        prestador = request.query_params.get("prestador")
+        if prestador is not None:
+            try:
+                prestador = int(prestador)
+            except ValueError:
+                raise serializers.ValidationError({"prestador": "Valor inválido."})
+        return Response(ocupacao_semanal(inicio, fim, prestador))
+
+    @action(detail=False, methods=["get"])
+    def servicos(self, request):
+        inicio, fim = self.get_periodo()
+        return Response(contagem_por_servico(inicio, fim))
@@ -13,4 +13,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sistema_reservas.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from core.realtime import EventosASGIMiddleware  # noqa: E402
+
+application = EventosASGIMiddleware(django_application)
@@ -0,0 +1,85 @@
+"""
+Schema OpenAPI da API.
+
+O schema é gerado no build com ``manage.py gerar_schema`` e servido como
+arquivo estático com cache HTTP longo. Sem o arquivo, é gerado uma única vez
+por processo e mantido em memória.
+"""
+
+import hashlib
+from functools import lru_cache
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.generators import OpenAPISchemaGenerator
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+from rest_framework.response import Response
+
+info = openapi.Info(
+    title="API de Sistema de Reservas",
+    default_version="v1",
+    description="Documentação da API de Sistema de Reservas com Swagger",
+    terms_of_service="https://www.seusite.com/policies/terms/",
+    contact=openapi.Contact(email="contato@seusite.com"),
+    license=openapi.License(name="BSD License"),
+)
+
+FORMATOS = {
+    ".json": (OpenAPICodecJson, "application/json"),
+    ".yaml": (OpenAPICodecYaml, "application/yaml"),
+}
+TEMPO_CACHE_SCHEMA = 60 * 60 * 24
+
+
+@lru_cache(maxsize=None)
+def obter_schema():
+    return OpenAPISchemaGenerator(info).get_schema(request=None, public=True)
+
+
+def gerar_schema(formato):
+    codec = FORMATOS[formato][0]
+    return codec(validators=[]).encode(obter_schema())
+
+
+@lru_cache(maxsize=None)
+def _conteudo_schema(formato, caminho, modificado_em):
+    if caminho is not None:
+        with open(caminho, "rb") as arquivo:
+            conteudo = arquivo.read()
+    else:
+        conteudo = gerar_schema(formato)
+    return conteudo, '"%s"' % hashlib.md5(conteudo).hexdigest()
+
+
+def conteudo_schema(formato):
+    """Retorna ``(conteudo, etag)`` do arquivo gerado no build ou da memória."""
+    caminho = settings.OPENAPI_SCHEMA_DIR / f"swagger{formato}"
+    try:
+        modificado_em = caminho.stat().st_mtime_ns
+    except FileNotFoundError:
+        return _conteudo_schema(formato, None, None)
+    return _conteudo_schema(formato, str(caminho), modificado_em)
+
+
+def schema_estatico(request, format):
+    conteudo, etag = conteudo_schema(format)
+    if etag in request.headers.get("If-None-Match", ""):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(conteudo, content_type=FORMATOS[format][1])
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, max_age=TEMPO_CACHE_SCHEMA)
+    return response
+
+
+class SchemaView(
+    get_schema_view(info, public=True, permission_classes=(permissions.AllowAny,))
+):
+    """Interfaces Swagger/ReDoc; o schema vem da memória, não é regerado."""
+
+    def get(self, request, version="", format=None):
+        return Response(obter_schema())
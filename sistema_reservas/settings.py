@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -29,6 +30,21 @@ DEBUG = True
 ALLOWED_HOSTS = []
 
 
+def _env_bool(nome, padrao):
+    valor = os.environ.get(nome)
+    if valor is None:
+        return padrao
+    return valor.strip().lower() in ("1", "true", "sim", "on")
+
+
+# Perfil de inicialização. Com RESERVAS_PERFIL=api os workers sobem apenas a
+# API: documentação, admin, sessões e mensagens só são carregados se
+# habilitados explicitamente com RESERVAS_DOCS=1 / RESERVAS_ADMIN=1.
+RESERVAS_PERFIL = os.environ.get("RESERVAS_PERFIL", "completo")
+RESERVAS_DOCS_HABILITADAS = _env_bool("RESERVAS_DOCS", RESERVAS_PERFIL != "api")
+RESERVAS_ADMIN_HABILITADO = _env_bool("RESERVAS_ADMIN", RESERVAS_PERFIL != "api")
+
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -43,11 +59,38 @@ INSTALLED_APPS = [
     "drf_yasg",
     "rest_framework_simplejwt",
 ]
+if not RESERVAS_ADMIN_HABILITADO:
+    for app in (
+        "django.contrib.admin",
+        "django.contrib.sessions",
+        "django.contrib.messages",
+    ):
+        INSTALLED_APPS.remove(app)
+if not RESERVAS_DOCS_HABILITADAS:
+    INSTALLED_APPS.remove("drf_yasg")
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
+    # Usa orjson quando instalado; caso contrário, o json da biblioteca padrão.
+    "DEFAULT_RENDERER_CLASSES": (
+        "core.renderers.RapidoJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "core.renderers.RapidoJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
+    # Aplicado apenas às views que declaram ``throttle_scope``.
+    "DEFAULT_THROTTLE_CLASSES": ("core.throttling.TokenBucketThrottle",),
+    "DEFAULT_THROTTLE_RATES": {
+        "reservas": "30/min",
+        "clientes": "10/min",
+        "cadastro": "10/min",
+        "token": "20/min",
+    },
 }
 
 SIMPLE_JWT = {
@@ -56,15 +99,85 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": False,
 }
 
+# Schema OpenAPI pré-gerado por ``manage.py gerar_schema``.
+OPENAPI_SCHEMA_DIR = BASE_DIR / "openapi"
+
+# As interfaces Swagger/ReDoc carregam o schema pré-gerado.
+SWAGGER_SETTINGS = {"SPEC_URL": ("schema-json", {"format": ".json"})}
+REDOC_SETTINGS = {"SPEC_URL": ("schema-json", {"format": ".json"})}
+
+# Cache compartilhado usado pelos bloqueios de horário, feeds e contadores.
+# Em produção use um backend compartilhado entre processos (Redis/Memcached).
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Tempo, em segundos, que um bloqueio de horário dura durante o checkout.
+RESERVAS_BLOQUEIO_TTL = 300
+
+# Por quanto tempo (segundos) a resposta de um Idempotency-Key é guardada, e
+# quanto dura a trava da requisição em andamento (acima do timeout do servidor).
+RESERVAS_IDEMPOTENCIA_TTL = 24 * 60 * 60
+RESERVAS_IDEMPOTENCIA_TRAVA = 300
+
+# Perfilamento de requisições (core.perfis): fração sorteada de 0.0 a 1.0, além
+# das pedidas por staff com o cabeçalho X-Perfilar: 1. Apenas os
+# RESERVAS_PERFIS_MAXIMO perfis mais recentes são mantidos no diretório.
+RESERVAS_PERFIL_AMOSTRAGEM = float(os.environ.get("RESERVAS_PERFIL_AMOSTRAGEM", "0"))
+RESERVAS_PERFIS_DIR = BASE_DIR / "perfis"
+RESERVAS_PERFIS_MAXIMO = 200
+
+# Lembretes de reservas (core.lembretes): backend de envio e antecedência, em
+# minutos, em relação ao horário da reserva.
+RESERVAS_LEMBRETES_BACKEND = "core.lembretes.ConsoleBackend"
+RESERVAS_LEMBRETE_ANTECEDENCIA = 24 * 60
+
+# Cadastro de clientes em lote (core.cadastro_lote): processos usados no hash
+# das senhas pelo comando importar_clientes (padrão: todos os núcleos) e limite
+# de linhas por requisição em /api/clientes/lote/, que calcula os hashes no
+# próprio worker. Importações maiores devem usar o comando.
+RESERVAS_CADASTRO_PROCESSOS = None
+RESERVAS_CADASTRO_LOTE_MAXIMO = 20
+
+# Máximo de ids aceitos em ?ids= nas listagens em lote.
+RESERVAS_LOTE_MAXIMO = 100
+
+# Dias que as tarefas concluídas ou que falharam permanecem na tabela Tarefa.
+RESERVAS_TAREFAS_RETENCAO_DIAS = 7
+
+# Idade, em dias, a partir da qual reservas finalizadas são arquivadas.
+RESERVAS_ARQUIVAR_APOS_DIAS = 180
+
+# Broker dos eventos de disponibilidade servidos via ASGI (core.realtime). O
+# MemoryBroker só serve a um único processo; o DatabaseBroker repassa os eventos
+# entre os workers pela tabela EventoDisponibilidade.
+RESERVAS_REALTIME_BROKER = "core.realtime.DatabaseBroker"
+
+# Respostas menores que isso (em bytes) não são comprimidas.
+RESERVAS_COMPRESSAO_MINIMO = 1024
+
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.CompressaoMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # Depois da autenticação, para reconhecer o staff logado no admin.
+    "core.middleware.PerfilamentoMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
+if not RESERVAS_ADMIN_HABILITADO:
+    # A API autentica via JWT no próprio DRF; sessões só servem ao admin.
+    for middleware in (
+        "django.contrib.sessions.middleware.SessionMiddleware",
+        "django.contrib.auth.middleware.AuthenticationMiddleware",
+        "django.contrib.messages.middleware.MessageMiddleware",
+    ):
+        MIDDLEWARE.remove(middleware)
 
 ROOT_URLCONF = "sistema_reservas.urls"
 
@@ -83,6 +196,10 @@ TEMPLATES = [
         },
     },
 ]
+if not RESERVAS_ADMIN_HABILITADO:
+    TEMPLATES[0]["OPTIONS"]["context_processors"].remove(
+        "django.contrib.messages.context_processors.messages"
+    )
 
 WSGI_APPLICATION = "sistema_reservas.wsgi.application"
 
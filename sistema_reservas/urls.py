@@ -1,36 +1,33 @@
-from django.contrib import admin
+from django.conf import settings
 from django.urls import path, include, re_path
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="API de Sistema de Reservas",
-        default_version="v1",
-        description="Documentação da API de Sistema de Reservas com Swagger",
-        terms_of_service="https://www.seusite.com/policies/terms/",
-        contact=openapi.Contact(email="contato@seusite.com"),
-        license=openapi.License(name="BSD License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
 
 urlpatterns = [
-    path("admin/", admin.site.urls),
     path("api/", include("core.urls")),
-    re_path(
-        r"^swagger(?P<format>\.json|\.yaml)$",
-        schema_view.without_ui(cache_timeout=0),
-        name="schema-json",
-    ),
-    re_path(
-        r"^swagger/$",
-        schema_view.with_ui("swagger", cache_timeout=0),
-        name="schema-swagger-ui",
-    ),
-    re_path(
-        r"^redoc/$", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"
-    ),
 ]
+
+# Admin e documentação são importados apenas quando habilitados no perfil.
+if settings.RESERVAS_ADMIN_HABILITADO:
+    from django.contrib import admin
+
+    urlpatterns.append(path("admin/", admin.site.urls))
+
+if settings.RESERVAS_DOCS_HABILITADAS:
+    from .openapi import SchemaView, TEMPO_CACHE_SCHEMA, schema_estatico
+
+    urlpatterns += [
+        re_path(
+            r"^swagger(?P<format>\.json|\.yaml)$",
+            schema_estatico,
+            name="schema-json",
+        ),
+        re_path(
+            r"^swagger/$",
+            SchemaView.with_ui("swagger", cache_timeout=TEMPO_CACHE_SCHEMA),
+            name="schema-swagger-ui",
+        ),
+        re_path(
+            r"^redoc/$",
+            SchemaView.with_ui("redoc", cache_timeout=TEMPO_CACHE_SCHEMA),
+            name="schema-redoc",
+        ),
+    ]